@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import HTTPBearer
 from ..core.auth import create_access_token, verify_password
 from ..core.dependencies import get_current_user
+from ..core.ratelimit import limit_auth
 from ..core.settings import get_settings
 from ..db.database import get_database
 from ..db.repositories.user_repository import UserRepository
@@ -11,7 +12,7 @@ from ..models.user import User, UserCreate, UserLogin
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = get_settings()
 
-@router.post("/signup", response_model=User, status_code=status.HTTP_201_CREATED)
+@router.post("/signup", response_model=User, status_code=status.HTTP_201_CREATED, dependencies=[Depends(limit_auth)])
 async def signup(user: UserCreate, response: Response):
     """Create a new user account"""
     db = get_database()
@@ -46,7 +47,7 @@ async def signup(user: UserCreate, response: Response):
     
     return User(**created_user.dict())
 
-@router.post("/login", response_model=User)
+@router.post("/login", response_model=User, dependencies=[Depends(limit_auth)])
 async def login(user_credentials: UserLogin, response: Response):
     """Login user and return access token"""
     db = get_database()
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from ..core.dependencies import get_current_user
+from ..core.events import TooManySubscriptions, event_bus, event_stream
+from ..core.ratelimit import limit_user
+from ..core.settings import get_settings
+from ..models.user import UserInDB
+
+router = APIRouter(tags=["events"], dependencies=[Depends(limit_user)])
+settings = get_settings()
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+@router.get("/events", response_class=StreamingResponse)
+async def stream_events(current_user: UserInDB = Depends(get_current_user)):
+    """Stream changes to the current user's tasks and labels as Server-Sent Events.
+
+    Each message is named like task.created or label.deleted and carries
+    {"type", "action", "ids"}. A resync message is sent on connect and
+    whenever the client fell too far behind; the client should then refetch
+    what it shows. Comment lines keep idle connections open.
+    """
+    try:
+        subscription = event_bus.subscribe(current_user.id)
+    except TooManySubscriptions:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"At most {settings.EVENTS_MAX_CONNECTIONS_PER_USER} event streams per user"
+        )
+    return StreamingResponse(
+        event_stream(subscription, settings.EVENTS_HEARTBEAT_SECONDS),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
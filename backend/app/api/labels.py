@@ -1,20 +1,36 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from bson import ObjectId
+from ..core.conditional import cache_headers, etag_matches, make_etag, not_modified
 from ..core.dependencies import get_current_user
+from ..core.negotiation import list_response, negotiate
+from ..core.ratelimit import limit_user
+from ..core.serialization import DocumentSerializer
 from ..db.database import get_database
 from ..db.repositories.label_repository import LabelRepository
+from ..db.repositories.version_repository import VersionRepository
 from ..models.label import Label, LabelCreate, LabelUpdate
 from ..models.user import UserInDB
 
-router = APIRouter(prefix="/labels", tags=["labels"])
+router = APIRouter(prefix="/labels", tags=["labels"], dependencies=[Depends(limit_user)])
+label_serializer = DocumentSerializer(Label)
 
 @router.get("/", response_model=List[Label])
-async def get_labels(current_user: UserInDB = Depends(get_current_user)):
-    """Get all labels for the current user"""
+async def get_labels(request: Request, current_user: UserInDB = Depends(get_current_user)):
+    """Get all labels for the current user
+
+    Negotiated like GET /tasks: MessagePack on request, compressed when large.
+    Responses carry an ETag; If-None-Match answers 304 without a query.
+    """
     db = get_database()
     label_repo = LabelRepository(db)
-    return await label_repo.get_labels_by_user(current_user.id)
+    representation = negotiate(request)
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request, representation.variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    docs = await label_repo.get_label_documents_by_user(current_user.id)
+    return await list_response(representation, docs, label_serializer, headers=cache_headers(etag))
 
 @router.post("/", response_model=Label, status_code=status.HTTP_201_CREATED)
 async def create_label(
@@ -41,6 +57,8 @@ async def create_label(
 @router.get("/{label_id}", response_model=Label)
 async def get_label(
     label_id: str, 
+    request: Request,
+    response: Response,
     current_user: UserInDB = Depends(get_current_user)
 ):
     """Get a specific label by ID"""
@@ -55,6 +73,11 @@ async def get_label(
             detail="Invalid label ID format"
         )
     
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     label = await label_repo.get_label_by_id(label_object_id, current_user.id)
     if not label:
         raise HTTPException(
@@ -62,6 +85,7 @@ async def get_label(
             detail="Label not found"
         )
     
+    response.headers.update(cache_headers(etag))
     return label
 
 @router.put("/{label_id}", response_model=Label)
@@ -106,7 +130,7 @@ async def delete_label(
     label_id: str,
     current_user: UserInDB = Depends(get_current_user)
 ):
-    """Delete a label"""
+    """Delete a label and remove it from every task"""
     db = get_database()
     label_repo = LabelRepository(db)
     
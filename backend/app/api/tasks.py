@@ -1,21 +1,224 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import date, datetime
+from typing import List, Optional, Set, Union
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from bson import ObjectId
+from ..core.cache import stats_cache
+from ..core.conditional import cache_headers, etag_matches, make_etag, not_modified
 from ..core.dependencies import get_current_user
+from ..core.negotiation import list_response, negotiate
+from ..core.ratelimit import limit_user
+from ..core.serialization import DocumentSerializer, json_response
+from ..core.settings import get_settings
+from ..core.streaming import NDJSON_MEDIA_TYPE, stream_documents
 from ..db.database import get_database
-from ..db.repositories.task_repository import TaskRepository
+from ..db.pagination import InvalidCursorError
+from ..db.repositories.task_repository import TaskRepository, BULK_SKIPPED
 from ..db.repositories.label_repository import LabelRepository
-from ..models.task import Task, TaskCreate, TaskUpdate
+from ..db.repositories.version_repository import VersionRepository
+from ..models.task import (
+    Task,
+    TaskCreate,
+    TaskUpdate,
+    TaskFilters,
+    TaskBulkCreate,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    TaskBulkItemResult,
+    TaskBulkResult,
+    TaskStats,
+    TaskExpanded,
+)
 from ..models.user import UserInDB
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+router = APIRouter(prefix="/tasks", tags=["tasks"], dependencies=[Depends(limit_user)])
+settings = get_settings()
+task_serializer = DocumentSerializer(Task)
+task_expanded_serializer = DocumentSerializer(TaskExpanded)
 
-@router.get("/", response_model=List[Task])
-async def get_tasks(current_user: UserInDB = Depends(get_current_user)):
-    """Get all tasks for the current user"""
+def _expand_param():
+    return Query(None, pattern="^labels$", description="Set to labels to embed each task's label name and color")
+
+def _include_archived_param():
+    return Query(False, description="Also read done tasks moved to the archive")
+
+def _serializer(expand: Optional[str]) -> DocumentSerializer:
+    return task_expanded_serializer if expand == "labels" else task_serializer
+
+def _label_object_ids(label_ids: Optional[List[str]]) -> List[ObjectId]:
+    try:
+        return [ObjectId(label_id) for label_id in label_ids or []]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid label ID format"
+        )
+
+@router.get("/", response_model=List[Union[TaskExpanded, Task]])
+async def get_tasks(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order on created_at"),
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(open|done)$"),
+    priority: Optional[str] = Query(None, pattern="^(High|Medium|Low)$"),
+    deadline_from: Optional[date] = Query(None),
+    deadline_to: Optional[date] = Query(None),
+    label_ids: Optional[List[str]] = Query(None),
+    label_match: str = Query("any", pattern="^(any|all)$"),
+    stream: bool = Query(False, description="Stream matching tasks as a chunked JSON array"),
+    expand: Optional[str] = _expand_param(),
+    include_archived: bool = _include_archived_param(),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get a page of tasks for the current user.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    With stream=true or Accept: application/x-ndjson matching tasks are
+    streamed from the cursor position, up to limit if one is given.
+    Pages are sent as MessagePack for Accept: application/msgpack and are
+    compressed when large. Responses carry an ETag; If-None-Match answers
+    304 without a query. With expand=labels each task also has a labels
+    list of {_id, name, color}, joined in the same query. Archived tasks
+    are left out unless include_archived=true.
+    """
+    db = get_database()
+    task_repo = TaskRepository(db)
+
+    representation = negotiate(request)
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request, representation.variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    filters = TaskFilters(
+        status=status_filter,
+        priority=priority,
+        deadline_from=deadline_from,
+        deadline_to=deadline_to,
+        label_ids=_label_object_ids(label_ids),
+        label_match=label_match,
+    )
+
+    if stream or representation.media_type == NDJSON_MEDIA_TYPE:
+        try:
+            docs = task_repo.stream_tasks_by_user(
+                current_user.id,
+                filters=filters,
+                cursor=cursor,
+                order=order,
+                limit=limit,
+                expand_labels=expand == "labels",
+                include_archived=include_archived,
+            )
+        except InvalidCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        return stream_documents(request, docs, _serializer(expand), headers=cache_headers(etag))
+
+    try:
+        docs, next_cursor = await task_repo.get_task_documents_by_user(
+            current_user.id,
+            filters=filters,
+            limit=limit or settings.TASKS_DEFAULT_PAGE_SIZE,
+            cursor=cursor,
+            order=order,
+            expand_labels=expand == "labels",
+            include_archived=include_archived,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    headers = cache_headers(etag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return await list_response(representation, docs, _serializer(expand), headers=headers)
+
+@router.get("/search", response_model=List[Task])
+async def search_tasks(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200, description="Words or \"quoted phrases\" to search for"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.TASKS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    status_filter: Optional[str] = Query(None, alias="status", pattern="^(open|done)$"),
+    label_ids: Optional[List[str]] = Query(None),
+    label_match: str = Query("any", pattern="^(any|all)$"),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Search the current user's task titles and descriptions.
+
+    Results are ranked by relevance, with title matches weighted above
+    description matches. The cursor for the next page is returned in the
+    X-Next-Cursor header. Responses are negotiated and carry an ETag as for
+    GET /tasks.
+    """
+    db = get_database()
+    task_repo = TaskRepository(db)
+
+    filters = TaskFilters(status=status_filter, label_ids=_label_object_ids(label_ids), label_match=label_match)
+
+    representation = negotiate(request)
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request, representation.variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        docs, next_cursor = await task_repo.search_task_documents(
+            current_user.id,
+            q,
+            filters=filters,
+            limit=limit or settings.TASKS_DEFAULT_PAGE_SIZE,
+            cursor=cursor,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    headers = cache_headers(etag)
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return await list_response(representation, docs, task_serializer, headers=headers)
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    request: Request,
+    response: Response,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Get task counts for the current user's dashboard.
+
+    Counts by status, priority and label plus open tasks that are overdue
+    or due within a week, from one aggregation. Results are cached per user
+    until the next task write or the next UTC day.
+    """
     db = get_database()
     task_repo = TaskRepository(db)
-    return await task_repo.get_tasks_by_user(current_user.id)
+
+    today = datetime.utcnow().date()
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request, today.isoformat())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    # The version check keeps entries correct across workers; the local
+    # invalidation on writes only frees memory sooner
+    key = str(current_user.id)
+    cached = stats_cache.get(key)
+    if cached is not None and cached[0] == (version, today):
+        stats = cached[1]
+    else:
+        stats = await task_repo.get_task_stats(current_user.id, today)
+        stats_cache.set(key, ((version, today), stats))
+
+    response.headers.update(cache_headers(etag))
+    return stats
 
 @router.post("/", response_model=Task, status_code=status.HTTP_201_CREATED)
 async def create_task(
@@ -39,12 +242,147 @@ async def create_task(
     
     return await task_repo.create_task(task, current_user.id)
 
-@router.get("/{task_id}", response_model=Task)
+def _check_bulk_size(count: int):
+    if count > settings.TASKS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk requests are limited to {settings.TASKS_BULK_MAX_ITEMS} items"
+        )
+
+def _check_unique_ids(ids: List[ObjectId]):
+    # Existence is checked per distinct id, so a repeated id would pass
+    # twice while only its first write can act on the task
+    seen = set()
+    for task_id in ids:
+        if task_id in seen:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Task {task_id} appears more than once"
+            )
+        seen.add(task_id)
+
+async def _label_errors(
+    label_repo: LabelRepository,
+    user_id: ObjectId,
+    label_id_lists: List[Optional[List[ObjectId]]],
+) -> List[Optional[str]]:
+    """Validate every label reference in a batch with a single query"""
+    referenced: Set[ObjectId] = {label_id for label_ids in label_id_lists for label_id in label_ids or []}
+    known = await label_repo.get_existing_label_ids(referenced, user_id) if referenced else set()
+    errors: List[Optional[str]] = []
+    for label_ids in label_id_lists:
+        missing = [str(label_id) for label_id in label_ids or [] if label_id not in known]
+        errors.append(
+            f"Labels not found or do not belong to user: {', '.join(missing)}" if missing else None
+        )
+    return errors
+
+def _write_result(index: int, task_id: Optional[ObjectId], error: Optional[str], success: str) -> TaskBulkItemResult:
+    if error is None:
+        return TaskBulkItemResult(index=index, id=task_id, status=success)
+    return TaskBulkItemResult(
+        index=index,
+        id=task_id,
+        status="skipped" if error == BULK_SKIPPED else "failed",
+        error=error,
+    )
+
+@router.post("/bulk", response_model=TaskBulkResult)
+async def bulk_create_tasks(
+    payload: TaskBulkCreate,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Create many tasks with a single bulk write"""
+    _check_bulk_size(len(payload.items))
+    db = get_database()
+    task_repo = TaskRepository(db)
+    label_repo = LabelRepository(db)
+
+    results: List[Optional[TaskBulkItemResult]] = [None] * len(payload.items)
+    label_errors = await _label_errors(label_repo, current_user.id, [task.label_ids for task in payload.items])
+    valid = []
+    for index, error in enumerate(label_errors):
+        if error:
+            results[index] = TaskBulkItemResult(index=index, status="invalid_labels", error=error)
+        else:
+            valid.append(index)
+
+    written = await task_repo.bulk_create_tasks(
+        [payload.items[index] for index in valid], current_user.id, ordered=payload.ordered
+    )
+    for index, (task_id, error) in zip(valid, written):
+        results[index] = _write_result(index, None if error else task_id, error, "created")
+    return TaskBulkResult(results=results)
+
+@router.patch("/bulk", response_model=TaskBulkResult)
+async def bulk_update_tasks(
+    payload: TaskBulkUpdate,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Update many tasks with a single bulk write"""
+    _check_bulk_size(len(payload.items))
+    _check_unique_ids([item.id for item in payload.items])
+    db = get_database()
+    task_repo = TaskRepository(db)
+    label_repo = LabelRepository(db)
+
+    results: List[Optional[TaskBulkItemResult]] = [None] * len(payload.items)
+    existing = await task_repo.get_existing_task_ids({item.id for item in payload.items}, current_user.id)
+    label_errors = await _label_errors(label_repo, current_user.id, [item.label_ids for item in payload.items])
+    valid = []
+    for index, (item, error) in enumerate(zip(payload.items, label_errors)):
+        if item.id not in existing:
+            results[index] = TaskBulkItemResult(index=index, id=item.id, status="not_found", error="Task not found")
+        elif error:
+            results[index] = TaskBulkItemResult(index=index, id=item.id, status="invalid_labels", error=error)
+        else:
+            valid.append(index)
+
+    updates = [(payload.items[index].id, payload.items[index]) for index in valid]
+    errors = await task_repo.bulk_update_tasks(updates, current_user.id, ordered=payload.ordered)
+    for index, error in zip(valid, errors):
+        results[index] = _write_result(index, payload.items[index].id, error, "updated")
+    return TaskBulkResult(results=results)
+
+@router.delete("/bulk", response_model=TaskBulkResult)
+async def bulk_delete_tasks(
+    payload: TaskBulkDelete,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """Delete many tasks with a single bulk write"""
+    _check_bulk_size(len(payload.ids))
+    _check_unique_ids(payload.ids)
+    db = get_database()
+    task_repo = TaskRepository(db)
+
+    results: List[Optional[TaskBulkItemResult]] = [None] * len(payload.ids)
+    existing = await task_repo.get_existing_task_ids(set(payload.ids), current_user.id)
+    valid = []
+    for index, task_id in enumerate(payload.ids):
+        if task_id in existing:
+            valid.append(index)
+        else:
+            results[index] = TaskBulkItemResult(index=index, id=task_id, status="not_found", error="Task not found")
+
+    errors = await task_repo.bulk_delete_tasks([payload.ids[index] for index in valid], current_user.id, ordered=payload.ordered)
+    for index, error in zip(valid, errors):
+        results[index] = _write_result(index, payload.ids[index], error, "deleted")
+    return TaskBulkResult(results=results)
+
+@router.get("/{task_id}", response_model=Union[TaskExpanded, Task])
 async def get_task(
     task_id: str, 
+    request: Request,
+    response: Response,
+    expand: Optional[str] = _expand_param(),
+    include_archived: bool = _include_archived_param(),
     current_user: UserInDB = Depends(get_current_user)
 ):
-    """Get a specific task by ID"""
+    """Get a specific task by ID
+
+    With expand=labels the task also has a labels list of {_id, name, color}.
+    Archived tasks are found only with include_archived=true, and are read only.
+    """
     db = get_database()
     task_repo = TaskRepository(db)
     
@@ -56,6 +394,25 @@ async def get_task(
             detail="Invalid task ID format"
         )
     
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    if expand == "labels" or include_archived:
+        doc = await task_repo.get_task_document(
+            task_object_id,
+            current_user.id,
+            expand_labels=expand == "labels",
+            include_archived=include_archived,
+        )
+        if not doc:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Task not found"
+            )
+        return json_response(_serializer(expand).dump_one(doc), headers=cache_headers(etag))
+    
     task = await task_repo.get_task_by_id(task_object_id, current_user.id)
     if not task:
         raise HTTPException(
@@ -63,6 +420,7 @@ async def get_task(
             detail="Task not found"
         )
     
+    response.headers.update(cache_headers(etag))
     return task
 
 @router.put("/{task_id}", response_model=Task)
@@ -127,12 +485,21 @@ async def delete_task(
             detail="Task not found"
         )
 
-@router.get("/by-label/{label_id}", response_model=List[Task])
+@router.get("/by-label/{label_id}", response_model=List[Union[TaskExpanded, Task]])
 async def get_tasks_by_label(
     label_id: str,
+    request: Request,
+    stream: bool = Query(False, description="Stream tasks as a chunked JSON array"),
+    expand: Optional[str] = _expand_param(),
     current_user: UserInDB = Depends(get_current_user)
 ):
-    """Get tasks that have a specific label"""
+    """Get tasks that have a specific label
+
+    With stream=true or Accept: application/x-ndjson the tasks are streamed;
+    otherwise the response is negotiated as for GET /tasks.
+    Responses carry an ETag; If-None-Match answers 304 without a query.
+    expand=labels embeds each task's labels as for GET /tasks.
+    """
     db = get_database()
     task_repo = TaskRepository(db)
     label_repo = LabelRepository(db)
@@ -145,6 +512,12 @@ async def get_tasks_by_label(
             detail="Invalid label ID format"
         )
     
+    representation = negotiate(request)
+    version = await VersionRepository(db).get_version(current_user.id)
+    etag = make_etag(version, current_user.id, request, representation.variant)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     # Verify label belongs to user
     label = await label_repo.get_label_by_id(label_object_id, current_user.id)
     if not label:
@@ -153,4 +526,14 @@ async def get_tasks_by_label(
             detail="Label not found"
         )
     
-    return await task_repo.get_tasks_by_label(current_user.id, label_object_id)
+    if stream or representation.media_type == NDJSON_MEDIA_TYPE:
+        return stream_documents(
+            request,
+            task_repo.stream_tasks_by_label(current_user.id, label_object_id, expand_labels=expand == "labels"),
+            _serializer(expand),
+            headers=cache_headers(etag),
+        )
+    docs = await task_repo.get_task_documents_by_label(
+        current_user.id, label_object_id, expand_labels=expand == "labels"
+    )
+    return await list_response(representation, docs, _serializer(expand), headers=cache_headers(etag))
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from ..core.dependencies import get_current_user
+from ..core.ratelimit import limit_user
+from ..core.settings import get_settings
+from ..core.streaming import NDJSON_MEDIA_TYPE, LineTooLongError, chunked, split_lines
+from ..db.database import get_database, utcnow
+from ..db.transfer import Importer, csv_export, export_records, ndjson_export
+from ..models.transfer import ImportResult
+from ..models.user import UserInDB
+
+router = APIRouter(tags=["transfer"], dependencies=[Depends(limit_user)])
+settings = get_settings()
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_data(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: UserInDB = Depends(get_current_user),
+):
+    """Stream all of the current user's labels, then tasks.
+
+    NDJSON lines are the same objects the API returns, with a "type" of
+    "label" or "task", and can be sent back to POST /import. CSV puts both
+    in one table with a type column and label ids joined with ';'.
+    """
+    records = export_records(get_database(), current_user.id)
+    if export_format == "csv":
+        body, media_type = csv_export(records), "text/csv; charset=utf-8"
+    else:
+        body, media_type = chunked(ndjson_export(records)), NDJSON_MEDIA_TYPE
+    filename = f"todo_export_{utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.post("/import", response_model=ImportResult)
+async def import_data(request: Request, current_user: UserInDB = Depends(get_current_user)):
+    """Import an NDJSON export into the current user's account.
+
+    The body is read as it arrives and written in batches, so it can be
+    any size. Labels are matched by name to existing ones; tasks are always
+    created new. Invalid lines are skipped and listed in the result.
+    """
+    importer = Importer(
+        get_database(), current_user.id, settings.IMPORT_BATCH_SIZE, settings.IMPORT_MAX_ERRORS,
+    )
+    try:
+        async for number, line in split_lines(request.stream(), settings.IMPORT_MAX_LINE_BYTES):
+            await importer.add_line(number, line)
+    except LineTooLongError as e:
+        # The rest of the body cannot be split reliably; keep what came before
+        importer.error(e.line, f"Lines are limited to {settings.IMPORT_MAX_LINE_BYTES} bytes; import stopped")
+    return await importer.finish()
@@ -0,0 +1,35 @@
+import hashlib
+from typing import Dict
+from fastapi import Request, Response, status
+from bson import ObjectId
+
+def make_etag(version: int, user_id: ObjectId, request: Request, variant: str = "") -> str:
+    """Strong ETag for a user's data version and the representation requested.
+
+    The version changes on every task or label write; the digest covers the
+    user, path, query parameters and any variant (such as the media type) so
+    different representations of the same version never share a tag.
+    """
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    key = "\n".join((str(user_id), request.url.path, query, variant))
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Return True when If-None-Match lists the ETag (weak comparison, as RFC 9110 requires)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """Headers letting clients cache privately but revalidate every time"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def not_modified(etag: str) -> Response:
+    # A 304 carries the Vary its 200 would have, so caches key it the same way
+    headers = cache_headers(etag)
+    headers["Vary"] = "Accept, Accept-Encoding"
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
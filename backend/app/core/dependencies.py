@@ -1,19 +1,31 @@
 from typing import Optional
-from fastapi import Depends, HTTPException, status, Cookie
+from fastapi import Depends, HTTPException, Request, status, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
 from ..core.auth import verify_token
+from ..core.cache import user_cache
+from ..core.profiling import timed
 from ..db.database import get_database
 from ..db.repositories.user_repository import UserRepository
 from ..models.user import UserInDB
 
-security = HTTPBearer()
+# The token may come from the access_token cookie instead, e.g. for EventSource
+security = HTTPBearer(auto_error=False)
 
 async def get_current_user(
+    request: Request,
     authorization: Optional[HTTPAuthorizationCredentials] = Depends(security),
     token: Optional[str] = Cookie(None, alias="access_token")
 ) -> UserInDB:
     """Get current authenticated user"""
+    with timed("auth"):
+        return await _authenticate(request, authorization, token)
+
+async def _authenticate(
+    request: Request,
+    authorization: Optional[HTTPAuthorizationCredentials],
+    token: Optional[str],
+) -> UserInDB:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -38,20 +50,32 @@ async def get_current_user(
     except HTTPException:
         raise credentials_exception
     
+    # Exposed to the request logging middleware
+    request.state.user_id = user_id
+    
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    if not ObjectId.is_valid(user_id):
+        raise credentials_exception
+    
     db = get_database()
     user_repo = UserRepository(db)
     user = await user_repo.get_user_by_id(ObjectId(user_id))
     if user is None:
         raise credentials_exception
     
+    user_cache.set(user_id, user)
     return user
 
 async def get_current_user_optional(
+    request: Request,
     authorization: Optional[HTTPAuthorizationCredentials] = Depends(security),
     token: Optional[str] = Cookie(None, alias="access_token")
 ) -> Optional[UserInDB]:
     """Get current user if authenticated, otherwise None"""
     try:
-        return await get_current_user(authorization, token)
+        return await get_current_user(request, authorization, token)
     except HTTPException:
         return None
@@ -0,0 +1,145 @@
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+from .settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class Event:
+    """A change to one kind of a user's documents"""
+
+    __slots__ = ("id", "kind", "action", "ids")
+
+    def __init__(self, kind: str, action: str, ids: Iterable[Any] = ()):
+        self.id = 0
+        self.kind = kind
+        self.action = action
+        self.ids = [str(i) for i in ids]
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}.{self.action}" if self.kind else self.action
+
+    def encode(self) -> bytes:
+        """Format as one Server-Sent Events message"""
+        data = json.dumps({"type": self.kind, "action": self.action, "ids": self.ids}, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.name}\ndata: {data}\n\n".encode()
+
+# Sent instead of the dropped events when a subscriber falls behind, and on
+# connect: the client should refetch what it shows
+RESYNC = "resync"
+
+class Subscription:
+    """One connection's bounded queue of events.
+
+    Publishing never waits on a subscriber. When the queue is full the
+    backlog is dropped and the next read returns a resync event instead,
+    so a slow client costs at most EVENTS_QUEUE_SIZE queued events.
+    """
+
+    def __init__(self, user_id: str, maxsize: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[Optional[Event]]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+        self.closed = False
+
+    def offer(self, event: Event):
+        if self.overflowed or self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def close(self):
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self) -> Optional[Event]:
+        """Next event, a resync after an overflow, or None once closed and drained"""
+        if self.overflowed:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = False
+            return Event("", RESYNC)
+        if self.closed and self.queue.empty():
+            return None
+        # Events queued before close come first, then close's None
+        return await self.queue.get()
+
+class TooManySubscriptions(Exception):
+    """Raised when a user already has the maximum number of event streams"""
+
+class EventBus:
+    """In-process publish/subscribe of document changes, keyed by user id"""
+
+    def __init__(self, queue_size: int, max_per_user: int, source: str = "local"):
+        self.queue_size = queue_size
+        self.max_per_user = max_per_user
+        # "local" while repository writes publish directly, "change_stream"
+        # while a change stream feeds the bus instead
+        self.source = source
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, user_id: Any) -> Subscription:
+        key = str(user_id)
+        subscriptions = self._subscriptions.setdefault(key, set())
+        if len(subscriptions) >= self.max_per_user:
+            raise TooManySubscriptions(key)
+        subscription = Subscription(key, self.queue_size)
+        subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id: Any, event: Event):
+        subscriptions = self._subscriptions.get(str(user_id))
+        if not subscriptions:
+            return
+        event.id = next(self._sequence)
+        for subscription in subscriptions:
+            subscription.offer(event)
+
+    def close_all(self):
+        """End every open stream, e.g. on shutdown"""
+        for subscriptions in list(self._subscriptions.values()):
+            for subscription in list(subscriptions):
+                subscription.close()
+
+    def connection_count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+event_bus = EventBus(settings.EVENTS_QUEUE_SIZE, settings.EVENTS_MAX_CONNECTIONS_PER_USER, settings.EVENTS_SOURCE)
+
+def publish_change(user_id: Any, kind: str, action: str, ids: Iterable[Any] = ()):
+    """Publish a repository write, unless a change stream is the event source"""
+    if event_bus.source == "local":
+        event_bus.publish(user_id, Event(kind, action, ids))
+
+async def event_stream(subscription: Subscription, heartbeat: float):
+    """Yield SSE messages for a subscription, with comment heartbeats when idle"""
+    try:
+        yield b"retry: 5000\n\n" + Event("", RESYNC).encode()
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield event.encode()
+    finally:
+        event_bus.unsubscribe(subscription)
@@ -1,32 +1,153 @@
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
-from typing import Any, Dict
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
+from .settings import get_settings
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-    ]
-)
+settings = get_settings()
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue records untouched so formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(JsonFormatter())
+queue_listener = QueueListener(_log_queue, _stream_handler, respect_handler_level=True)
+
+def configure_logging():
+    """Route all logging through a queue so stdout writes happen off the event loop"""
+    root = logging.getLogger()
+    if any(isinstance(handler, DeferredQueueHandler) for handler in root.handlers):
+        return
+    root.setLevel(settings.LOG_LEVEL)
+    root.addHandler(DeferredQueueHandler(_log_queue))
+    queue_listener.start()
+    atexit.register(queue_listener.stop)
+
+configure_logging()
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
+
+class TracebackRateLimiter:
+    """Allow at most `limit` full tracebacks per rolling window"""
+
+    def __init__(self, limit: int, window: float = 60.0):
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._count = 0
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                self._window_start = now
+                self._count = 0
+            if self._count < self.limit:
+                self._count += 1
+                return True
+            self.suppressed += 1
+            return False
 
-def log_request(request: Request, response_data: Any = None):
-    """Log HTTP request details"""
-    logger.info(
-        f"Request: {request.method} {request.url.path} - "
-        f"Client: {request.client.host if request.client else 'unknown'} - "
-        f"Status: {getattr(response_data, 'status_code', 'N/A')}"
+traceback_limiter = TracebackRateLimiter(settings.LOG_TRACEBACKS_PER_MINUTE)
+
+def log_request(
+    method: str,
+    route: str,
+    status_code: int,
+    duration_ms: float,
+    user_id: Optional[str] = None,
+    client: Optional[str] = None,
+):
+    """Log HTTP request details as a structured record"""
+    access_logger.info(
+        "request",
+        extra={"fields": {
+            "method": method,
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "user_id": user_id,
+            "client": client,
+        }},
     )
 
-def log_error(error: Exception, context: str = ""):
-    """Log error with context"""
-    logger.error(f"Error in {context}: {str(error)}", exc_info=True)
+def log_error(error: Exception, context: str = "", with_traceback: bool = True):
+    """Log error with context, keeping tracebacks within the rate limit"""
+    exc_info = with_traceback and traceback_limiter.allow()
+    logger.error("Error in %s: %s", context, error, exc_info=error if exc_info else None)
+
+class RequestLoggingMiddleware:
+    """Pure ASGI middleware emitting one structured record per HTTP request.
+
+    Error responses are always logged; successful ones are sampled at
+    sample_rate. The route is the matched path template, not the raw URL.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status_code >= 400 or self.sample_rate >= 1.0 or random.random() < self.sample_rate:
+                route = scope.get("route")
+                client = scope.get("client")
+                log_request(
+                    scope["method"],
+                    getattr(route, "path", scope["path"]),
+                    status_code,
+                    (time.perf_counter() - start) * 1000,
+                    user_id=scope.get("state", {}).get("user_id"),
+                    client=client[0] if client else None,
+                )
 
 def create_error_response(status_code: int, detail: str, error_code: str = None) -> Dict[str, Any]:
     """Create standardized error response"""
@@ -40,8 +161,8 @@ def create_error_response(status_code: int, detail: str, error_code: str = None)
 
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with structured logging"""
-    log_error(exc, f"HTTP Exception: {request.method} {request.url.path}")
-    
+    log_error(exc, f"HTTP Exception: {request.method} {request.url.path}", with_traceback=False)
+
     return JSONResponse(
         status_code=exc.status_code,
         content=create_error_response(exc.status_code, exc.detail)
@@ -49,8 +170,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 
 async def validation_exception_handler(request: Request, exc: ValidationError):
     """Handle Pydantic validation errors"""
-    log_error(exc, f"Validation Error: {request.method} {request.url.path}")
-    
+    log_error(exc, f"Validation Error: {request.method} {request.url.path}", with_traceback=False)
+
     return JSONResponse(
         status_code=422,
         content=create_error_response(422, "Validation error", "VALIDATION_ERROR")
@@ -59,7 +180,7 @@ async def validation_exception_handler(request: Request, exc: ValidationError):
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions"""
     log_error(exc, f"General Exception: {request.method} {request.url.path}")
-    
+
     return JSONResponse(
         status_code=500,
         content=create_error_response(500, "Internal server error", "INTERNAL_ERROR")
@@ -0,0 +1,86 @@
+import asyncio
+import gzip
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+from fastapi import Request, Response
+from . import serialization
+from .serialization import DocumentSerializer
+from .settings import get_settings
+from .profiling import timed
+from .streaming import JSON_MEDIA_TYPE, NDJSON_MEDIA_TYPE, json_quality, parse_qualities
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is used when brotli is not installed
+    brotli = None
+
+settings = get_settings()
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Bodies above this are compressed off the event loop; zlib and brotli release the GIL
+_THREAD_COMPRESSION_SIZE = 64 * 1024
+
+class Representation(NamedTuple):
+    """The media type and content coding chosen for a list response"""
+
+    media_type: str
+    encoding: Optional[str]
+
+    @property
+    def variant(self) -> str:
+        """Distinguishes representations of the same data, e.g. in ETags"""
+        return f"{self.media_type};{self.encoding or 'identity'}"
+
+def negotiate(request: Request) -> Representation:
+    """Pick the response media type and compression from the request headers.
+
+    The supported media type with the highest q value wins, and JSON wins
+    ties, so */* and a missing Accept header mean JSON. MessagePack is a
+    candidate only when msgpack is installed; brotli is preferred over gzip
+    when both are accepted and brotli is installed.
+    """
+    accept = parse_qualities(request.headers.get("accept", ""))
+    candidates = [(JSON_MEDIA_TYPE, json_quality(accept)), (NDJSON_MEDIA_TYPE, accept.get(NDJSON_MEDIA_TYPE, 0))]
+    if serialization.msgpack is not None:
+        candidates.append((MSGPACK_MEDIA_TYPES[0], max(accept.get(t, 0) for t in MSGPACK_MEDIA_TYPES)))
+    # max keeps the first of equal q values, and JSON is first
+    media_type, quality = max(candidates, key=lambda candidate: candidate[1])
+    if quality <= 0:
+        media_type = JSON_MEDIA_TYPE
+
+    accept_encoding = parse_qualities(request.headers.get("accept-encoding", ""))
+    wildcard = accept_encoding.get("*", 0)
+    encoding = None
+    if brotli is not None and accept_encoding.get("br", wildcard) > 0:
+        encoding = "br"
+    elif accept_encoding.get("gzip", wildcard) > 0:
+        encoding = "gzip"
+    return Representation(media_type, encoding)
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_COMPRESSION_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_COMPRESSION_LEVEL, mtime=0)
+
+async def list_response(
+    representation: Representation,
+    docs: Iterable[Dict[str, Any]],
+    serializer: DocumentSerializer,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Serialize documents in the negotiated representation and compress large bodies"""
+    if representation.media_type in MSGPACK_MEDIA_TYPES:
+        body = serializer.pack_many(docs)
+    else:
+        body = serializer.dump_many(docs)
+
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept, Accept-Encoding"
+    if representation.encoding and len(body) >= settings.COMPRESSION_MIN_SIZE:
+        with timed("compress"):
+            if len(body) >= _THREAD_COMPRESSION_SIZE:
+                body = await asyncio.to_thread(_compress, body, representation.encoding)
+            else:
+                body = _compress(body, representation.encoding)
+        headers["Content-Encoding"] = representation.encoding
+    return Response(content=body, headers=headers, media_type=representation.media_type)
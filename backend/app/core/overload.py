@@ -0,0 +1,67 @@
+from typing import Optional
+from starlette.responses import JSONResponse
+from .metrics import Counter, Gauge, registry
+from .settings import get_settings
+
+settings = get_settings()
+
+shed_requests = registry.register(Counter(
+    "http_requests_shed_total", "Requests refused with 503 by the load shedder", ("reason",),
+))
+admitted_in_flight = registry.register(Gauge(
+    "http_requests_admitted_in_flight", "Requests counted against SHED_MAX_IN_FLIGHT",
+))
+
+class LoadSheddingMiddleware:
+    """Pure ASGI middleware refusing new requests with 503 while overloaded.
+
+    A request is shed when this worker already has SHED_MAX_IN_FLIGHT
+    requests in progress, or when recent Mongo connection checkouts waited
+    longer than SHED_POOL_WAIT_MS on average. The pool signal decays while
+    no checkouts happen, so shedding stops on its own once load drops.
+    Either limit is off when set to 0. Paths in SHED_EXEMPT_PATHS, such as
+    health checks, event streams and export downloads, are neither shed nor
+    counted, so long-lived responses do not hold in-flight slots.
+    """
+
+    def __init__(self, app, pool_listener=None):
+        self.app = app
+        self.pool_listener = pool_listener
+        self.max_in_flight = settings.SHED_MAX_IN_FLIGHT
+        self.max_pool_wait = settings.SHED_POOL_WAIT_MS / 1000
+        self.retry_after = str(settings.SHED_RETRY_AFTER_SECONDS)
+        self.exempt = {path.strip() for path in settings.SHED_EXEMPT_PATHS.split(",") if path.strip()}
+        self.in_flight = 0
+
+    def overloaded(self) -> Optional[str]:
+        """The reason to shed a new request now, if any"""
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        if self.max_pool_wait and self.pool_listener is not None:
+            if self.pool_listener.recent_wait() >= self.max_pool_wait:
+                return "pool_wait"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.overloaded()
+        if reason is not None:
+            shed_requests.inc((reason,))
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry later"},
+                status_code=503,
+                headers={"Retry-After": self.retry_after},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        admitted_in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            admitted_in_flight.dec()
@@ -0,0 +1,140 @@
+import asyncio
+import cProfile
+import hmac
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from .settings import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Per-request accumulator of time spent in each phase. The dict is shared by
+# reference with contexts copied for driver threads, so Mongo command
+# listeners running there add to the same request's totals.
+_phase_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("phase_timings", default=None)
+# Guards those shared dicts; the read-modify-write below is not atomic
+_phase_lock = threading.Lock()
+
+def record_phase(phase: str, seconds: float):
+    """Add time to a phase of the current request, if one is being timed"""
+    timings = _phase_timings.get()
+    if timings is not None:
+        with _phase_lock:
+            timings[phase] = timings.get(phase, 0.0) + seconds
+
+@contextmanager
+def timed(phase: str):
+    """Time a block as part of a phase of the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, time.perf_counter() - start)
+
+_profile_lock = threading.Lock()
+
+def _profile_path(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    return os.path.join(settings.PROFILE_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{method}_{slug}.prof")
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware for slow-request breakdowns and on-demand profiles.
+
+    Every request gets an auth/db/serialize breakdown, logged when it takes
+    longer than SLOW_REQUEST_THRESHOLD_MS. Auth time includes the user lookup
+    on a cache miss, which is also counted under db.
+
+    When PROFILING_ENABLED is set and the request carries PROFILING_HEADER
+    with PROFILING_TOKEN, the request runs under cProfile and the stats are
+    written to PROFILE_DIR. cProfile sees everything on the event loop, so
+    only one request is profiled at a time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.slow_threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        self.header = settings.PROFILING_HEADER.lower().encode()
+
+    def _profile_requested(self, scope) -> bool:
+        if not settings.PROFILING_ENABLED or not settings.PROFILING_TOKEN:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                return hmac.compare_digest(value, settings.PROFILING_TOKEN.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        profile_path = None
+        if self._profile_requested(scope) and _profile_lock.acquire(blocking=False):
+            profiler = cProfile.Profile()
+            profile_path = _profile_path(scope["method"], scope["path"])
+
+        long_lived = False
+
+        async def send_wrapper(message):
+            nonlocal long_lived
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                # Event streams stay open by design and are never slow requests
+                long_lived = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in headers
+                )
+                if profile_path:
+                    headers.append((b"x-profile-file", os.path.basename(profile_path).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        timings: Dict[str, float] = {}
+        token = _phase_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            duration = time.perf_counter() - start
+            _phase_timings.reset(token)
+            if profiler is not None:
+                await self._save_profile(profiler, profile_path)
+            if duration >= self.slow_threshold and not long_lived:
+                # A driver thread may still be adding to the dict
+                with _phase_lock:
+                    timings = dict(timings)
+                self._log_slow_request(scope, duration, timings)
+
+    async def _save_profile(self, profiler: cProfile.Profile, path: str):
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            await asyncio.to_thread(profiler.dump_stats, path)
+            logger.info("Saved request profile to %s", path)
+        finally:
+            _profile_lock.release()
+
+    def _log_slow_request(self, scope, duration: float, timings: Dict[str, float]):
+        route = scope.get("route")
+        breakdown = {f"{phase}_ms": round(seconds * 1000, 2) for phase, seconds in timings.items()}
+        accounted = sum(timings.values())
+        logger.warning(
+            "slow request",
+            extra={"fields": {
+                "method": scope["method"],
+                "route": getattr(route, "path", scope["path"]),
+                "duration_ms": round(duration * 1000, 2),
+                "other_ms": round(max(duration - accounted, 0.0) * 1000, 2),
+                **breakdown,
+            }},
+        )
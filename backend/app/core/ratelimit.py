@@ -0,0 +1,92 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from .dependencies import get_current_user
+from .metrics import Counter, registry
+from .settings import get_settings
+from ..models.user import UserInDB
+
+settings = get_settings()
+
+rate_limited_requests = registry.register(Counter(
+    "http_requests_rate_limited_total", "Requests refused with 429 by rate limit budget",
+    ("budget",),
+))
+
+class TokenBucketLimiter:
+    """Token buckets keyed by client, refilled at `rate` tokens per second.
+
+    Buckets are kept in LRU order and the least recently used is dropped
+    past `maxsize`, which at worst hands that client a fresh burst. Only
+    called from the event loop, so there is no lock.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        maxsize: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.clock = clock
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for key: 0.0 if allowed, else seconds until one is available"""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self.burst), now]
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            return 0.0
+        return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+auth_limiter = TokenBucketLimiter(
+    settings.RATE_LIMIT_AUTH_PER_MINUTE / 60, settings.RATE_LIMIT_AUTH_BURST, settings.RATE_LIMIT_MAX_KEYS,
+)
+user_limiter = TokenBucketLimiter(
+    settings.RATE_LIMIT_USER_PER_SECOND, settings.RATE_LIMIT_USER_BURST, settings.RATE_LIMIT_MAX_KEYS,
+)
+
+def client_ip(request: Request) -> str:
+    """Client address, from RATE_LIMIT_CLIENT_IP_HEADER when behind a trusted proxy"""
+    if settings.RATE_LIMIT_CLIENT_IP_HEADER:
+        forwarded: Optional[str] = request.headers.get(settings.RATE_LIMIT_CLIENT_IP_HEADER)
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def _enforce(limiter: TokenBucketLimiter, key: Hashable, budget: str):
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    wait = limiter.acquire(key)
+    if wait:
+        rate_limited_requests.inc((budget,))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+async def limit_auth(request: Request):
+    """Rate limit credential checks per client IP, before any password hashing"""
+    _enforce(auth_limiter, client_ip(request), "auth")
+
+async def limit_user(current_user: UserInDB = Depends(get_current_user)):
+    """Rate limit data routes per authenticated user"""
+    _enforce(user_limiter, str(current_user.id), "user")
@@ -0,0 +1,98 @@
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Type, Union, get_args, get_origin
+from bson import ObjectId
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from .profiling import timed
+
+try:
+    import msgpack
+except ImportError:  # optional: MessagePack responses are offered only when installed
+    msgpack = None
+
+_MISSING = object()
+
+def _identity(value: Any) -> Any:
+    return value
+
+def _to_date(value: Any) -> Any:
+    # Deadlines are stored as midnight datetimes but exposed as dates
+    return value.date() if isinstance(value, datetime) else value
+
+def _msgpack_default(value: Any) -> Any:
+    # Same ISO strings as the JSON output, so both encodings carry one shape
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+def _converter(annotation: Any) -> Callable[[Any], Any]:
+    """Compile a converter from a stored value to its JSON-ready form"""
+    origin = get_origin(annotation)
+    if origin is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _converter(args[0]) if len(args) == 1 else _identity
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (Any,)
+        convert_item = _converter(item)
+        if convert_item is _identity:
+            return list
+        return lambda values: [convert_item(value) for value in values]
+    if isinstance(annotation, type):
+        if issubclass(annotation, ObjectId):
+            return str
+        if issubclass(annotation, BaseModel):
+            return DocumentSerializer(annotation).to_dict
+        if annotation is date:
+            return _to_date
+    return _identity
+
+class DocumentSerializer:
+    """Serialize trusted Mongo documents straight to JSON bytes.
+
+    The output has the same shape as FastAPI's response_model serialization
+    of the model (aliases, ObjectIds as strings, defaults for missing fields)
+    but skips constructing and validating a model per document.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self._fields = [
+            (field.alias or name, name, _converter(field.annotation), field)
+            for name, field in model.model_fields.items()
+        ]
+
+    def to_dict(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a document into the JSON-ready dict of the model's shape"""
+        out = {}
+        for key, name, convert, field in self._fields:
+            value = doc.get(key, _MISSING)
+            if value is _MISSING:
+                value = doc.get(name, _MISSING)
+            if value is _MISSING:
+                value = field.get_default(call_default_factory=True)
+            out[key] = None if value is None else convert(value)
+        return out
+
+    def dump_one(self, doc: Dict[str, Any]) -> bytes:
+        """Serialize one document to JSON bytes"""
+        with timed("serialize"):
+            return to_json(self.to_dict(doc))
+
+    def dump_many(self, docs: Iterable[Dict[str, Any]]) -> bytes:
+        """Serialize documents to a JSON array"""
+        with timed("serialize"):
+            return to_json([self.to_dict(doc) for doc in docs])
+
+    def pack_many(self, docs: Iterable[Dict[str, Any]]) -> bytes:
+        """Serialize documents to a MessagePack array; requires msgpack"""
+        with timed("serialize"):
+            return msgpack.packb([self.to_dict(doc) for doc in docs], default=_msgpack_default)
+
+def json_response(
+    body: bytes,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Send pre-serialized JSON bytes without re-validating them"""
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
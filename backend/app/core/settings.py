@@ -1,5 +1,6 @@
 from __future__ import annotations
 from functools import lru_cache
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,6 +11,73 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 30
     DATABASE_NAME: str = "todo_app"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 30000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 20000
+    MONGODB_COMPRESSORS: str = ""  # comma separated, e.g. "zstd,snappy,zlib"
+    MONGODB_SLOW_CHECKOUT_MS: float = 100.0
+    MIGRATE_ON_STARTUP: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_SAMPLE_RATE: float = 1.0  # fraction of successful requests logged
+    LOG_TRACEBACKS_PER_MINUTE: int = 10
+    SLOW_REQUEST_THRESHOLD_MS: float = 1000.0
+    PROFILING_ENABLED: bool = False
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_TOKEN: Optional[str] = None
+    PROFILE_DIR: str = "profiles"
+    REQUIRE_SCHEMA_VERSION: bool = False
+    TASKS_DEFAULT_PAGE_SIZE: int = 100
+    TASKS_MAX_PAGE_SIZE: int = 500
+    STREAM_BATCH_SIZE: int = 500
+    TASKS_BULK_MAX_ITEMS: int = 500
+    IMPORT_BATCH_SIZE: int = 500
+    # Done tasks not updated for this long move to tasks_archive
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_BATCH_SIZE: int = 1000
+    # Longer than one batch takes; a crashed run's lease frees after this
+    ARCHIVE_LEASE_SECONDS: float = 300.0
+    # How often each worker runs archival in the background; 0 leaves it to the CLI
+    ARCHIVE_INTERVAL_SECONDS: float = 0.0
+    IMPORT_MAX_LINE_BYTES: int = 65536
+    IMPORT_MAX_ERRORS: int = 100
+    # List responses smaller than this are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Moderate levels: most of the size reduction for a fraction of the CPU
+    GZIP_COMPRESSION_LEVEL: int = 5
+    BROTLI_COMPRESSION_QUALITY: int = 4
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    STATS_CACHE_MAX_SIZE: int = 10000
+    STATS_CACHE_TTL_SECONDS: float = 300.0
+    # "local" publishes from this worker's repositories; "change_stream"
+    # reads writes from every worker off a MongoDB change stream (replica set)
+    EVENTS_SOURCE: Literal["local", "change_stream"] = "local"
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_MAX_CONNECTIONS_PER_USER: int = 20
+    RATE_LIMIT_ENABLED: bool = True
+    # Login and signup per client IP; each attempt costs a bcrypt hash
+    RATE_LIMIT_AUTH_PER_MINUTE: float = 10.0
+    RATE_LIMIT_AUTH_BURST: int = 10
+    # Task, label and event routes per user
+    RATE_LIMIT_USER_PER_SECOND: float = 20.0
+    RATE_LIMIT_USER_BURST: int = 50
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Only set behind a proxy that overwrites it, e.g. "X-Forwarded-For"
+    RATE_LIMIT_CLIENT_IP_HEADER: Optional[str] = None
+    # Load shedding limits per worker; 0 turns a limit off
+    SHED_MAX_IN_FLIGHT: int = 500
+    SHED_POOL_WAIT_MS: float = 250.0
+    SHED_RETRY_AFTER_SECONDS: int = 1
+    SHED_EXEMPT_PATHS: str = "/healthz,/metrics,/events,/export"  # comma separated
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,98 @@
+from typing import Any, AsyncIterator, Dict, Tuple
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from .serialization import DocumentSerializer
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def parse_qualities(header: str) -> Dict[str, float]:
+    """Map each token of an Accept style header to its q value"""
+    qualities: Dict[str, float] = {}
+    for part in header.split(","):
+        token, *params = [piece.strip() for piece in part.split(";")]
+        if not token:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[token.lower()] = quality
+    return qualities
+
+def json_quality(qualities: Dict[str, float]) -> float:
+    """q value of JSON, the default: no Accept header or a wildcard accepts it"""
+    if not qualities:
+        return 1.0
+    for token in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+        if token in qualities:
+            return qualities[token]
+    return 0.0
+
+def wants_ndjson(request: Request) -> bool:
+    """Return True when the client ranks newline-delimited JSON above JSON"""
+    accept = parse_qualities(request.headers.get("accept", ""))
+    return accept.get(NDJSON_MEDIA_TYPE, 0) > json_quality(accept)
+
+async def ndjson_lines(docs: AsyncIterator[Dict[str, Any]], serializer: DocumentSerializer) -> AsyncIterator[bytes]:
+    """Encode documents as they arrive, one JSON object per line"""
+    async for doc in docs:
+        yield serializer.dump_one(doc) + b"\n"
+
+async def json_array_chunks(docs: AsyncIterator[Dict[str, Any]], serializer: DocumentSerializer) -> AsyncIterator[bytes]:
+    """Encode documents as they arrive as the elements of one JSON array"""
+    separator = b"["
+    async for doc in docs:
+        yield separator + serializer.dump_one(doc)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+class LineTooLongError(ValueError):
+    """Raised when an uploaded line exceeds the size limit"""
+
+    def __init__(self, line: int):
+        super().__init__(f"Line {line} is too long")
+        self.line = line
+
+async def split_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, bytes]]:
+    """Yield (line number, line) from a byte stream, holding at most one line in memory"""
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if len(line) > max_line_bytes:
+                raise LineTooLongError(number)
+            yield number, line
+        if len(buffer) > max_line_bytes:
+            raise LineTooLongError(number + 1)
+    if buffer:
+        yield number + 1, buffer
+
+async def chunked(parts: AsyncIterator[bytes], size: int = 65536) -> AsyncIterator[bytes]:
+    """Join small encoded parts into chunks of about `size` bytes before sending"""
+    buffer = bytearray()
+    async for part in parts:
+        buffer += part
+        if len(buffer) >= size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+def stream_documents(
+    request: Request,
+    docs: AsyncIterator[Dict[str, Any]],
+    serializer: DocumentSerializer,
+    headers: Dict[str, str] = None,
+) -> StreamingResponse:
+    """Stream documents as NDJSON or a chunked JSON array, per the Accept header"""
+    if wants_ndjson(request):
+        return StreamingResponse(ndjson_lines(docs, serializer), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(json_array_chunks(docs, serializer), media_type="application/json", headers=headers)
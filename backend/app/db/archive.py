@@ -0,0 +1,98 @@
+"""Move old done tasks out of the tasks collection into tasks_archive.
+
+Usage, from the backend folder:
+
+    python -m app.db.archive [--older-than-days 90] [--batch-size 1000] [--dry-run]
+
+Workers also run this in the background every ARCHIVE_INTERVAL_SECONDS when
+that is set. A run first takes the archive lease, so at most one run moves
+tasks at a time; a run that finds the lease held does nothing.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import uuid
+from datetime import timedelta
+from typing import Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from ..core.settings import get_settings
+from .database import connect_to_mongo, close_mongo_connection, get_database, utcnow
+from .repositories.lease_repository import LeaseRepository
+from .repositories.task_repository import TaskRepository
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "tasks_archive"
+
+async def archive_tasks(
+    db: AsyncIOMotorDatabase,
+    older_than_days: int = settings.ARCHIVE_AFTER_DAYS,
+    batch_size: int = settings.ARCHIVE_BATCH_SIZE,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Archive done tasks older than older_than_days one batch at a time; returns tasks moved.
+
+    The lease is renewed before every batch, so a run that stalls past
+    ARCHIVE_LEASE_SECONDS stops instead of overlapping the next holder.
+    """
+    leases = LeaseRepository(db)
+    owner = uuid.uuid4().hex
+    if not await leases.acquire(LEASE_NAME, owner, settings.ARCHIVE_LEASE_SECONDS):
+        logger.info("Task archival skipped: another run holds the lease")
+        return 0
+    task_repo = TaskRepository(db)
+    cutoff = utcnow() - timedelta(days=older_than_days)
+    moved = batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            if batches and not await leases.acquire(LEASE_NAME, owner, settings.ARCHIVE_LEASE_SECONDS):
+                logger.warning("Task archival stopped: lease lost")
+                break
+            count = await task_repo.archive_done_tasks(cutoff, batch_size)
+            if not count:
+                break
+            moved += count
+            batches += 1
+            # Give request handlers a turn between batches
+            await asyncio.sleep(0)
+    finally:
+        await leases.release(LEASE_NAME, owner)
+    return moved
+
+async def run_archiver(db: AsyncIOMotorDatabase, interval: float):
+    """Archive on a fixed interval until cancelled"""
+    while True:
+        try:
+            moved = await archive_tasks(db)
+            if moved:
+                logger.info("Archived %d done tasks", moved)
+        except PyMongoError as e:
+            logger.warning("Task archival failed, retrying in %ss: %s", interval, e)
+        await asyncio.sleep(interval)
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.archive")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the tasks that would move")
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        if args.dry_run:
+            cutoff = utcnow() - timedelta(days=args.older_than_days)
+            count = await TaskRepository(db).count_archivable_tasks(cutoff)
+            sys.stdout.write(f"{count} tasks would be archived\n")
+        else:
+            moved = await archive_tasks(db, args.older_than_days, args.batch_size)
+            sys.stdout.write(f"archived {moved} tasks\n")
+    finally:
+        await close_mongo_connection()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from ..core.events import Event, EventBus, event_bus
+
+logger = logging.getLogger(__name__)
+
+KINDS = {"tasks": "task", "labels": "label"}
+ACTIONS = {"insert": "created", "update": "updated", "replace": "updated", "delete": "deleted"}
+
+# Fields only written as a side effect of another change, which the local
+# source does not announce: label task counts, and the $pull that removes
+# a deleted label from its tasks (the label.deleted event covers those)
+BOOKKEEPING_FIELDS = {"tasks": {"label_ids"}, "labels": {"task_count"}}
+
+def _is_bookkeeping(collection: str, change: Dict[str, Any]) -> bool:
+    """Whether an update only touched the collection's bookkeeping fields"""
+    if change.get("operationType") != "update":
+        return False
+    description = change.get("updateDescription") or {}
+    fields = [
+        *description.get("updatedFields", {}),
+        *description.get("removedFields", []),
+        *(truncated["field"] for truncated in description.get("truncatedArrays", [])),
+    ]
+    # Array changes can be reported per element, as label_ids.2
+    bookkeeping = BOOKKEEPING_FIELDS.get(collection, set())
+    return bool(fields) and all(field.split(".", 1)[0] in bookkeeping for field in fields)
+
+def change_to_event(change: Dict[str, Any]) -> Optional[Tuple[Any, Event]]:
+    """Map a change stream document to (user_id, event), if it can be routed.
+
+    Deletes carry no document, so they are only routed when the collection
+    has changeStreamPreAndPostImages enabled (MongoDB 6.0+) and the
+    pre-image names the user. Bookkeeping-only updates are dropped, so
+    both event sources send the same events.
+    """
+    collection = change.get("ns", {}).get("coll")
+    kind = KINDS.get(collection)
+    action = ACTIONS.get(change.get("operationType"))
+    doc = change.get("fullDocument") or change.get("fullDocumentBeforeChange")
+    if kind is None or action is None or not doc or "user_id" not in doc:
+        return None
+    if _is_bookkeeping(collection, change):
+        return None
+    return doc["user_id"], Event(kind, action, [change["documentKey"]["_id"]])
+
+async def unsupported_reason(db: AsyncIOMotorDatabase) -> Optional[str]:
+    """Why this deployment cannot feed events from a change stream, or None"""
+    info = await db.client.server_info()
+    if tuple(info.get("versionArray", ())[:2]) < (6, 0):
+        return f"MongoDB {info.get('version')} has no change stream pre-images (6.0+ needed)"
+    hello = await db.command("hello")
+    if "setName" not in hello and hello.get("msg") != "isdbgrid":
+        return "change streams need a replica set or a sharded cluster"
+    return None
+
+async def watch_changes(db: AsyncIOMotorDatabase, bus: EventBus = event_bus, retry_seconds: float = 5.0):
+    """Publish task and label changes from a change stream until cancelled.
+
+    Needs MongoDB 6.0+ and a replica set; a local single-node one (mongod
+    --replSet rs0 and rs.initiate()) is enough. On a deployment without
+    them, logs once and switches the bus back to local publishing. Resumes
+    after errors from the last token.
+    """
+    pipeline = [{"$match": {
+        "ns.coll": {"$in": list(KINDS)},
+        "operationType": {"$in": list(ACTIONS)},
+    }}]
+    resume_token = None
+    reason = None
+    while True:
+        try:
+            reason = await unsupported_reason(db)
+            if reason:
+                break
+            async with db.watch(
+                pipeline,
+                full_document="updateLookup",
+                full_document_before_change="whenAvailable",
+                resume_after=resume_token,
+            ) as stream:
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    routed = change_to_event(change)
+                    if routed is not None:
+                        bus.publish(*routed)
+        except PyMongoError as e:
+            logger.warning("Change stream failed, retrying in %ss: %s", retry_seconds, e)
+            await asyncio.sleep(retry_seconds)
+    logger.warning("Change stream events unavailable, publishing repository writes locally: %s", reason)
+    bus.source = "local"
@@ -1,5 +1,9 @@
+from datetime import datetime
+from typing import Any, Dict
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from ..core.metrics import registry
 from ..core.settings import get_settings
+from .monitoring import CommandMetricsListener, PoolMetricsListener, register_pool_metrics
 
 settings = get_settings()
 
@@ -9,9 +13,33 @@ class Database:
 
 db = Database()
 
+pool_listener = PoolMetricsListener(
+    max_pool_size=settings.MONGODB_MAX_POOL_SIZE,
+    slow_checkout_ms=settings.MONGODB_SLOW_CHECKOUT_MS,
+)
+register_pool_metrics(registry, pool_listener)
+command_listener = CommandMetricsListener()
+
+def client_options() -> Dict[str, Any]:
+    """Driver options built from settings; unset values keep driver defaults"""
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "event_listeners": [pool_listener, command_listener],
+    }
+    if settings.MONGODB_MAX_IDLE_TIME_MS is not None:
+        options["maxIdleTimeMS"] = settings.MONGODB_MAX_IDLE_TIME_MS
+    if settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS is not None:
+        options["waitQueueTimeoutMS"] = settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS
+    if settings.MONGODB_COMPRESSORS:
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+    return options
+
 async def connect_to_mongo():
     """Create database connection"""
-    db.client = AsyncIOMotorClient(settings.MONGODB_URI)
+    db.client = AsyncIOMotorClient(settings.MONGODB_URI, **client_options())
     db.database = db.client[settings.DATABASE_NAME]
 
 async def close_mongo_connection():
@@ -21,3 +49,8 @@ async def close_mongo_connection():
 
 def get_database() -> AsyncIOMotorDatabase:
     return db.database
+
+def utcnow() -> datetime:
+    """Current UTC time truncated to the millisecond precision Mongo stores"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
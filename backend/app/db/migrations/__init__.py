@@ -0,0 +1,20 @@
+from .runner import (
+    Migration,
+    apply_migrations,
+    check_schema_version,
+    get_schema_version,
+    migration_status,
+)
+from .versions import MIGRATIONS
+
+LATEST_VERSION = max(migration.version for migration in MIGRATIONS)
+
+__all__ = [
+    "LATEST_VERSION",
+    "MIGRATIONS",
+    "Migration",
+    "apply_migrations",
+    "check_schema_version",
+    "get_schema_version",
+    "migration_status",
+]
@@ -0,0 +1,40 @@
+"""Apply or inspect database migrations.
+
+Usage, from the backend folder:
+
+    python -m app.db.migrations status
+    python -m app.db.migrations upgrade [--target VERSION]
+"""
+import argparse
+import asyncio
+import sys
+from ..database import connect_to_mongo, close_mongo_connection, get_database
+from . import MIGRATIONS, apply_migrations, migration_status
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("status", help="List migrations and whether they are applied")
+    upgrade = subcommands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade.add_argument("--target", type=int, default=None, help="Stop after this version")
+    args = parser.parse_args(argv)
+
+    await connect_to_mongo()
+    try:
+        db = get_database()
+        if args.command == "upgrade":
+            applied = await apply_migrations(db, MIGRATIONS, target=args.target)
+            for migration in applied:
+                sys.stdout.write(f"applied {migration.version:04d} {migration.name}\n")
+            if not applied:
+                sys.stdout.write("database is up to date\n")
+        else:
+            for row in await migration_status(db, MIGRATIONS):
+                state = "applied" if row["applied"] else "pending"
+                sys.stdout.write(f"{row['version']:04d} {state:<8} {row['name']}\n")
+    finally:
+        await close_mongo_connection()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
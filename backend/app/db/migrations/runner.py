@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from ..database import utcnow
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = "schema_migrations"
+
+Step = Callable[[AsyncIOMotorDatabase], Awaitable[None]]
+
+class Migration:
+    """A numbered schema change made of independent steps.
+
+    Steps must not depend on each other; they are run concurrently. Steps
+    must also be idempotent, since workers starting together with
+    MIGRATE_ON_STARTUP may each apply the same migration.
+    """
+
+    def __init__(self, version: int, name: str, steps: Sequence[Step]):
+        self.version = version
+        self.name = name
+        self.steps = list(steps)
+
+    async def apply(self, db: AsyncIOMotorDatabase):
+        await asyncio.gather(*(step(db) for step in self.steps))
+
+async def get_applied_versions(db: AsyncIOMotorDatabase) -> List[int]:
+    """Return the versions recorded as applied, in ascending order"""
+    cursor = db[MIGRATIONS_COLLECTION].find({}, {"_id": 1}).sort("_id", 1)
+    return [doc["_id"] async for doc in cursor]
+
+async def get_schema_version(db: AsyncIOMotorDatabase) -> int:
+    """Return the highest applied migration version, or 0"""
+    latest = await db[MIGRATIONS_COLLECTION].find_one({}, {"_id": 1}, sort=[("_id", -1)])
+    return latest["_id"] if latest else 0
+
+async def apply_migrations(
+    db: AsyncIOMotorDatabase,
+    migrations: Sequence[Migration],
+    target: Optional[int] = None,
+) -> List[Migration]:
+    """Apply every pending migration up to target, in version order.
+
+    A migration another run recorded first counts as applied here too.
+    """
+    applied = set(await get_applied_versions(db))
+    pending = [
+        migration for migration in sorted(migrations, key=lambda m: m.version)
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+    for migration in pending:
+        logger.info("Applying migration %04d %s", migration.version, migration.name)
+        started = time.perf_counter()
+        await migration.apply(db)
+        try:
+            await db[MIGRATIONS_COLLECTION].insert_one({
+                "_id": migration.version,
+                "name": migration.name,
+                "applied_at": utcnow(),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            })
+        except DuplicateKeyError:
+            logger.info("Migration %04d was recorded by another run", migration.version)
+    return pending
+
+async def migration_status(db: AsyncIOMotorDatabase, migrations: Sequence[Migration]) -> List[Dict[str, object]]:
+    """Return each known migration with whether it has been applied"""
+    applied = set(await get_applied_versions(db))
+    return [
+        {"version": m.version, "name": m.name, "applied": m.version in applied}
+        for m in sorted(migrations, key=lambda m: m.version)
+    ]
+
+async def check_schema_version(db: AsyncIOMotorDatabase, latest: int, required: bool = False) -> int:
+    """Compare the recorded schema version with the latest known one.
+
+    Logs a warning when migrations are pending, or raises if required is set.
+    """
+    version = await get_schema_version(db)
+    if version < latest:
+        message = (
+            f"Database schema is at version {version} but {latest} is available; "
+            "run 'python -m app.db.migrations upgrade'"
+        )
+        if required:
+            raise RuntimeError(message)
+        logger.warning(message)
+    return version
@@ -0,0 +1,147 @@
+import logging
+from typing import List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from ..repositories.label_repository import LabelRepository
+from .runner import Migration, Step
+
+logger = logging.getLogger(__name__)
+
+INDEX_NOT_FOUND = 27
+
+# Each migration lists the exact indexes it builds. Never edit a list once
+# its migration has shipped: add a new migration that creates or drops
+# indexes instead, so every database converges on the same set.
+
+BASELINE_USER_INDEXES = [
+    IndexModel([("email", ASCENDING)], unique=True),
+]
+
+BASELINE_LABEL_INDEXES = [
+    IndexModel([("user_id", ASCENDING), ("name", ASCENDING)], unique=True),
+]
+
+# Compound indexes backing the paginated, filtered task listing.
+# Equality fields first, then the (created_at, _id) keyset sort.
+# The user_created_at index also serves plain user_id lookups.
+BASELINE_TASK_INDEXES = [
+    IndexModel([("label_ids", ASCENDING)]),
+    IndexModel([("deadline", ASCENDING)]),
+    IndexModel(
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_created_at",
+    ),
+    IndexModel(
+        [("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_status_created_at",
+    ),
+    IndexModel(
+        [("user_id", ASCENDING), ("priority", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_priority_created_at",
+    ),
+    IndexModel(
+        [("user_id", ASCENDING), ("label_ids", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_labels_created_at",
+    ),
+    IndexModel(
+        [("user_id", ASCENDING), ("deadline", ASCENDING)],
+        name="user_deadline",
+    ),
+]
+
+# Text search is always scoped to one user, so user_id is an
+# equality prefix and each search only reads that user's entries
+TASK_TEXT_INDEXES = [
+    IndexModel(
+        [("user_id", ASCENDING), ("title", TEXT), ("description", TEXT)],
+        name="user_text",
+        weights={"title": 3, "description": 1},
+        default_language="english",
+    ),
+]
+
+# Only done tasks are indexed, and archival keeps those few
+TASK_DONE_INDEXES = [
+    IndexModel(
+        [("updated_at", ASCENDING)],
+        name="done_updated_at",
+        partialFilterExpression={"status": "done"},
+    ),
+]
+
+# For reads with include_archived
+TASK_ARCHIVE_INDEXES = [
+    IndexModel(
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_created_at",
+    ),
+    IndexModel(
+        [("user_id", ASCENDING), ("label_ids", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="user_labels_created_at",
+    ),
+]
+
+# Deadline filters on keyset pages: the user_deadline index matches the
+# filter but not the (created_at, _id) sort, so it sorts every match in
+# memory. Here the sort comes from the index and deadline is checked on
+# its keys, without fetching the tasks that fall outside the range.
+TASK_DEADLINE_PAGE_INDEXES = [
+    IndexModel(
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING), ("deadline", ASCENDING)],
+        name="user_created_at_deadline",
+    ),
+]
+
+def create_indexes(collection: str, indexes: List[IndexModel]) -> Step:
+    """Step sending one createIndexes call for the given collection"""
+    async def step(db: AsyncIOMotorDatabase):
+        await db[collection].create_indexes(indexes)
+    step.__name__ = f"create_{collection}_indexes"
+    return step
+
+def enable_pre_images(collection: str) -> Step:
+    """Step keeping pre-images, so change stream deletes can be routed to their owner"""
+    async def step(db: AsyncIOMotorDatabase):
+        info = await db.client.server_info()
+        if tuple(info.get("versionArray", ())[:2]) < (6, 0):
+            # Only change stream events need them, and that source needs 6.0+
+            logger.warning("Skipping pre-images on %s: MongoDB %s is older than 6.0", collection, info.get("version"))
+            return
+        await db.command("collMod", collection, changeStreamPreAndPostImages={"enabled": True})
+    step.__name__ = f"enable_{collection}_pre_images"
+    return step
+
+async def _drop_index_if_exists(collection, name: str):
+    try:
+        await collection.drop_index(name)
+    except OperationFailure as e:
+        if e.code != INDEX_NOT_FOUND:
+            raise
+
+async def drop_task_user_id_index(db: AsyncIOMotorDatabase):
+    # Superseded by the user_created_at compound index, which has user_id as its prefix
+    await _drop_index_if_exists(db.tasks, "user_id_1")
+
+async def backfill_label_task_counts(db: AsyncIOMotorDatabase):
+    await LabelRepository(db).recount_task_counts()
+
+MIGRATIONS = [
+    Migration(1, "baseline indexes", [
+        create_indexes("users", BASELINE_USER_INDEXES),
+        create_indexes("tasks", BASELINE_TASK_INDEXES),
+        create_indexes("labels", BASELINE_LABEL_INDEXES),
+    ]),
+    Migration(2, "replace tasks.user_id index with compound index", [drop_task_user_id_index]),
+    Migration(3, "task text search index", [create_indexes("tasks", TASK_TEXT_INDEXES)]),
+    Migration(4, "backfill label task counts", [backfill_label_task_counts]),
+    Migration(5, "task archive indexes", [
+        create_indexes("tasks", TASK_DONE_INDEXES),
+        create_indexes("tasks_archive", TASK_ARCHIVE_INDEXES),
+    ]),
+    Migration(6, "change stream pre-images for tasks and labels", [
+        enable_pre_images("tasks"),
+        enable_pre_images("labels"),
+    ]),
+    Migration(7, "task deadline keyset index", [create_indexes("tasks", TASK_DEADLINE_PAGE_INDEXES)]),
+]
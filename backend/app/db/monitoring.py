@@ -0,0 +1,217 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from pymongo import monitoring
+from ..core.metrics import Gauge, Registry, mongodb_command_duration
+from ..core.profiling import record_phase
+
+logger = logging.getLogger(__name__)
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Track connection pool usage and checkout wait times for this worker.
+
+    pymongo calls these hooks from driver threads, so counters are guarded
+    by a lock. Checkout wait times come from the event duration (pymongo 4.7+).
+    checked_out counts every server's pool; saturation is per server, since
+    maxPoolSize limits each server's pool on its own.
+    recent_wait() is an average of recent waits that halves every
+    wait_half_life seconds without checkouts, for load shedding.
+    """
+
+    def __init__(
+        self,
+        max_pool_size: Optional[int] = None,
+        slow_checkout_ms: float = 100.0,
+        wait_half_life: float = 1.0,
+    ):
+        self.max_pool_size = max_pool_size
+        self.slow_checkout_ms = slow_checkout_ms
+        self.wait_half_life = wait_half_life
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Zero every counter"""
+        with self._lock:
+            self.open_connections = 0
+            self.checked_out = 0
+            self._checked_out_by_server: Dict[Any, int] = {}
+            self.max_checked_out = 0
+            self.waiting = 0
+            self.max_waiting = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checkout_timeouts = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.pool_clears = 0
+            self._recent_wait = 0.0
+            self._recent_wait_at = time.monotonic()
+
+    def _decayed_wait(self, now: float) -> float:
+        elapsed = max(0.0, now - self._recent_wait_at)
+        return self._recent_wait * 0.5 ** (elapsed / self.wait_half_life)
+
+    def _record_wait(self, duration: Optional[float]):
+        if duration is None:
+            return
+        self.wait_time_total += duration
+        if duration > self.wait_time_max:
+            self.wait_time_max = duration
+        now = time.monotonic()
+        self._recent_wait = 0.8 * self._decayed_wait(now) + 0.2 * duration
+        self._recent_wait_at = now
+
+    def recent_wait(self) -> float:
+        """Recent checkout wait in seconds, decayed for the time since the last checkout"""
+        with self._lock:
+            return self._decayed_wait(time.monotonic())
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self.waiting += 1
+            if self.waiting > self.max_waiting:
+                self.max_waiting = self.waiting
+
+    def connection_check_out_failed(self, event):
+        duration = getattr(event, "duration", None)
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+            self._record_wait(duration)
+        logger.warning("Mongo connection checkout failed: %s (address %s)", event.reason, event.address)
+
+    def connection_checked_out(self, event):
+        duration = getattr(event, "duration", None)
+        with self._lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.checked_out += 1
+            in_use = self._checked_out_by_server[event.address] = self._checked_out_by_server.get(event.address, 0) + 1
+            if self.checked_out > self.max_checked_out:
+                self.max_checked_out = self.checked_out
+            self._record_wait(duration)
+        if duration is not None and duration * 1000 >= self.slow_checkout_ms:
+            logger.warning(
+                "Slow Mongo connection checkout: waited %.1f ms with %d/%s connections to %s in use",
+                duration * 1000, in_use, self.max_pool_size or "?", event.address,
+            )
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+            remaining = self._checked_out_by_server.get(event.address, 0) - 1
+            if remaining > 0:
+                self._checked_out_by_server[event.address] = remaining
+            else:
+                self._checked_out_by_server.pop(event.address, None)
+
+    def saturation(self) -> Optional[float]:
+        """Fraction of the busiest server's pool checked out, if the pool size is known"""
+        if not self.max_pool_size:
+            return None
+        return max(self._checked_out_by_server.values(), default=0) / self.max_pool_size
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Return a consistent copy of the pool counters"""
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_time_total_seconds": self.wait_time_total,
+                "wait_time_max_seconds": self.wait_time_max,
+                "wait_time_avg_seconds": self.wait_time_total / self.checkouts if self.checkouts else 0.0,
+                "wait_time_recent_seconds": self._decayed_wait(time.monotonic()),
+                "pool_clears": self.pool_clears,
+                "saturation": self.saturation(),
+            }
+
+    def gauge_values(self) -> Iterable[Tuple[Tuple[str, ...], float]]:
+        """Pool counters as (labels, value) pairs for a scrape-time gauge"""
+        stats = self.snapshot()
+        for key in ("open_connections", "checked_out", "waiting", "max_checked_out", "max_waiting"):
+            yield (key,), stats[key]
+        yield ("saturation",), stats["saturation"]
+        yield ("checkout_failures",), stats["checkout_failures"]
+        yield ("checkout_timeouts",), stats["checkout_timeouts"]
+        yield ("wait_time_max_seconds",), stats["wait_time_max_seconds"]
+        yield ("wait_time_avg_seconds",), stats["wait_time_avg_seconds"]
+        yield ("wait_time_recent_seconds",), stats["wait_time_recent_seconds"]
+
+def register_pool_metrics(registry: Registry, listener: PoolMetricsListener):
+    """Expose a pool listener's counters through a metrics registry"""
+    registry.register(Gauge(
+        "mongodb_pool", "MongoDB connection pool state for this worker",
+        ("stat",), callback=listener.gauge_values,
+    ))
+
+# Commands whose first field is not a collection name
+_DATABASE_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "buildInfo", "endSessions", "saslStart", "saslContinue"}
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Record MongoDB command durations by collection and command name.
+
+    The collection is only known from the started event, so it is kept per
+    in-flight command and picked up when the command finishes.
+    """
+
+    MAX_PENDING = 10000
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, object], str] = {}
+
+    def started(self, event):
+        if len(self._pending) >= self.MAX_PENDING:
+            self._pending.clear()
+        collection = ""
+        if event.command_name not in _DATABASE_COMMANDS:
+            # getMore carries the cursor id under its own name
+            key = "collection" if event.command_name == "getMore" else event.command_name
+            target = event.command.get(key)
+            collection = target if isinstance(target, str) else ""
+        self._pending[(event.request_id, event.connection_id)] = collection
+
+    def _finish(self, event, outcome: str):
+        collection = self._pending.pop((event.request_id, event.connection_id), "")
+        seconds = event.duration_micros / 1e6
+        mongodb_command_duration.observe((collection, event.command_name, outcome), seconds)
+        record_phase("db", seconds)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
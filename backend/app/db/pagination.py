@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+from bson import ObjectId
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+def encode_cursor(created_at: datetime, object_id: ObjectId, order: str = "desc") -> str:
+    """Encode the keyset position of a document as an opaque cursor"""
+    raw = json.dumps(
+        {"c": created_at.isoformat(), "i": str(object_id), "o": order},
+        separators=(",", ":"),
+    ).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str, order: str = "desc") -> Tuple[datetime, ObjectId]:
+    """Decode an opaque cursor back into its (created_at, _id) keyset position"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(data["c"])
+        object_id = ObjectId(data["i"])
+        cursor_order = data.get("o", "desc")
+    except Exception as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+    if cursor_order != order:
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    return created_at, object_id
+
+def keyset_condition(cursor: Optional[str], order: str = "desc") -> Dict[str, Any]:
+    """Build the query fragment selecting documents after the cursor position"""
+    if not cursor:
+        return {}
+    created_at, object_id = decode_cursor(cursor, order)
+    op = "$lt" if order == "desc" else "$gt"
+    return {
+        "$or": [
+            {"created_at": {op: created_at}},
+            {"created_at": created_at, "_id": {op: object_id}},
+        ]
+    }
+
+def encode_offset_cursor(offset: int) -> str:
+    """Encode a result offset as an opaque cursor, for orders with no usable keyset"""
+    raw = json.dumps({"s": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """Decode an offset cursor; no cursor means the first page"""
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = json.loads(base64.urlsafe_b64decode(padded.encode()))["s"]
+    except Exception as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise InvalidCursorError("Invalid cursor")
+    return offset
+
+def keyset_key(doc: Dict[str, Any]) -> Tuple[datetime, ObjectId]:
+    """The (created_at, _id) position a document sorts by"""
+    return doc["created_at"], doc["_id"]
+
+async def merge_keyset_streams(
+    streams: Sequence[AsyncIterator[Dict[str, Any]]],
+    order: str = "desc",
+    limit: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Merge streams that are each in keyset order into one, up to limit documents.
+
+    Only the next document of each stream is held, so cursors from several
+    collections can be paged through as if they were one.
+    """
+    iterators = [stream.__aiter__() for stream in streams]
+    heads = [await anext(iterator, None) for iterator in iterators]
+    pick = max if order == "desc" else min
+    sent = 0
+    while limit is None or sent < limit:
+        live = [index for index, head in enumerate(heads) if head is not None]
+        if not live:
+            return
+        index = pick(live, key=lambda i: keyset_key(heads[i]))
+        yield heads[index]
+        sent += 1
+        heads[index] = await anext(iterators[index], None)
@@ -1,28 +1,70 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Mapping, Optional, Set
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from ...core.events import publish_change
+from ...core.settings import get_settings
+from ..database import utcnow
+from .version_repository import VersionRepository
 from ...models.label import Label, LabelCreate, LabelUpdate
 
+settings = get_settings()
+
 class LabelRepository:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db.labels
+        self.tasks = db.tasks
+        self.archived_tasks = db.tasks_archive
+        self.versions = VersionRepository(db)
+
+    async def _after_write(self, user_id: ObjectId, action: str, label_ids: Iterable[ObjectId]):
+        """Hook run after every write that may have changed a user's labels"""
+        await self.versions.bump(user_id)
+        publish_change(user_id, "label", action, label_ids)
 
     async def create_label(self, label: LabelCreate, user_id: ObjectId) -> Label:
         """Create a new label for a user"""
         label_dict = label.dict()
         label_dict["user_id"] = user_id
+        label_dict["task_count"] = 0
+        label_dict["created_at"] = label_dict["updated_at"] = utcnow()
         
-        result = await self.collection.insert_one(label_dict)
-        created_label = await self.collection.find_one({"_id": result.inserted_id})
-        return Label(**created_label)
+        await self.collection.insert_one(label_dict)
+        await self._after_write(user_id, "created", [label_dict["_id"]])
+        return Label(**label_dict)
+
+    async def get_label_documents_by_user(self, user_id: ObjectId) -> List[Dict[str, Any]]:
+        """Get all raw label documents for a user"""
+        return await self.collection.find({"user_id": user_id}).to_list(length=None)
+
+    def stream_labels_by_user(self, user_id: ObjectId) -> AsyncIterator[Dict[str, Any]]:
+        """Return a cursor yielding a user's raw label documents by name"""
+        return self.collection.find({"user_id": user_id}).sort("name", 1).batch_size(settings.STREAM_BATCH_SIZE)
+
+    async def get_label_ids_by_name(self, user_id: ObjectId) -> Dict[str, ObjectId]:
+        """Map each of a user's label names to its id"""
+        cursor = self.collection.find({"user_id": user_id}, {"name": 1})
+        return {label["name"]: label["_id"] async for label in cursor}
 
     async def get_labels_by_user(self, user_id: ObjectId) -> List[Label]:
         """Get all labels for a user"""
-        cursor = self.collection.find({"user_id": user_id})
-        labels = []
-        async for label in cursor:
-            labels.append(Label(**label))
-        return labels
+        return [Label(**label) for label in await self.get_label_documents_by_user(user_id)]
+
+    async def insert_label_documents(self, docs: List[Dict[str, Any]], user_id: ObjectId) -> List[Optional[str]]:
+        """Insert complete label documents of one user and return an error (or None) per document"""
+        errors: List[Optional[str]] = [None] * len(docs)
+        if not docs:
+            return errors
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = write_error.get("errmsg", "Write failed")
+        created = [doc["_id"] for doc, error in zip(docs, errors) if error is None]
+        if created:
+            await self._after_write(user_id, "created", created)
+        return errors
 
     async def get_label_by_id(self, label_id: ObjectId, user_id: ObjectId) -> Optional[Label]:
         """Get a specific label by ID for a user"""
@@ -31,24 +73,75 @@ class LabelRepository:
             return Label(**label)
         return None
 
+    async def get_existing_label_ids(self, label_ids: Iterable[ObjectId], user_id: ObjectId) -> Set[ObjectId]:
+        """Return which of the given label ids belong to a user, in one query"""
+        cursor = self.collection.find({"_id": {"$in": list(label_ids)}, "user_id": user_id}, {"_id": 1})
+        return {label["_id"] async for label in cursor}
+
     async def update_label(self, label_id: ObjectId, user_id: ObjectId, label_update: LabelUpdate) -> Optional[Label]:
         """Update a label"""
         update_data = {k: v for k, v in label_update.dict().items() if v is not None}
         if not update_data:
             return await self.get_label_by_id(label_id, user_id)
         
-        update_data["updated_at"] = label_update.updated_at
-        await self.collection.update_one(
+        update_data["updated_at"] = utcnow()
+        label = await self.collection.find_one_and_update(
             {"_id": label_id, "user_id": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER,
         )
-        return await self.get_label_by_id(label_id, user_id)
+        if label:
+            await self._after_write(user_id, "updated", [label_id])
+            return Label(**label)
+        return None
 
     async def delete_label(self, label_id: ObjectId, user_id: ObjectId) -> bool:
-        """Delete a label"""
+        """Delete a label and remove it from every task that references it"""
         result = await self.collection.delete_one({"_id": label_id, "user_id": user_id})
-        return result.deleted_count > 0
+        if result.deleted_count == 0:
+            return False
+        # One $pull over the user_labels_created_at index instead of a
+        # read-modify-write per task
+        for tasks in (self.tasks, self.archived_tasks):
+            await tasks.update_many(
+                {"user_id": user_id, "label_ids": label_id},
+                {"$pull": {"label_ids": label_id}},
+            )
+        # One label event; clients refresh the tasks that carried the label
+        await self._after_write(user_id, "deleted", [label_id])
+        return True
+
+    async def adjust_task_counts(self, user_id: ObjectId, deltas: Mapping[ObjectId, int]):
+        """Apply task_count changes for several labels in one bulk write"""
+        operations = [
+            UpdateOne({"_id": label_id, "user_id": user_id}, {"$inc": {"task_count": delta}})
+            for label_id, delta in deltas.items()
+            if delta
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+    async def recount_task_counts(self, batch_size: int = 1000) -> int:
+        """Recompute every label's task_count from the tasks; returns labels changed"""
+        pipeline = [
+            # Count each task once per label, as the $inc bookkeeping does
+            {"$project": {"label_ids": {"$setUnion": [{"$ifNull": ["$label_ids", []]}, []]}}},
+            {"$unwind": "$label_ids"},
+            {"$group": {"_id": "$label_ids", "count": {"$sum": 1}}},
+        ]
+        counts = {row["_id"]: row["count"] async for row in self.tasks.aggregate(pipeline)}
 
-    async def create_indexes(self):
-        """Create database indexes"""
-        await self.collection.create_index([("user_id", 1), ("name", 1)], unique=True)
+        changed = 0
+        operations: List[UpdateOne] = []
+        async for label in self.collection.find({}, {"task_count": 1}):
+            count = counts.get(label["_id"], 0)
+            if label.get("task_count") != count:
+                operations.append(UpdateOne({"_id": label["_id"]}, {"$set": {"task_count": count}}))
+            if len(operations) >= batch_size:
+                await self.collection.bulk_write(operations, ordered=False)
+                changed += len(operations)
+                operations = []
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+            changed += len(operations)
+        return changed
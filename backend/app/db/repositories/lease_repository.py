@@ -0,0 +1,32 @@
+from datetime import timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from ..database import utcnow
+
+class LeaseRepository:
+    """Named, expiring leases so only one worker runs a job at a time.
+
+    A lease is one document keyed by its name. Taking it succeeds when it
+    is free, expired or already held by the same owner; otherwise the
+    upsert collides with the holder's document and fails.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.leases
+
+    async def acquire(self, name: str, owner: str, seconds: float) -> bool:
+        """Take or renew a lease for seconds; False if another owner holds it"""
+        now = utcnow()
+        try:
+            await self.collection.update_one(
+                {"_id": name, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def release(self, name: str, owner: str):
+        """Give up a lease, if still held by owner"""
+        await self.collection.delete_one({"_id": name, "owner": owner})
@@ -1,29 +1,344 @@
-from typing import List, Optional
-from datetime import datetime
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from datetime import datetime, date, time, timedelta
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from ...models.task import Task, TaskCreate, TaskUpdate
+from pymongo import ASCENDING, DESCENDING, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from ...core.cache import invalidate_stats
+from ...core.events import publish_change
+from ...core.settings import get_settings
+from ...models.task import Task, TaskCreate, TaskUpdate, TaskFilters, TaskPage, TaskStats
+from ..database import utcnow
+from ..pagination import (
+    decode_offset_cursor,
+    encode_cursor,
+    encode_offset_cursor,
+    keyset_condition,
+    merge_keyset_streams,
+)
+from .label_repository import LabelRepository
+from .version_repository import VersionRepository
+
+settings = get_settings()
+
+# Error reported for operations an ordered bulk write never reached
+BULK_SKIPPED = "Not executed because an earlier operation failed"
+
+def _to_datetime(value: date) -> datetime:
+    """BSON has no date type, so deadlines are stored as midnight datetimes"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+def _label_deltas(before: Iterable[ObjectId], after: Iterable[ObjectId]) -> Counter:
+    """task_count changes when a task's labels go from before to after"""
+    before, after = set(before or ()), set(after or ())
+    deltas: Counter = Counter()
+    for label_id in after - before:
+        deltas[label_id] += 1
+    for label_id in before - after:
+        deltas[label_id] -= 1
+    return deltas
 
 class TaskRepository:
     def __init__(self, db: AsyncIOMotorDatabase):
         self.collection = db.tasks
+        # Done tasks past ARCHIVE_AFTER_DAYS, read only with include_archived
+        self.archive = db.tasks_archive
+        self.labels = LabelRepository(db)
+        self.versions = VersionRepository(db)
 
-    async def create_task(self, task: TaskCreate, user_id: ObjectId) -> Task:
-        """Create a new task for a user"""
+    async def _after_write(self, user_id: ObjectId, action: str, task_ids: Iterable[ObjectId]):
+        """Hook run after every write that may have changed a user's tasks"""
+        await self.versions.bump(user_id)
+        invalidate_stats(user_id)
+        if task_ids:
+            publish_change(user_id, "task", action, task_ids)
+
+    def new_document(self, task: TaskCreate, user_id: ObjectId) -> Dict[str, Any]:
+        """Build the stored document for a new task, without an _id"""
         task_dict = task.dict()
         task_dict["user_id"] = user_id
+        task_dict["deadline"] = _to_datetime(task.deadline)
+        task_dict["created_at"] = task_dict["updated_at"] = utcnow()
+        return task_dict
+
+    def _update_fields(self, task_update: TaskUpdate) -> Dict[str, Any]:
+        update_data = {k: v for k, v in task_update.dict(exclude={"id"}).items() if v is not None}
+        if not update_data:
+            return update_data
+        if "deadline" in update_data:
+            update_data["deadline"] = _to_datetime(update_data["deadline"])
+        update_data["updated_at"] = utcnow()
+        return update_data
+
+    async def _bulk_write(self, operations: List[Any], ordered: bool) -> List[Optional[str]]:
+        """Run operations in one bulk_write and return an error (or None) per operation"""
+        errors: List[Optional[str]] = [None] * len(operations)
+        if not operations:
+            return errors
+        try:
+            await self.collection.bulk_write(operations, ordered=ordered)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            for write_error in write_errors:
+                errors[write_error["index"]] = write_error.get("errmsg", "Write failed")
+            if ordered and write_errors:
+                first_failure = min(write_error["index"] for write_error in write_errors)
+                for index in range(first_failure + 1, len(operations)):
+                    errors[index] = BULK_SKIPPED
+        return errors
+
+    async def create_task(self, task: TaskCreate, user_id: ObjectId) -> Task:
+        """Create a new task for a user"""
+        task_dict = self.new_document(task, user_id)
         
-        result = await self.collection.insert_one(task_dict)
-        created_task = await self.collection.find_one({"_id": result.inserted_id})
-        return Task(**created_task)
-
-    async def get_tasks_by_user(self, user_id: ObjectId) -> List[Task]:
-        """Get all tasks for a user"""
-        cursor = self.collection.find({"user_id": user_id}).sort("created_at", -1)
-        tasks = []
-        async for task in cursor:
-            tasks.append(Task(**task))
-        return tasks
+        # insert_one sets _id on task_dict, which is then exactly what was stored,
+        # so no read-back is needed; the label and user repositories rely on the same
+        await self.collection.insert_one(task_dict)
+        await self.labels.adjust_task_counts(user_id, _label_deltas((), task_dict["label_ids"]))
+        await self._after_write(user_id, "created", [task_dict["_id"]])
+        return Task(**task_dict)
+
+    def _aggregate_with_labels(
+        self,
+        query: Dict[str, Any],
+        user_id: ObjectId,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        limit: Optional[int] = None,
+        collection=None,
+    ):
+        """Run a task query with each task's labels embedded as `labels`.
+
+        The $lookup runs after the sort and limit, so only returned tasks are
+        joined. Each lookup goes through the labels _id index and keeps only
+        the user's labels and the fields TaskLabel needs.
+        """
+        pipeline: List[Dict[str, Any]] = [{"$match": query}]
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+        if limit:
+            pipeline.append({"$limit": limit})
+        pipeline.append({"$lookup": {
+            "from": "labels",
+            "localField": "label_ids",
+            "foreignField": "_id",
+            "pipeline": [
+                {"$match": {"user_id": user_id}},
+                {"$project": {"name": 1, "color": 1}},
+                {"$sort": {"name": 1}},
+            ],
+            "as": "labels",
+        }})
+        collection = self.collection if collection is None else collection
+        return collection.aggregate(pipeline, batchSize=settings.STREAM_BATCH_SIZE)
+
+    def build_query(self, user_id: ObjectId, filters: Optional[TaskFilters] = None) -> Dict[str, Any]:
+        """Build the Mongo filter for a user's tasks"""
+        query: Dict[str, Any] = {"user_id": user_id}
+        if filters is None:
+            return query
+
+        if filters.status:
+            query["status"] = filters.status
+        if filters.priority:
+            query["priority"] = filters.priority
+        if filters.deadline_from or filters.deadline_to:
+            deadline: Dict[str, datetime] = {}
+            if filters.deadline_from:
+                deadline["$gte"] = _to_datetime(filters.deadline_from)
+            if filters.deadline_to:
+                deadline["$lte"] = _to_datetime(filters.deadline_to)
+            query["deadline"] = deadline
+        if filters.label_ids:
+            operator = "$all" if filters.label_match == "all" else "$in"
+            query["label_ids"] = {operator: list(filters.label_ids)}
+        return query
+
+    def _keyset_query(
+        self,
+        user_id: ObjectId,
+        filters: Optional[TaskFilters],
+        cursor: Optional[str],
+        order: str,
+    ) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+        query = self.build_query(user_id, filters)
+        after = keyset_condition(cursor, order)
+        if after:
+            query = {"$and": [query, after]}
+        direction = DESCENDING if order == "desc" else ASCENDING
+        return query, [("created_at", direction), ("_id", direction)]
+
+    async def get_task_documents_by_user(
+        self,
+        user_id: ObjectId,
+        filters: Optional[TaskFilters] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        expand_labels: bool = False,
+        include_archived: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one keyset-paginated page of raw task documents and the next cursor"""
+        query, sort = self._keyset_query(user_id, filters, cursor, order)
+        if include_archived:
+            docs = [doc async for doc in self._merged_stream(query, user_id, sort, order, limit + 1, expand_labels)]
+        else:
+            if expand_labels:
+                db_cursor = self._aggregate_with_labels(query, user_id, sort, limit + 1)
+            else:
+                db_cursor = self.collection.find(query).sort(sort).limit(limit + 1)
+            docs = await db_cursor.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            last = docs[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"], order)
+        return docs, next_cursor
+
+    async def get_tasks_by_user(
+        self,
+        user_id: ObjectId,
+        filters: Optional[TaskFilters] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+    ) -> TaskPage:
+        """Get one keyset-paginated page of tasks for a user"""
+        docs, next_cursor = await self.get_task_documents_by_user(user_id, filters, limit, cursor, order)
+        return TaskPage(items=[Task(**task) for task in docs], next_cursor=next_cursor)
+
+    async def search_task_documents(
+        self,
+        user_id: ObjectId,
+        text: str,
+        filters: Optional[TaskFilters] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of a user's tasks matching a text search, most relevant first.
+
+        Relevance scores have no stable keyset, so the cursor carries an offset.
+        """
+        offset = decode_offset_cursor(cursor)
+        query = self.build_query(user_id, filters)
+        query["$text"] = {"$search": text}
+        score = {"$meta": "textScore"}
+        db_cursor = (
+            self.collection.find(query, {"score": score})
+            .sort([("score", score), ("_id", DESCENDING)])
+            .skip(offset)
+            .limit(limit + 1)
+        )
+        docs = await db_cursor.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_offset_cursor(offset + limit)
+        return docs, next_cursor
+
+    async def get_task_stats(self, user_id: ObjectId, today: date) -> TaskStats:
+        """Count a user's tasks by status, priority and label, plus overdue and due soon.
+
+        One aggregation: the user_id match uses the user_created_at index and
+        $facet computes every count from a single pass over the user's tasks.
+        """
+        start = _to_datetime(today)
+        open_deadline = lambda condition: [
+            {"$match": {"status": "open", "deadline": condition}},
+            {"$count": "count"},
+        ]
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$project": {"_id": 0, "status": 1, "priority": 1, "label_ids": 1, "deadline": 1}},
+            {"$facet": {
+                "total": [{"$count": "count"}],
+                "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+                "by_priority": [{"$group": {"_id": "$priority", "count": {"$sum": 1}}}],
+                "by_label": [
+                    {"$unwind": "$label_ids"},
+                    {"$group": {"_id": "$label_ids", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}},
+                ],
+                "overdue": open_deadline({"$lt": start}),
+                "due_this_week": open_deadline({"$gte": start, "$lt": start + timedelta(days=7)}),
+            }},
+        ]
+        results = await self.collection.aggregate(pipeline).to_list(length=1)
+        facets = results[0] if results else {}
+
+        def count(name: str) -> int:
+            rows = facets.get(name) or []
+            return rows[0]["count"] if rows else 0
+
+        return TaskStats(
+            total=count("total"),
+            by_status={row["_id"]: row["count"] for row in facets.get("by_status", [])},
+            by_priority={row["_id"]: row["count"] for row in facets.get("by_priority", [])},
+            by_label=[{"label_id": row["_id"], "count": row["count"]} for row in facets.get("by_label", [])],
+            overdue=count("overdue"),
+            due_this_week=count("due_this_week"),
+            as_of=today,
+        )
+
+    def stream_tasks_by_user(
+        self,
+        user_id: ObjectId,
+        filters: Optional[TaskFilters] = None,
+        cursor: Optional[str] = None,
+        order: str = "desc",
+        limit: Optional[int] = None,
+        expand_labels: bool = False,
+        include_archived: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Return a cursor yielding a user's raw task documents in batches"""
+        query, sort = self._keyset_query(user_id, filters, cursor, order)
+        if include_archived:
+            return self._merged_stream(query, user_id, sort, order, limit, expand_labels)
+        return self._stream(self.collection, query, user_id, sort, limit, expand_labels)
+
+    def _stream(self, collection, query, user_id, sort, limit, expand_labels) -> AsyncIterator[Dict[str, Any]]:
+        if expand_labels:
+            return self._aggregate_with_labels(query, user_id, sort, limit, collection)
+        db_cursor = collection.find(query).sort(sort).batch_size(settings.STREAM_BATCH_SIZE)
+        if limit:
+            db_cursor = db_cursor.limit(limit)
+        return db_cursor
+
+    def _merged_stream(self, query, user_id, sort, order, limit, expand_labels) -> AsyncIterator[Dict[str, Any]]:
+        """The same keyset query over tasks and the archive, merged in order.
+
+        Both collections share the user_created_at index and the sort keys,
+        so a cursor from a merged page resumes in either collection.
+        """
+        streams = [
+            self._stream(collection, query, user_id, sort, limit, expand_labels)
+            for collection in (self.collection, self.archive)
+        ]
+        return merge_keyset_streams(streams, order, limit)
+
+    async def get_task_document(
+        self,
+        task_id: ObjectId,
+        user_id: ObjectId,
+        expand_labels: bool = False,
+        include_archived: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Get a raw task document by ID for a user, optionally with its labels"""
+        query = {"_id": task_id, "user_id": user_id}
+        collections = (self.collection, self.archive) if include_archived else (self.collection,)
+        for collection in collections:
+            if expand_labels:
+                docs = await self._aggregate_with_labels(query, user_id, limit=1, collection=collection).to_list(length=1)
+                doc = docs[0] if docs else None
+            else:
+                doc = await collection.find_one(query)
+            if doc:
+                return doc
+        return None
 
     async def get_task_by_id(self, task_id: ObjectId, user_id: ObjectId) -> Optional[Task]:
         """Get a specific task by ID for a user"""
@@ -34,32 +349,190 @@ class TaskRepository:
 
     async def update_task(self, task_id: ObjectId, user_id: ObjectId, task_update: TaskUpdate) -> Optional[Task]:
         """Update a task"""
-        update_data = {k: v for k, v in task_update.dict().items() if v is not None}
+        update_data = self._update_fields(task_update)
         if not update_data:
             return await self.get_task_by_id(task_id, user_id)
         
-        update_data["updated_at"] = datetime.utcnow()
-        await self.collection.update_one(
+        # The previous labels are needed for task_count; $set makes the new
+        # document the old one with update_data applied
+        before = await self.collection.find_one_and_update(
             {"_id": task_id, "user_id": user_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.BEFORE,
         )
-        return await self.get_task_by_id(task_id, user_id)
+        if not before:
+            return None
+        if "label_ids" in update_data:
+            deltas = _label_deltas(before.get("label_ids"), update_data["label_ids"])
+            await self.labels.adjust_task_counts(user_id, deltas)
+        await self._after_write(user_id, "updated", [task_id])
+        return Task(**{**before, **update_data})
 
     async def delete_task(self, task_id: ObjectId, user_id: ObjectId) -> bool:
         """Delete a task"""
-        result = await self.collection.delete_one({"_id": task_id, "user_id": user_id})
-        return result.deleted_count > 0
+        task = await self.collection.find_one_and_delete(
+            {"_id": task_id, "user_id": user_id}, projection={"label_ids": 1}
+        )
+        if not task:
+            return False
+        await self.labels.adjust_task_counts(user_id, _label_deltas(task.get("label_ids"), ()))
+        await self._after_write(user_id, "deleted", [task_id])
+        return True
+
+    async def _get_label_ids(self, task_ids: Iterable[ObjectId], user_id: ObjectId) -> Dict[ObjectId, List[ObjectId]]:
+        """Current label_ids of the given tasks, in one query"""
+        cursor = self.collection.find({"_id": {"$in": list(task_ids)}, "user_id": user_id}, {"label_ids": 1})
+        return {task["_id"]: task.get("label_ids", []) async for task in cursor}
+
+    async def get_existing_task_ids(self, task_ids: Iterable[ObjectId], user_id: ObjectId) -> Set[ObjectId]:
+        """Return which of the given task ids exist for a user, in one query"""
+        cursor = self.collection.find({"_id": {"$in": list(task_ids)}, "user_id": user_id}, {"_id": 1})
+        return {task["_id"] async for task in cursor}
+
+    async def bulk_create_tasks(
+        self, tasks: List[TaskCreate], user_id: ObjectId, ordered: bool = False
+    ) -> List[Tuple[ObjectId, Optional[str]]]:
+        """Insert tasks in one bulk_write and return (id, error) per task"""
+        docs = [self.new_document(task, user_id) for task in tasks]
+        for doc in docs:
+            doc["_id"] = ObjectId()
+        errors = await self.insert_task_documents(docs, user_id, ordered)
+        return [(doc["_id"], error) for doc, error in zip(docs, errors)]
+
+    async def insert_task_documents(
+        self, docs: List[Dict[str, Any]], user_id: ObjectId, ordered: bool = False
+    ) -> List[Optional[str]]:
+        """Insert complete task documents of one user and return an error (or None) per document.
+
+        Label counts, the user version and events cover only the documents
+        that were written.
+        """
+        errors = await self._bulk_write([InsertOne(doc) for doc in docs], ordered)
+        if docs:
+            deltas: Counter = Counter()
+            for doc, error in zip(docs, errors):
+                if error is None:
+                    deltas.update(_label_deltas((), doc["label_ids"]))
+            await self.labels.adjust_task_counts(user_id, deltas)
+            created = [doc["_id"] for doc, error in zip(docs, errors) if error is None]
+            await self._after_write(user_id, "created", created)
+        return errors
+
+    async def bulk_update_tasks(
+        self, updates: List[Tuple[ObjectId, TaskUpdate]], user_id: ObjectId, ordered: bool = False
+    ) -> List[Optional[str]]:
+        """Apply task updates in one bulk_write and return an error (or None) per update"""
+        errors: List[Optional[str]] = [None] * len(updates)
+        operations, positions, changes = [], [], []
+        for position, (task_id, task_update) in enumerate(updates):
+            update_data = self._update_fields(task_update)
+            # Empty updates leave the task untouched, as in update_task
+            if update_data:
+                operations.append(UpdateOne({"_id": task_id, "user_id": user_id}, {"$set": update_data}))
+                positions.append(position)
+                changes.append((task_id, update_data.get("label_ids")))
+
+        relabeled = {task_id for task_id, label_ids in changes if label_ids is not None}
+        current = await self._get_label_ids(relabeled, user_id) if relabeled else {}
+        for position, error in zip(positions, await self._bulk_write(operations, ordered)):
+            errors[position] = error
+
+        if operations:
+            deltas: Counter = Counter()
+            for (task_id, label_ids), position in zip(changes, positions):
+                if label_ids is None or errors[position] is not None or task_id not in current:
+                    continue
+                deltas.update(_label_deltas(current[task_id], label_ids))
+                current[task_id] = label_ids
+            await self.labels.adjust_task_counts(user_id, deltas)
+            updated = [task_id for (task_id, _), position in zip(changes, positions) if errors[position] is None]
+            await self._after_write(user_id, "updated", updated)
+        return errors
+
+    async def bulk_delete_tasks(
+        self, task_ids: List[ObjectId], user_id: ObjectId, ordered: bool = False
+    ) -> List[Optional[str]]:
+        """Delete tasks in one bulk_write and return an error (or None) per task"""
+        operations = [DeleteOne({"_id": task_id, "user_id": user_id}) for task_id in task_ids]
+        current = await self._get_label_ids(task_ids, user_id) if task_ids else {}
+        errors = await self._bulk_write(operations, ordered)
+        if operations:
+            deltas: Counter = Counter()
+            for task_id, error in zip(task_ids, errors):
+                if error is None and task_id in current:
+                    deltas.update(_label_deltas(current.pop(task_id), ()))
+            await self.labels.adjust_task_counts(user_id, deltas)
+            deleted = [task_id for task_id, error in zip(task_ids, errors) if error is None]
+            await self._after_write(user_id, "deleted", deleted)
+        return errors
+
+    def _archivable_query(self, cutoff: datetime) -> Dict[str, Any]:
+        # Matches the done_updated_at partial index
+        return {"status": "done", "updated_at": {"$lt": cutoff}}
+
+    async def count_archivable_tasks(self, cutoff: datetime) -> int:
+        """Count done tasks last updated before cutoff"""
+        return await self.collection.count_documents(self._archivable_query(cutoff))
+
+    async def archive_done_tasks(self, cutoff: datetime, batch_size: int) -> int:
+        """Move up to batch_size done tasks last updated before cutoff to the archive.
+
+        Tasks are copied before they are deleted, so an interrupted batch
+        leaves a task in both collections rather than neither, and the next
+        run copies it again. Each task is then deleted on its own, so only
+        tasks this call removed are uncounted from labels and announced. A
+        task edited or deleted by its user in the meantime loses its archive
+        copy instead. Callers must hold the archive lease: two overlapping
+        calls would remove each other's copies. Returns the number of tasks
+        moved; 0 means none were left to move.
+        """
+        query = self._archivable_query(cutoff)
+        docs = await self.collection.find(query).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            return 0
+        await self.archive.bulk_write(
+            [ReplaceOne({"_id": doc["_id"]}, doc, upsert=True) for doc in docs], ordered=False
+        )
+        moved, stale = [], []
+        # One at a time: find_one_and_delete says which tasks this call removed,
+        # and the batch never takes more than one pooled connection
+        for doc in docs:
+            deleted = await self.collection.find_one_and_delete({"_id": doc["_id"], **query}, projection={"_id": 1})
+            (moved if deleted else stale).append(doc)
+        if stale:
+            await self.archive.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+        by_user: Dict[ObjectId, List[Dict[str, Any]]] = {}
+        for doc in moved:
+            by_user.setdefault(doc["user_id"], []).append(doc)
+        for user_id, user_docs in by_user.items():
+            # Label task counts cover the tasks collection only
+            deltas: Counter = Counter()
+            for doc in user_docs:
+                deltas.update(_label_deltas(doc.get("label_ids", ()), ()))
+            await self.labels.adjust_task_counts(user_id, deltas)
+            await self._after_write(user_id, "archived", [doc["_id"] for doc in user_docs])
+        return len(moved)
+
+    async def get_task_documents_by_label(
+        self, user_id: ObjectId, label_id: ObjectId, expand_labels: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get raw task documents that have a specific label"""
+        return await self.stream_tasks_by_label(user_id, label_id, expand_labels).to_list(length=None)
 
     async def get_tasks_by_label(self, user_id: ObjectId, label_id: ObjectId) -> List[Task]:
         """Get tasks that have a specific label"""
-        cursor = self.collection.find({"user_id": user_id, "label_ids": label_id}).sort("created_at", -1)
-        tasks = []
-        async for task in cursor:
-            tasks.append(Task(**task))
-        return tasks
-
-    async def create_indexes(self):
-        """Create database indexes"""
-        await self.collection.create_index("user_id")
-        await self.collection.create_index("label_ids")
-        await self.collection.create_index("deadline")
+        return [Task(**task) for task in await self.get_task_documents_by_label(user_id, label_id)]
+
+    def stream_tasks_by_label(
+        self, user_id: ObjectId, label_id: ObjectId, expand_labels: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Return a cursor yielding raw task documents that have a specific label"""
+        query = {"user_id": user_id, "label_ids": label_id}
+        if expand_labels:
+            return self._aggregate_with_labels(query, user_id, [("created_at", DESCENDING)])
+        return (
+            self.collection.find(query)
+            .sort("created_at", -1)
+            .batch_size(settings.STREAM_BATCH_SIZE)
+        )
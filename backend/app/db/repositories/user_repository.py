@@ -2,7 +2,8 @@ from typing import Optional, List
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from ...models.user import User, UserInDB, UserCreate
-from ...core.auth import get_password_hash, verify_password
+from ...core.auth import get_password_hash_async, verify_password_async
+from ..database import utcnow
 
 class UserRepository:
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -11,12 +12,12 @@ class UserRepository:
     async def create_user(self, user: UserCreate) -> UserInDB:
         """Create a new user"""
         user_dict = user.dict()
-        user_dict["password_hash"] = get_password_hash(user.password)
+        user_dict["password_hash"] = await get_password_hash_async(user.password)
         del user_dict["password"]
+        user_dict["created_at"] = user_dict["updated_at"] = utcnow()
         
-        result = await self.collection.insert_one(user_dict)
-        created_user = await self.collection.find_one({"_id": result.inserted_id})
-        return UserInDB(**created_user)
+        await self.collection.insert_one(user_dict)
+        return UserInDB(**user_dict)
 
     async def get_user_by_email(self, email: str) -> Optional[UserInDB]:
         """Get user by email"""
@@ -37,10 +38,6 @@ class UserRepository:
         user = await self.get_user_by_email(email)
         if not user:
             return None
-        if not verify_password(password, user.password_hash):
+        if not await verify_password_async(password, user.password_hash):
             return None
         return user
-
-    async def create_indexes(self):
-        """Create database indexes"""
-        await self.collection.create_index("email", unique=True)
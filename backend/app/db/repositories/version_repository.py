@@ -0,0 +1,21 @@
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+class VersionRepository:
+    """Per-user counter bumped by every task or label write.
+
+    One small document per user, keyed by the user id, lets conditional
+    requests be answered without reading any tasks or labels.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db.user_versions
+
+    async def get_version(self, user_id: ObjectId) -> int:
+        """Get the current data version for a user"""
+        doc = await self.collection.find_one({"_id": user_id}, {"version": 1})
+        return doc["version"] if doc else 0
+
+    async def bump(self, user_id: ObjectId):
+        """Record that a user's tasks or labels changed"""
+        await self.collection.update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
@@ -0,0 +1,212 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pydantic_core import to_json
+from ..core.profiling import timed
+from ..core.serialization import DocumentSerializer
+from ..models.label import Label
+from ..models.task import Task
+from ..models.transfer import ImportLineError, ImportResult, LabelImport, TaskImport
+from .database import utcnow
+from .repositories.label_repository import LabelRepository
+from .repositories.task_repository import TaskRepository
+
+CSV_COLUMNS = [
+    "type", "_id", "name", "color", "title", "description", "priority",
+    "deadline", "status", "label_ids", "created_at", "updated_at",
+]
+
+_label_serializer = DocumentSerializer(Label)
+_task_serializer = DocumentSerializer(Task)
+
+def _record(kind: str, serializer: DocumentSerializer, doc: Dict[str, Any]) -> Dict[str, Any]:
+    record = serializer.to_dict(doc)
+    # Neither means anything in the account the export is imported into
+    record.pop("user_id", None)
+    record.pop("task_count", None)
+    return {"type": kind, **record}
+
+async def export_records(db: AsyncIOMotorDatabase, user_id: ObjectId) -> AsyncIterator[Dict[str, Any]]:
+    """Yield a user's labels, then tasks including archived ones, as JSON-ready dicts tagged with their type.
+
+    Both come straight from batched cursors, so memory does not grow with
+    the account. Writes made while the export runs may or may not appear.
+    """
+    async for doc in LabelRepository(db).stream_labels_by_user(user_id):
+        yield _record("label", _label_serializer, doc)
+    async for doc in TaskRepository(db).stream_tasks_by_user(user_id, include_archived=True):
+        yield _record("task", _task_serializer, doc)
+
+async def ndjson_export(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode export records one JSON object per line"""
+    async for record in records:
+        with timed("serialize"):
+            yield to_json(record) + b"\n"
+
+def _csv_value(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ";".join(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+async def csv_export(records: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    """Encode export records as CSV rows under one header, label ids joined with ';'"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    async for record in records:
+        with timed("serialize"):
+            writer.writerow([_csv_value(record.get(column)) for column in CSV_COLUMNS])
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def _validation_message(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+class Importer:
+    """Write NDJSON export lines into one user's account in batches.
+
+    Labels are matched by name to the user's existing labels or created
+    with new ids. Tasks always get new ids, and their label_ids are
+    remapped through the labels seen so far, so label lines must come
+    before the tasks using them, as in an export. Each line is validated on
+    its own and invalid lines are reported without stopping the import.
+    Nothing is rolled back: batches already written stay written.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase, user_id: ObjectId, batch_size: int, max_errors: int = 100):
+        self.labels = LabelRepository(db)
+        self.tasks = TaskRepository(db)
+        self.user_id = user_id
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.result = ImportResult()
+        # Label id in the export -> label id in this account
+        self._label_ids: Dict[str, ObjectId] = {}
+        self._names: Optional[Dict[str, ObjectId]] = None
+        self._pending_labels: List[Tuple[int, Dict[str, Any]]] = []
+        self._pending_tasks: List[Tuple[int, Dict[str, Any]]] = []
+
+    def error(self, line: int, message: str):
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append(ImportLineError(line=line, error=message))
+        else:
+            self.result.errors_truncated = True
+
+    async def add_line(self, number: int, line: bytes):
+        """Validate one line and queue its document, writing a batch when one fills up"""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            record = json.loads(line)
+        except ValueError:
+            self.error(number, "Invalid JSON")
+            return
+        kind = record.get("type") if isinstance(record, dict) else None
+        if kind == "label":
+            await self._add_label(number, record)
+        elif kind == "task":
+            await self._add_task(number, record)
+        else:
+            self.error(number, 'Expected an object with "type" of "label" or "task"')
+
+    async def _add_label(self, number: int, record: Dict[str, Any]):
+        try:
+            label = LabelImport.model_validate(record)
+        except ValidationError as e:
+            self.result.labels.failed += 1
+            self.error(number, _validation_message(e))
+            return
+        if self._names is None:
+            self._names = await self.labels.get_label_ids_by_name(self.user_id)
+        label_id = self._names.get(label.name)
+        if label_id is not None:
+            self.result.labels.existing += 1
+        else:
+            label_id = self._names[label.name] = ObjectId()
+            doc = label.dict(exclude={"id"})
+            doc.update(_id=label_id, user_id=self.user_id, task_count=0)
+            doc["created_at"] = doc["updated_at"] = utcnow()
+            self._pending_labels.append((number, doc))
+            if len(self._pending_labels) >= self.batch_size:
+                await self._flush_labels()
+        if label.id is not None:
+            self._label_ids[label.id] = label_id
+
+    async def _add_task(self, number: int, record: Dict[str, Any]):
+        # Labels are written before any task that may point at them, and
+        # ones that failed are out of the mapping by the time it is used
+        await self._flush_labels()
+        label_ids = record.get("label_ids") or []
+        if not isinstance(label_ids, list):
+            label_ids = [label_ids]
+        unknown = [str(label_id) for label_id in label_ids if str(label_id) not in self._label_ids]
+        if unknown:
+            self.result.tasks.failed += 1
+            self.error(number, f"Unknown label id {unknown[0]}")
+            return
+        try:
+            task = TaskImport.model_validate(
+                {**record, "label_ids": [self._label_ids[str(label_id)] for label_id in label_ids]}
+            )
+        except ValidationError as e:
+            self.result.tasks.failed += 1
+            self.error(number, _validation_message(e))
+            return
+        doc = self.tasks.new_document(task, self.user_id)
+        doc["_id"] = ObjectId()
+        doc["created_at"] = task.created_at or doc["created_at"]
+        doc["updated_at"] = task.updated_at or doc["updated_at"]
+        self._pending_tasks.append((number, doc))
+        if len(self._pending_tasks) >= self.batch_size:
+            await self._flush_tasks()
+
+    async def _flush_labels(self):
+        if not self._pending_labels:
+            return
+        pending, self._pending_labels = self._pending_labels, []
+        errors = await self.labels.insert_label_documents([doc for _, doc in pending], self.user_id)
+        failed = set()
+        for (number, doc), error in zip(pending, errors):
+            if error is None:
+                self.result.labels.created += 1
+                continue
+            self.result.labels.failed += 1
+            self.error(number, error)
+            failed.add(doc["_id"])
+            self._names.pop(doc["name"], None)
+        if failed:
+            # Tasks pointing at a label that was not written fail as unknown
+            self._label_ids = {key: value for key, value in self._label_ids.items() if value not in failed}
+
+    async def _flush_tasks(self):
+        if not self._pending_tasks:
+            return
+        pending, self._pending_tasks = self._pending_tasks, []
+        errors = await self.tasks.insert_task_documents([doc for _, doc in pending], self.user_id)
+        for (number, _), error in zip(pending, errors):
+            if error is None:
+                self.result.tasks.created += 1
+            else:
+                self.result.tasks.failed += 1
+                self.error(number, error)
+
+    async def finish(self) -> ImportResult:
+        """Write whatever is still queued and return the totals"""
+        await self._flush_labels()
+        await self._flush_tasks()
+        return self.result
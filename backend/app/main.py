@@ -1,19 +1,26 @@
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.exceptions import RequestValidationError
 from pydantic import ValidationError
 from .core.settings import get_settings
+from .core.metrics import MetricsMiddleware, registry, PROMETHEUS_CONTENT_TYPE
+from .core.overload import LoadSheddingMiddleware
+from .core.profiling import ProfilingMiddleware
+from .core.auth import shutdown_hash_executor
+from .core.events import event_bus
 from .core.logging import (
-    log_request, 
+    RequestLoggingMiddleware,
     http_exception_handler, 
     validation_exception_handler, 
     general_exception_handler
 )
-from .db.database import connect_to_mongo, close_mongo_connection, get_database
-from .db.repositories.user_repository import UserRepository
-from .db.repositories.task_repository import TaskRepository
-from .db.repositories.label_repository import LabelRepository
-from .api import auth, tasks, labels
+from .db.archive import run_archiver
+from .db.change_events import watch_changes
+from .db.database import connect_to_mongo, close_mongo_connection, get_database, pool_listener
+from .db.migrations import MIGRATIONS, LATEST_VERSION, apply_migrations, check_schema_version
+from .api import auth, tasks, labels, events, transfer
 
 settings = get_settings()
 
@@ -22,19 +29,26 @@ async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
     
-    # Create database indexes
+    # Index builds run through migrations; startup only checks the version
     db = get_database()
-    user_repo = UserRepository(db)
-    task_repo = TaskRepository(db)
-    label_repo = LabelRepository(db)
+    if settings.MIGRATE_ON_STARTUP:
+        await apply_migrations(db, MIGRATIONS)
+    else:
+        await check_schema_version(db, LATEST_VERSION, required=settings.REQUIRE_SCHEMA_VERSION)
     
-    await user_repo.create_indexes()
-    await task_repo.create_indexes()
-    await label_repo.create_indexes()
+    background = []
+    if settings.EVENTS_SOURCE == "change_stream":
+        background.append(asyncio.create_task(watch_changes(db)))
+    if settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        background.append(asyncio.create_task(run_archiver(db, settings.ARCHIVE_INTERVAL_SECONDS)))
     
     yield
     # Shutdown
+    event_bus.close_all()
+    for task in background:
+        task.cancel()
     await close_mongo_connection()
+    shutdown_hash_executor()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -47,6 +61,8 @@ app = FastAPI(
         {"name": "users", "description": "User profile routes"},
         {"name": "tasks", "description": "Task CRUD routes"},
         {"name": "labels", "description": "Label CRUD routes"},
+        {"name": "events", "description": "Server-Sent Events of task and label changes"},
+        {"name": "transfer", "description": "Bulk export and import of a user's data"},
     ],
 )
 
@@ -59,14 +75,20 @@ app.add_exception_handler(Exception, general_exception_handler)
 app.include_router(auth.router)
 app.include_router(tasks.router)
 app.include_router(labels.router)
+app.include_router(events.router)
+app.include_router(transfer.router)
 
-@app.middleware("http")
-async def logging_middleware(request: Request, call_next):
-    """Log all requests"""
-    response = await call_next(request)
-    log_request(request, response)
-    return response
+# Innermost, so shed requests are still logged and counted
+app.add_middleware(LoadSheddingMiddleware, pool_listener=pool_listener)
+app.add_middleware(RequestLoggingMiddleware, sample_rate=settings.LOG_SAMPLE_RATE)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 @app.get("/healthz")
 def healthz() -> dict[str, str]:
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus metrics for this worker"""
+    return Response(content=registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,7 +1,6 @@
 from datetime import datetime, date
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field
-from bson import ObjectId
 from .user import PyObjectId
 
 class TaskBase(BaseModel):
@@ -32,5 +31,70 @@ class Task(TaskBase):
     model_config = {
         "populate_by_name": True,
         "arbitrary_types_allowed": True,
-        "json_encoders": {ObjectId: str}
     }
+
+class TaskLabel(BaseModel):
+    """The label fields embedded in a task read with expand=labels"""
+
+    id: PyObjectId = Field(..., alias="_id")
+    name: str
+    color: Optional[str] = None
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+    }
+
+class TaskExpanded(Task):
+    labels: List[TaskLabel] = Field(default_factory=list)
+
+class TaskBulkCreate(BaseModel):
+    items: List[TaskCreate]
+    ordered: bool = Field(default=False, description="Stop at the first write error; items that fail validation are reported without stopping")
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: PyObjectId
+
+class TaskBulkUpdate(BaseModel):
+    items: List[TaskBulkUpdateItem]
+    ordered: bool = Field(default=False, description="Stop at the first write error; items that fail validation are reported without stopping")
+
+class TaskBulkDelete(BaseModel):
+    ids: List[PyObjectId]
+    ordered: bool = Field(default=False, description="Stop at the first write error; items that fail validation are reported without stopping")
+
+class TaskBulkItemResult(BaseModel):
+    index: int
+    id: Optional[PyObjectId] = None
+    status: str = Field(..., example="created")
+    error: Optional[str] = None
+
+class TaskBulkResult(BaseModel):
+    results: List[TaskBulkItemResult]
+
+class TaskFilters(BaseModel):
+    status: Optional[str] = Field(None, pattern="^(open|done)$")
+    priority: Optional[str] = Field(None, pattern="^(High|Medium|Low)$")
+    deadline_from: Optional[date] = None
+    deadline_to: Optional[date] = None
+    label_ids: List[PyObjectId] = Field(default_factory=list)
+    label_match: str = Field(default="any", pattern="^(any|all)$")
+
+class TaskPage(BaseModel):
+    items: List[Task]
+    next_cursor: Optional[str] = None
+
+class TaskLabelCount(BaseModel):
+    label_id: PyObjectId
+    count: int
+
+    model_config = {"arbitrary_types_allowed": True}
+
+class TaskStats(BaseModel):
+    total: int = 0
+    by_status: Dict[str, int] = Field(default_factory=dict, example={"open": 12, "done": 30})
+    by_priority: Dict[str, int] = Field(default_factory=dict, example={"High": 4, "Medium": 20, "Low": 18})
+    by_label: List[TaskLabelCount] = Field(default_factory=list)
+    overdue: int = Field(0, description="Open tasks with a deadline before today")
+    due_this_week: int = Field(0, description="Open tasks due today or in the next six days")
+    as_of: date = Field(..., description="The UTC date overdue and due_this_week are relative to")
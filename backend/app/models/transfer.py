@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from .label import LabelCreate
+from .task import TaskCreate
+
+class LabelImport(LabelCreate):
+    id: Optional[str] = Field(None, alias="_id", description="The label's id in the export, referenced by its tasks")
+
+    model_config = {"populate_by_name": True}
+
+class TaskImport(TaskCreate):
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+class ImportCounts(BaseModel):
+    created: int = 0
+    existing: int = Field(0, description="Labels matched by name to one the user already has")
+    failed: int = 0
+
+class ImportResult(BaseModel):
+    labels: ImportCounts = Field(default_factory=ImportCounts)
+    tasks: ImportCounts = Field(default_factory=ImportCounts)
+    errors: List[ImportLineError] = Field(default_factory=list, description="The first errors, by line number")
+    errors_truncated: bool = False
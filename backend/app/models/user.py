@@ -16,7 +16,10 @@ class PyObjectId(ObjectId):
         cls, _source_type, _handler
     ):
         from pydantic_core import core_schema
-        return core_schema.no_info_plain_validator_function(cls.validate)
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.to_string_ser_schema(when_used="json"),
+        )
 
     @classmethod
     def validate(cls, v):
@@ -43,7 +46,6 @@ class User(UserBase):
     model_config = {
         "populate_by_name": True,
         "arbitrary_types_allowed": True,
-        "json_encoders": {ObjectId: str}
     }
 
 class UserInDB(User):
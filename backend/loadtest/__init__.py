@@ -0,0 +1,4 @@
+"""Synthetic dataset seeding and an in-process load driver for the API.
+
+See ``python -m loadtest --help`` from the backend folder.
+"""
@@ -0,0 +1,141 @@
+"""Seed a database with synthetic data and measure the API under load.
+
+Usage, from the backend folder:
+
+    python -m loadtest seed --users 10 --tasks-per-user 10000 --reset
+    python -m loadtest run --tasks-per-user 10,1000,100000 --concurrency 1,8,32
+
+Both commands use the DATABASE_NAME setting with a "_loadtest" suffix unless
+--database is given, so a development database is never reset by accident.
+With --in-memory the data lives in mongomock_motor (installed separately)
+inside this process; its numbers show application overhead only, not Mongo.
+The search_tasks endpoint needs a real server, since mongomock has no $text.
+Rate limits are turned off for the run; load shedding is not.
+
+`run` reseeds a fresh database for each --tasks-per-user value, or drives
+the existing seed data when the option is omitted. The report is JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, Dict, List
+from app.core.auth import shutdown_hash_executor
+from app.core.settings import get_settings
+from app.db import database
+from app.db.migrations import MIGRATIONS, apply_migrations
+from .dataset import load_seeded_users, reset_database, seed_database
+from .driver import ENDPOINTS, LoadDriver, asgi_client
+
+settings = get_settings()
+
+def _int_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+async def open_database(name: str, in_memory: bool):
+    """Point the app's database handle at the load test database"""
+    if in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--in-memory needs mongomock_motor: pip install mongomock-motor")
+        database.db.client = AsyncMongoMockClient()
+    else:
+        await database.connect_to_mongo()
+    database.db.database = database.db.client[name]
+    return database.db.database
+
+async def prepare(db, args, tasks_per_user: int, reset: bool = True):
+    if reset:
+        await reset_database(db)
+    if not args.in_memory:
+        # Indexes come from migrations, so measure with the real ones
+        await apply_migrations(db, MIGRATIONS)
+    return await seed_database(
+        db,
+        users=args.users,
+        labels_per_user=args.labels_per_user,
+        tasks_per_user=tasks_per_user,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
+
+async def drive(db, args) -> Dict[str, Any]:
+    from app.main import app
+
+    # A few seeded users send every request, so per user budgets would turn
+    # most of the run into 429s. Load shedding stays on.
+    settings.RATE_LIMIT_ENABLED = False
+
+    runs = []
+    sizes = args.tasks_per_user or [None]
+    async with asgi_client(app) as client:
+        for tasks_per_user in sizes:
+            if tasks_per_user is None:
+                users = await load_seeded_users(db)
+            else:
+                users = await prepare(db, args, tasks_per_user)
+            driver = LoadDriver(client, users)
+            for concurrency in args.concurrency:
+                endpoints = {}
+                for endpoint in args.endpoints:
+                    endpoints[endpoint] = await driver.run(endpoint, args.requests, concurrency)
+                runs.append({
+                    "tasks_per_user": tasks_per_user,
+                    "users": len(users),
+                    "concurrency": concurrency,
+                    "endpoints": endpoints,
+                })
+    return {"in_memory": args.in_memory, "requests_per_endpoint": args.requests, "runs": runs}
+
+async def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m loadtest")
+    parser.add_argument("--database", default=f"{settings.DATABASE_NAME}_loadtest")
+    parser.add_argument("--in-memory", action="store_true", help="Use mongomock_motor instead of MONGODB_URI")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--labels-per-user", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per insert_many")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for generated data")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    seed = subcommands.add_parser("seed", help="Insert synthetic users, labels and tasks")
+    seed.add_argument("--tasks-per-user", type=int, default=1000)
+    seed.add_argument("--reset", action="store_true", help="Drop users, labels and tasks first")
+
+    run = subcommands.add_parser("run", help="Measure latency and throughput per endpoint")
+    run.add_argument("--tasks-per-user", type=_int_list, default=None,
+                     help="Comma-separated sizes to reseed and measure, e.g. 10,1000,100000")
+    run.add_argument("--concurrency", type=_int_list, default=[1, 8, 32])
+    run.add_argument("--requests", type=int, default=200, help="Requests per endpoint and concurrency")
+    run.add_argument("--endpoints", type=lambda value: value.split(","), default=list(ENDPOINTS))
+    run.add_argument("--output", default=None, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        unknown = set(args.endpoints) - set(ENDPOINTS)
+        if unknown:
+            parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    # Access logs for thousands of requests would drown the report
+    logging.getLogger("app.access").setLevel(logging.WARNING)
+
+    db = await open_database(args.database, args.in_memory)
+    try:
+        if args.command == "seed":
+            users = await prepare(db, args, args.tasks_per_user, reset=args.reset)
+            sys.stdout.write(f"seeded {len(users)} users with {args.tasks_per_user} tasks each into {args.database}\n")
+        else:
+            report = json.dumps(await drive(db, args), indent=2)
+            if args.output:
+                with open(args.output, "w") as f:
+                    f.write(report + "\n")
+            else:
+                sys.stdout.write(report + "\n")
+    finally:
+        await database.close_mongo_connection()
+        shutdown_hash_executor()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,136 @@
+"""Synthetic users, labels and tasks, seeded with batched insert_many"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.auth import get_password_hash
+from app.db.repositories.label_repository import LabelRepository
+
+EMAIL_DOMAIN = "loadtest.example.com"
+PASSWORD = "loadtest-password"
+
+PRIORITIES = ("High", "Medium", "Low")
+LABEL_COLORS = ("#E11D48", "#2563EB", "#16A34A", "#F59E0B", "#7C3AED", "#0891B2")
+WORDS = (
+    "review", "draft", "plan", "release", "budget", "meeting", "report", "deploy",
+    "customer", "invoice", "design", "migrate", "schedule", "onboarding", "backlog",
+    "roadmap", "audit", "refactor", "renew", "contract", "quarterly", "weekly",
+)
+
+@dataclass
+class SeededUser:
+    id: ObjectId
+    email: str
+    label_ids: List[ObjectId] = field(default_factory=list)
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def make_user(index: int, password_hash: str, now: datetime) -> Dict[str, Any]:
+    return {
+        "_id": ObjectId(),
+        "email": f"user{index}@{EMAIL_DOMAIN}",
+        "name": f"Load Test {index}",
+        "password_hash": password_hash,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def make_labels(user_id: ObjectId, count: int, now: datetime) -> List[Dict[str, Any]]:
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "name": f"label {index}",
+            "color": LABEL_COLORS[index % len(LABEL_COLORS)],
+            "task_count": 0,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index in range(count)
+    ]
+
+def make_tasks(
+    user_id: ObjectId,
+    label_ids: List[ObjectId],
+    count: int,
+    rng: random.Random,
+    now: datetime,
+) -> Iterator[Dict[str, Any]]:
+    """Tasks created over the past year with a realistic mix of fields"""
+    start = now - timedelta(days=365)
+    step = timedelta(days=365) / max(count, 1)
+    for index in range(count):
+        created_at = start + step * index
+        created_at = created_at.replace(microsecond=created_at.microsecond // 1000 * 1000)
+        deadline = created_at + timedelta(days=rng.randint(1, 90))
+        yield {
+            "user_id": user_id,
+            "title": _sentence(rng, rng.randint(2, 8)).capitalize(),
+            "description": _sentence(rng, rng.randint(0, 120))[:1000] or None,
+            "priority": rng.choice(PRIORITIES),
+            "deadline": datetime(deadline.year, deadline.month, deadline.day),
+            "status": "done" if rng.random() < 0.3 else "open",
+            "label_ids": rng.sample(label_ids, rng.randint(0, min(3, len(label_ids)))),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+async def reset_database(db: AsyncIOMotorDatabase):
+    """Drop the seeded collections, and the migration record for their indexes"""
+    for name in ("users", "labels", "tasks", "tasks_archive", "schema_migrations"):
+        await db.drop_collection(name)
+
+async def seed_database(
+    db: AsyncIOMotorDatabase,
+    users: int = 10,
+    labels_per_user: int = 10,
+    tasks_per_user: int = 1000,
+    batch_size: int = 1000,
+    seed: int = 0,
+) -> List[SeededUser]:
+    """Insert synthetic users, labels and tasks and return the seeded users.
+
+    Every user shares PASSWORD, hashed once, so seeding does not pay for a
+    bcrypt hash per user. Tasks go in with unordered insert_many batches of
+    batch_size documents. Label task counts are filled in afterwards.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = get_password_hash(PASSWORD)
+
+    user_docs = [make_user(index, password_hash, now) for index in range(users)]
+    if user_docs:
+        await db.users.insert_many(user_docs, ordered=False)
+
+    seeded: List[SeededUser] = []
+    batch: List[Dict[str, Any]] = []
+    for user in user_docs:
+        labels = make_labels(user["_id"], labels_per_user, now)
+        if labels:
+            await db.labels.insert_many(labels, ordered=False)
+        label_ids = [label["_id"] for label in labels]
+        seeded.append(SeededUser(user["_id"], user["email"], label_ids))
+
+        for task in make_tasks(user["_id"], label_ids, tasks_per_user, rng, now):
+            batch.append(task)
+            if len(batch) >= batch_size:
+                await db.tasks.insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        await db.tasks.insert_many(batch, ordered=False)
+    await LabelRepository(db).recount_task_counts()
+    return seeded
+
+async def load_seeded_users(db: AsyncIOMotorDatabase) -> List[SeededUser]:
+    """Find users created by an earlier seed run, with their label ids"""
+    users = await db.users.find(
+        {"email": {"$regex": f"@{EMAIL_DOMAIN}$"}}, {"email": 1}
+    ).to_list(length=None)
+    seeded = []
+    for user in users:
+        labels = await db.labels.find({"user_id": user["_id"]}, {"_id": 1}).to_list(length=None)
+        seeded.append(SeededUser(user["_id"], user["email"], [label["_id"] for label in labels]))
+    return seeded
@@ -0,0 +1,106 @@
+"""Drive the ASGI app in-process over httpx and summarize latency per endpoint"""
+import asyncio
+import itertools
+import math
+import time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+import httpx
+from app.core.auth import create_access_token
+from .dataset import PASSWORD, WORDS, SeededUser
+
+# Endpoint name -> (method, path template). Templates are filled per request.
+ENDPOINTS = {
+    "list_tasks": ("GET", "/tasks/"),
+    "tasks_by_label": ("GET", "/tasks/by-label/{label_id}"),
+    "search_tasks": ("GET", "/tasks/search"),
+    "create_task": ("POST", "/tasks/"),
+    "login": ("POST", "/auth/login"),
+}
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    """Throughput and latency percentiles in milliseconds"""
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(ordered),
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p90_ms": ms(percentile(ordered, 0.90)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+class LoadDriver:
+    """Send requests for one endpoint at a fixed concurrency.
+
+    Requests rotate through the seeded users. Authenticated endpoints use a
+    bearer token minted for each user up front, so only the login endpoint
+    pays for password hashing.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, users: List[SeededUser]):
+        if not users:
+            raise ValueError("No seeded users to drive requests with")
+        self.client = client
+        self.users = users
+        self.headers = {
+            user.id: {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+            for user in users
+        }
+
+    def _request(self, endpoint: str, index: int) -> Awaitable[httpx.Response]:
+        user = self.users[index % len(self.users)]
+        method, path = ENDPOINTS[endpoint]
+        if endpoint == "login":
+            return self.client.post(path, json={"email": user.email, "password": PASSWORD})
+        headers = self.headers[user.id]
+        if endpoint == "create_task":
+            body = {
+                "title": f"Load test task {index}",
+                "description": "Created by the load driver",
+                "priority": "Medium",
+                "deadline": (date.today() + timedelta(days=7)).isoformat(),
+                "label_ids": [str(label_id) for label_id in user.label_ids[:2]],
+            }
+            return self.client.post(path, json=body, headers=headers)
+        if endpoint == "search_tasks":
+            params = {"q": WORDS[index % len(WORDS)]}
+            return self.client.get(path, params=params, headers=headers)
+        label_id = user.label_ids[index % len(user.label_ids)] if user.label_ids else "0" * 24
+        return self.client.request(method, path.format(label_id=label_id), headers=headers)
+
+    async def run(self, endpoint: str, requests: int, concurrency: int) -> Dict[str, Any]:
+        """Send `requests` requests with `concurrency` workers and summarize them"""
+        counter = itertools.count()
+        latencies: List[float] = []
+        statuses: Counter = Counter()
+
+        async def worker():
+            while True:
+                index = next(counter)
+                if index >= requests:
+                    return
+                start = time.perf_counter()
+                response = await self._request(endpoint, index)
+                latencies.append(time.perf_counter() - start)
+                statuses[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+        return summarize(latencies, statuses, time.perf_counter() - start)
+
+def asgi_client(app: Callable) -> httpx.AsyncClient:
+    """httpx client calling the ASGI app directly, without a socket"""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
@@ -0,0 +1,40 @@
+"""Per-request auth CPU for verify_token, uncached vs cached.
+
+Run from the backend folder:
+
+    python -m tests.benchmarks.bench_auth
+"""
+import sys
+import os
+import timeit
+
+# Add the backend folder to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from bson import ObjectId
+from jose import jwt
+from app.core.auth import create_access_token, verify_token, token_cache
+from app.core.settings import get_settings
+
+settings = get_settings()
+
+def decode_uncached(token: str) -> dict:
+    """The pre-cache verify_token path: a full jose decode every call"""
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+def run(number: int = 20000, repeat: int = 5) -> dict:
+    token = create_access_token(data={"sub": str(ObjectId())})
+    token_cache.clear()
+    verify_token(token)
+
+    results = {}
+    for name, fn in (("uncached", decode_uncached), ("cached", verify_token)):
+        best = min(timeit.repeat(lambda: fn(token), number=number, repeat=repeat))
+        results[name] = best / number * 1e6
+    return results
+
+if __name__ == "__main__":
+    results = run()
+    for name, usec in results.items():
+        print(f"verify_token {name:>8}: {usec:8.2f} us/request")
+    print(f"speedup: {results['uncached'] / results['cached']:.1f}x")
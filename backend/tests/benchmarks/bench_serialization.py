@@ -0,0 +1,48 @@
+"""Per-item cost of serializing task lists.
+
+Compares the old read path (Task(**doc) in the repository, then FastAPI
+validating and serializing List[Task] again) with DocumentSerializer.
+
+Run from the backend folder:
+
+    python -m tests.benchmarks.bench_serialization
+"""
+import sys
+import os
+import timeit
+from typing import List
+
+# Add the backend folder to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.core.serialization import DocumentSerializer
+from app.models.task import Task
+from tests.test_tasks import make_task_doc
+
+task_list = TypeAdapter(List[Task])
+task_serializer = DocumentSerializer(Task)
+
+def model_path(docs) -> bytes:
+    """Repository validation followed by response_model validation and dump"""
+    tasks = [Task(**doc) for doc in docs]
+    validated = task_list.validate_python(jsonable_encoder(tasks, by_alias=True))
+    return task_list.dump_json(validated, by_alias=True)
+
+def fast_path(docs) -> bytes:
+    return task_serializer.dump_many(docs)
+
+def run(items: int = 200, number: int = 50, repeat: int = 5) -> dict:
+    docs = [make_task_doc(i % 21) for i in range(items)]
+    results = {}
+    for name, fn in (("model", model_path), ("fast", fast_path)):
+        best = min(timeit.repeat(lambda: fn(docs), number=number, repeat=repeat))
+        results[name] = best / number / items * 1e6
+    return results
+
+if __name__ == "__main__":
+    results = run()
+    for name, usec in results.items():
+        print(f"List[Task] {name:>5} path: {usec:8.2f} us/item")
+    print(f"speedup: {results['model'] / results['fast']:.1f}x")
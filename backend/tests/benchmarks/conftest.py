@@ -0,0 +1,42 @@
+import sys
+import os
+import pytest
+
+# Add the backend folder to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from tests.benchmarks import harness
+
+_results = {}
+
+@pytest.fixture
+def benchmark_check():
+    """Measure a callable and compare it against the stored baseline"""
+    if not harness.ENABLED:
+        pytest.skip("set BENCHMARK=1 to run benchmarks")
+    baseline = harness.load_baseline()
+
+    def check(name, fn, number=1000, repeat=5):
+        relative = harness.relative_time(fn, number, repeat)
+        expected = baseline.get(name)
+        if harness.UPDATE_BASELINE or expected is None:
+            _results[name] = round(relative, 4)
+            return relative
+        limit = expected * (1 + harness.THRESHOLD)
+        for _ in range(harness.ATTEMPTS - 1):
+            if relative <= limit:
+                break
+            relative = min(relative, harness.relative_time(fn, number, repeat))
+        assert relative <= limit, (
+            f"{name} regressed: {relative:.3f} vs baseline {expected:.3f} "
+            f"(limit {limit:.3f}, BENCHMARK_THRESHOLD={harness.THRESHOLD})"
+        )
+        return relative
+
+    return check
+
+def pytest_sessionfinish(session, exitstatus):
+    if harness.UPDATE_BASELINE and _results:
+        merged = harness.load_baseline()
+        merged.update(_results)
+        harness.save_baseline(merged)
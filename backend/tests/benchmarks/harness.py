@@ -0,0 +1,47 @@
+"""Timing, calibration and baseline handling for the hot-path benchmarks.
+
+Results are stored relative to a fixed pure-Python calibration loop, so a
+baseline recorded on one machine stays meaningful on a faster or slower one.
+"""
+import json
+import os
+import timeit
+from typing import Callable, Dict
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Allowed slowdown over the baseline before a benchmark fails (0.5 = 50%)
+THRESHOLD = float(os.environ.get("BENCHMARK_THRESHOLD", "0.5"))
+# Attempts before a slowdown is reported, to ride out noisy neighbours
+ATTEMPTS = 3
+UPDATE_BASELINE = os.environ.get("BENCHMARK_UPDATE") == "1"
+ENABLED = os.environ.get("BENCHMARK") == "1" or UPDATE_BASELINE
+
+def measure(fn: Callable[[], object], number: int = 1000, repeat: int = 5) -> float:
+    """Best-of-repeat seconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+def _calibration_loop():
+    total = 0
+    for i in range(1000):
+        total += i * i
+    return total
+
+def calibration() -> float:
+    """Seconds per call of a fixed pure-Python workload on this machine"""
+    return measure(_calibration_loop, number=500, repeat=5)
+
+def relative_time(fn: Callable[[], object], number: int = 1000, repeat: int = 5) -> float:
+    """Seconds per call of fn in calibration units, calibrated right alongside it"""
+    return measure(fn, number, repeat) / calibration()
+
+def load_baseline() -> Dict[str, float]:
+    if not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH) as f:
+        return json.load(f)
+
+def save_baseline(results: Dict[str, float]):
+    with open(BASELINE_PATH, "w") as f:
+        json.dump(dict(sorted(results.items())), f, indent=2)
+        f.write("\n")
@@ -0,0 +1,81 @@
+"""Hot-path microbenchmarks for auth, validation and serialization.
+
+Skipped by default. From the backend folder:
+
+    BENCHMARK=1 python -m pytest tests/benchmarks        # compare with baseline.json
+    BENCHMARK_UPDATE=1 python -m pytest tests/benchmarks # record a new baseline
+
+BENCHMARK_THRESHOLD sets the allowed slowdown (default 0.5, i.e. 50%).
+Everything runs offline; nothing here talks to Mongo.
+"""
+from typing import List
+import pytest
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.core.auth import create_access_token, verify_token, token_cache
+from app.core.serialization import DocumentSerializer
+from app.models.task import Task
+from app.models.user import PyObjectId
+from tests.test_tasks import make_task_doc
+
+LABEL_COUNTS = [0, 5, 20]
+
+task_list = TypeAdapter(List[Task])
+task_serializer = DocumentSerializer(Task)
+
+class TestAuthBenchmarks:
+    """Benchmark token creation and verification"""
+
+    def test_create_access_token(self, benchmark_check):
+        subject = str(ObjectId())
+        benchmark_check("create_access_token", lambda: create_access_token(data={"sub": subject}))
+
+    def test_verify_token_uncached(self, benchmark_check):
+        token = create_access_token(data={"sub": str(ObjectId())})
+
+        def verify():
+            token_cache.clear()
+            verify_token(token)
+
+        benchmark_check("verify_token_uncached", verify)
+
+    def test_verify_token_cached(self, benchmark_check):
+        token = create_access_token(data={"sub": str(ObjectId())})
+        verify_token(token)
+        benchmark_check("verify_token_cached", lambda: verify_token(token), number=20000)
+
+class TestValidationBenchmarks:
+    """Benchmark ObjectId and task model validation"""
+
+    def test_pyobjectid_validate(self, benchmark_check):
+        value = str(ObjectId())
+        benchmark_check("pyobjectid_validate", lambda: PyObjectId.validate(value), number=20000)
+
+    @pytest.mark.parametrize("label_count", LABEL_COUNTS)
+    def test_task_construction(self, benchmark_check, label_count):
+        doc = make_task_doc(label_count)
+        benchmark_check(f"task_construction_{label_count}_labels", lambda: Task(**doc))
+
+class TestSerializationBenchmarks:
+    """Benchmark List[Task] response serialization for 100 tasks"""
+
+    @pytest.mark.parametrize("label_count", LABEL_COUNTS)
+    def test_response_model_path(self, benchmark_check, label_count):
+        docs = [make_task_doc(label_count) for _ in range(100)]
+
+        def serialize():
+            tasks = [Task(**doc) for doc in docs]
+            validated = task_list.validate_python(jsonable_encoder(tasks, by_alias=True))
+            return task_list.dump_json(validated, by_alias=True)
+
+        benchmark_check(f"task_list_response_model_{label_count}_labels", serialize, number=20)
+
+    @pytest.mark.parametrize("label_count", LABEL_COUNTS)
+    def test_document_serializer_path(self, benchmark_check, label_count):
+        docs = [make_task_doc(label_count) for _ in range(100)]
+        benchmark_check(
+            f"task_list_document_serializer_{label_count}_labels",
+            lambda: task_serializer.dump_many(docs),
+            number=100,
+        )
@@ -0,0 +1,27 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from bson import ObjectId
+
+async def assign_id(doc):
+    # Motor sets _id on the inserted document in place
+    doc["_id"] = ObjectId()
+
+async def no_documents(*args, **kwargs):
+    return
+    yield
+
+@pytest.fixture
+def mock_db():
+    """A database whose collections are AsyncMocks.
+
+    insert_one assigns an _id as Motor does, and find and aggregate return
+    empty cursors; tests replace them to serve documents.
+    """
+    db = MagicMock()
+    for name in ("users", "labels", "tasks", "tasks_archive", "user_versions"):
+        collection = AsyncMock()
+        collection.insert_one.side_effect = assign_id
+        collection.find = MagicMock(side_effect=no_documents)
+        collection.aggregate = MagicMock(side_effect=no_documents)
+        setattr(db, name, collection)
+    return db
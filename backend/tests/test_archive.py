@@ -0,0 +1,205 @@
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.db.archive import archive_tasks
+from app.db.pagination import merge_keyset_streams
+from app.db.repositories.lease_repository import LeaseRepository
+from app.db.repositories.task_repository import TaskRepository
+from tests.test_repositories import FakeCursor, count_changes
+from tests.test_tasks import USER, make_task_doc
+
+class ChainCursor(FakeCursor):
+    """A find() result whose sort, limit and batch_size calls return itself"""
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    async def to_list(self, length=None):
+        return self.docs[:length]
+
+def doc_at(minute, **overrides):
+    return make_task_doc(created_at=datetime(2024, 1, 1, 12, minute), **overrides)
+
+def collect(stream):
+    async def run():
+        return [doc async for doc in stream]
+    return asyncio.run(run())
+
+class TestMergeKeysetStreams:
+    """Test merging keyset-ordered streams"""
+
+    def test_merges_in_order_up_to_limit(self):
+        """Test documents from both streams interleave by (created_at, _id)"""
+        hot = [doc_at(9), doc_at(5), doc_at(1)]
+        archived = [doc_at(7), doc_at(3)]
+
+        merged = collect(merge_keyset_streams([FakeCursor(hot), FakeCursor(archived)], "desc", limit=4))
+
+        assert [doc["created_at"].minute for doc in merged] == [9, 7, 5, 3]
+
+    def test_ascending(self):
+        """Test ascending order picks the smallest key first"""
+        merged = collect(merge_keyset_streams([FakeCursor([doc_at(2)]), FakeCursor([doc_at(1), doc_at(4)])], "asc"))
+
+        assert [doc["created_at"].minute for doc in merged] == [1, 2, 4]
+
+class TestIncludeArchived:
+    """Test reads that include the archive"""
+
+    def test_page_merges_both_collections(self, mock_db):
+        """Test a page with include_archived draws from tasks and the archive"""
+        db = mock_db
+        db.tasks.find = MagicMock(return_value=ChainCursor([doc_at(9), doc_at(5)]))
+        db.tasks_archive.find = MagicMock(return_value=ChainCursor([doc_at(7), doc_at(3)]))
+
+        docs, next_cursor = asyncio.run(
+            TaskRepository(db).get_task_documents_by_user(USER.id, limit=2, include_archived=True)
+        )
+
+        assert [doc["created_at"].minute for doc in docs] == [9, 7]
+        assert next_cursor is not None
+
+    def test_archive_read_only_when_asked(self, mock_db):
+        """Test a task lookup falls back to the archive only with include_archived"""
+        db = mock_db
+        archived = make_task_doc(status="done")
+        db.tasks.find_one.return_value = None
+        db.tasks_archive.find_one.return_value = archived
+        repo = TaskRepository(db)
+
+        assert asyncio.run(repo.get_task_document(archived["_id"], USER.id)) is None
+        db.tasks_archive.find_one.assert_not_awaited()
+        assert asyncio.run(repo.get_task_document(archived["_id"], USER.id, include_archived=True)) is archived
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_list_route_passes_flag(self, mock_task_repo):
+        """Test GET /tasks forwards include_archived to the repository"""
+        from app.core.dependencies import get_current_user
+        mock_task_repo.return_value.get_task_documents_by_user = AsyncMock(return_value=([], None))
+        app.dependency_overrides[get_current_user] = lambda: USER
+        try:
+            with patch('app.api.tasks.VersionRepository') as versions:
+                versions.return_value.get_version = AsyncMock(return_value=1)
+                response = TestClient(app).get("/tasks/?include_archived=true")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 200
+        assert mock_task_repo.return_value.get_task_documents_by_user.call_args.kwargs["include_archived"] is True
+
+def deleted_only(*task_ids):
+    """find_one_and_delete side effect removing only the given tasks"""
+    async def find_one_and_delete(query, projection=None):
+        return {"_id": query["_id"]} if query["_id"] in task_ids else None
+    return find_one_and_delete
+
+class TestArchiveDoneTasks:
+    """Test moving done tasks to the archive"""
+
+    def test_moves_batch_and_updates_bookkeeping(self, mock_db):
+        """Test tasks are copied, deleted, uncounted from labels and announced"""
+        db = mock_db
+        label_id = ObjectId()
+        docs = [make_task_doc(status="done", label_ids=[label_id]) for _ in range(2)]
+        db.tasks.find = MagicMock(return_value=ChainCursor(docs))
+        db.tasks.find_one_and_delete.side_effect = deleted_only(*[doc["_id"] for doc in docs])
+        cutoff = datetime(2024, 6, 1)
+
+        with patch("app.db.repositories.task_repository.publish_change") as publish:
+            moved = asyncio.run(TaskRepository(db).archive_done_tasks(cutoff, batch_size=10))
+
+        assert moved == 2
+        replaces = db.tasks_archive.bulk_write.await_args.args[0]
+        assert [op._filter for op in replaces] == [{"_id": doc["_id"]} for doc in docs]
+        query = db.tasks.find_one_and_delete.await_args.args[0]
+        assert query["status"] == "done" and query["updated_at"] == {"$lt": cutoff}
+        assert count_changes(db) == {label_id: -2}
+        db.user_versions.update_one.assert_awaited_once()
+        publish.assert_called_once_with(USER.id, "task", "archived", [doc["_id"] for doc in docs])
+        db.tasks_archive.delete_many.assert_not_awaited()
+
+    def test_task_changed_meanwhile_loses_archive_copy(self, mock_db):
+        """Test a task edited or deleted by its user before the delete is not archived or counted"""
+        db = mock_db
+        label_id = ObjectId()
+        changed, moved = make_task_doc(status="done", label_ids=[label_id]), make_task_doc(status="done")
+        db.tasks.find = MagicMock(return_value=ChainCursor([changed, moved]))
+        db.tasks.find_one_and_delete.side_effect = deleted_only(moved["_id"])
+
+        with patch("app.db.repositories.task_repository.publish_change") as publish:
+            count = asyncio.run(TaskRepository(db).archive_done_tasks(datetime(2024, 6, 1), batch_size=10))
+
+        assert count == 1
+        db.tasks_archive.delete_many.assert_awaited_once_with({"_id": {"$in": [changed["_id"]]}})
+        assert count_changes(db) == {}
+        publish.assert_called_once_with(USER.id, "task", "archived", [moved["_id"]])
+
+    def test_batch_removed_by_another_run_changes_nothing(self, mock_db):
+        """Test a batch whose deletes all miss sends no count changes, version bumps or events"""
+        db = mock_db
+        docs = [make_task_doc(status="done", label_ids=[ObjectId()])]
+        db.tasks.find = MagicMock(return_value=ChainCursor(docs))
+        db.tasks.find_one_and_delete.side_effect = deleted_only()
+
+        with patch("app.db.repositories.task_repository.publish_change") as publish:
+            count = asyncio.run(TaskRepository(db).archive_done_tasks(datetime(2024, 6, 1), batch_size=10))
+
+        assert count == 0
+        db.labels.bulk_write.assert_not_awaited()
+        db.user_versions.update_one.assert_not_awaited()
+        publish.assert_not_called()
+
+class TestArchiveTasks:
+    """Test archival runs"""
+
+    def test_runs_batches_until_done(self):
+        """Test archival repeats batches under the lease until one moves nothing"""
+        with patch("app.db.archive.TaskRepository") as mock_task_repo, \
+                patch("app.db.archive.LeaseRepository") as mock_leases:
+            mock_leases.return_value.acquire = AsyncMock(return_value=True)
+            mock_leases.return_value.release = AsyncMock()
+            mock_task_repo.return_value.archive_done_tasks = AsyncMock(side_effect=[3, 2, 0])
+            moved = asyncio.run(archive_tasks(MagicMock(), older_than_days=30, batch_size=3))
+
+        assert moved == 5
+        cutoff = mock_task_repo.return_value.archive_done_tasks.await_args.args[0]
+        assert datetime.utcnow() - cutoff > timedelta(days=29)
+        mock_leases.return_value.release.assert_awaited_once()
+
+    def test_overlapping_run_is_skipped(self):
+        """Test a run that cannot take the lease moves nothing"""
+        with patch("app.db.archive.TaskRepository") as mock_task_repo, \
+                patch("app.db.archive.LeaseRepository") as mock_leases:
+            mock_leases.return_value.acquire = AsyncMock(return_value=False)
+            mock_task_repo.return_value.archive_done_tasks = AsyncMock(return_value=3)
+            moved = asyncio.run(archive_tasks(MagicMock()))
+
+        assert moved == 0
+        mock_task_repo.return_value.archive_done_tasks.assert_not_awaited()
+
+    def test_lease_taken_only_once(self):
+        """Test the lease document refuses a second owner until it expires"""
+        db = MagicMock()
+        db.leases = AsyncMock()
+        db.leases.update_one.side_effect = [None, DuplicateKeyError("E11000 duplicate key")]
+        leases = LeaseRepository(db)
+
+        assert asyncio.run(leases.acquire("tasks_archive", "a", 60)) is True
+        assert asyncio.run(leases.acquire("tasks_archive", "b", 60)) is False
+        query = db.leases.update_one.await_args.args[0]
+        assert query["_id"] == "tasks_archive"
+        assert {"owner": "b"} in query["$or"]
@@ -1,4 +1,7 @@
+import asyncio
+import threading
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, patch
 from bson import ObjectId
@@ -9,7 +12,14 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from app.main import app
-from app.core.auth import verify_password, get_password_hash, create_access_token
+from app.core import auth as core_auth
+from app.core.auth import (
+    verify_password,
+    get_password_hash,
+    create_access_token,
+    verify_password_async,
+    get_password_hash_async,
+)
 from app.models.user import UserCreate, UserLogin
 
 client = TestClient(app)
@@ -107,6 +117,52 @@ class TestAuth:
         assert response.status_code == 200
         assert response.json()["message"] == "Successfully logged out"
 
+class TestPasswordHashPool:
+    """Test bcrypt runs on the hashing pool with admission control"""
+
+    def test_async_hash_and_verify(self):
+        """Test the async variants agree with the sync ones"""
+        async def run():
+            hashed = await get_password_hash_async("testpassword123")
+            return (
+                await verify_password_async("testpassword123", hashed),
+                await verify_password_async("wrongpassword", hashed),
+            )
+
+        assert asyncio.run(run()) == (True, False)
+
+    def test_rejects_when_saturated(self):
+        """Test a 503 with Retry-After once too many hashes are pending"""
+        with patch.object(core_auth.settings, "PASSWORD_HASH_MAX_PENDING", 0):
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(get_password_hash_async("testpassword123"))
+
+        assert exc_info.value.status_code == 503
+        assert "Retry-After" in exc_info.value.headers
+
+    def test_cancelled_wait_keeps_slot_until_hash_finishes(self):
+        """Test a cancelled caller's hash still counts as pending while it runs"""
+        started, release = threading.Event(), threading.Event()
+
+        def slow_hash():
+            started.set()
+            release.wait(5)
+
+        async def run():
+            waiter = asyncio.ensure_future(core_auth._run_hash(slow_hash))
+            await asyncio.to_thread(started.wait, 5)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            while_running = core_auth._pending_hashes
+            release.set()
+            for _ in range(500):
+                if core_auth._pending_hashes == 0:
+                    break
+                await asyncio.sleep(0.01)
+            return while_running, core_auth._pending_hashes
+
+        assert asyncio.run(run()) == (1, 0)
+
 class TestHealthEndpoint:
     """Test health check endpoint"""
     
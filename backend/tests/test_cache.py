@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core import cache
+from app.core.auth import create_access_token, verify_token, token_cache
+from app.core.cache import TTLCache, user_cache
+from app.core.dependencies import get_current_user
+from app.models.user import UserInDB
+
+class TestTTLCache:
+    """Test the in-process TTL cache"""
+
+    def test_hit_and_miss_counters(self):
+        """Test hits and misses are counted"""
+        ttl_cache = TTLCache(maxsize=10, ttl=60)
+        ttl_cache.set("a", 1)
+
+        assert ttl_cache.get("a") == 1
+        assert ttl_cache.get("b") is None
+        assert ttl_cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        ttl_cache = TTLCache(maxsize=2, ttl=60)
+        ttl_cache.set("a", 1)
+        ttl_cache.set("b", 2)
+        ttl_cache.get("a")
+        ttl_cache.set("c", 3)
+
+        assert ttl_cache.get("b") is None
+        assert ttl_cache.get("a") == 1
+        assert ttl_cache.get("c") == 3
+
+    def test_expiry(self):
+        """Test expired entries are never returned"""
+        ttl_cache = TTLCache(maxsize=10, ttl=60)
+        with patch.object(cache.time, "monotonic", return_value=100.0):
+            ttl_cache.set("a", 1)
+        with patch.object(cache.time, "monotonic", return_value=161.0):
+            assert ttl_cache.get("a") is None
+        assert len(ttl_cache) == 0
+
+class TestUserCache:
+    """Test get_current_user is served from the user cache"""
+
+    @patch('app.core.dependencies.UserRepository')
+    def test_second_request_skips_database(self, mock_user_repo):
+        """Test only the first lookup for a user reaches Mongo"""
+        user = UserInDB(_id=ObjectId(), email="user@example.com", password_hash="x")
+        mock_repo_instance = AsyncMock()
+        mock_user_repo.return_value = mock_repo_instance
+        mock_repo_instance.get_user_by_id.return_value = user
+        token = create_access_token(data={"sub": str(user.id)})
+        user_cache.clear()
+
+        first = asyncio.run(get_current_user(MagicMock(), None, token))
+        second = asyncio.run(get_current_user(MagicMock(), None, token))
+
+        assert first.id == second.id == user.id
+        assert mock_repo_instance.get_user_by_id.await_count == 1
+
+        user_cache.invalidate(str(user.id))
+        asyncio.run(get_current_user(MagicMock(), None, token))
+        assert mock_repo_instance.get_user_by_id.await_count == 2
+
+class TestTokenCache:
+    """Test decoded JWT payloads are cached until their exp claim"""
+
+    def test_cached_payload_matches_decode(self):
+        """Test a cache hit returns the same claims as a fresh decode"""
+        token_cache.clear()
+        token = create_access_token(data={"sub": "abc"})
+
+        first = verify_token(token)
+        second = verify_token(token)
+
+        assert first == second
+        assert first["sub"] == "abc"
+        assert len(token_cache) == 1
+
+    def test_entry_expires_with_token(self):
+        """Test cache entries never outlive the token exp claim"""
+        token_cache.clear()
+        token = create_access_token(data={"sub": "abc"}, expires_delta=timedelta(seconds=60))
+        verify_token(token)
+
+        with patch.object(cache.time, "monotonic", return_value=cache.time.monotonic() + 61):
+            assert token_cache.get(next(iter(token_cache._data))) is None
+
+    def test_expired_token_not_cached(self):
+        """Test expired tokens are rejected and never cached"""
+        token_cache.clear()
+        token = create_access_token(data={"sub": "abc"}, expires_delta=timedelta(seconds=-1))
+
+        with pytest.raises(HTTPException):
+            verify_token(token)
+        assert len(token_cache) == 0
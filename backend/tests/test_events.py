@@ -0,0 +1,209 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core.dependencies import get_current_user
+from app.core.events import RESYNC, Event, EventBus, TooManySubscriptions, event_stream
+from app.db.change_events import change_to_event, watch_changes
+from app.db.repositories.label_repository import LabelRepository
+from app.models.label import LabelCreate
+from app.models.user import UserInDB
+
+client = TestClient(app)
+
+USER = UserInDB(_id=ObjectId(), email="user@example.com", password_hash="x")
+
+def parse(message: bytes):
+    fields = dict(line.split(": ", 1) for line in message.decode().strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+class TestEventBus:
+    """Test in-process event delivery"""
+
+    def test_publish_reaches_only_that_users_subscribers(self):
+        """Test events are routed by user id"""
+        async def run():
+            bus = EventBus(queue_size=10, max_per_user=5)
+            mine, other = bus.subscribe("a"), bus.subscribe("b")
+            bus.publish("a", Event("task", "created", [1]))
+            return await mine.get(), other.queue.empty()
+
+        event, other_empty = asyncio.run(run())
+
+        assert parse(event.encode()) == ("task.created", {"type": "task", "action": "created", "ids": ["1"]})
+        assert other_empty
+
+    def test_overflow_becomes_resync(self):
+        """Test a subscriber that falls behind gets one resync instead of a backlog"""
+        async def run():
+            bus = EventBus(queue_size=2, max_per_user=5)
+            subscription = bus.subscribe("a")
+            for i in range(5):
+                bus.publish("a", Event("task", "updated", [i]))
+            first = await subscription.get()
+            bus.publish("a", Event("task", "deleted", [9]))
+            return first, await subscription.get()
+
+        first, second = asyncio.run(run())
+
+        assert first.name == RESYNC
+        assert second.name == "task.deleted"
+
+    def test_connections_per_user_are_capped(self):
+        """Test subscribing past the limit is refused until one unsubscribes"""
+        async def run():
+            bus = EventBus(queue_size=10, max_per_user=1)
+            subscription = bus.subscribe("a")
+            with pytest.raises(TooManySubscriptions):
+                bus.subscribe("a")
+            bus.unsubscribe(subscription)
+            bus.subscribe("a")
+            return bus.connection_count()
+
+        assert asyncio.run(run()) == 1
+
+    def test_stream_starts_with_resync_and_ends_on_close(self):
+        """Test the stream greets with a resync, forwards events and stops when closed"""
+        async def run():
+            bus = EventBus(queue_size=10, max_per_user=5)
+            subscription = bus.subscribe("a")
+            bus.publish("a", Event("label", "created", ["x"]))
+            subscription.close()
+            with patch("app.core.events.event_bus", bus):
+                messages = [m async for m in event_stream(subscription, heartbeat=1)]
+            return messages, bus.connection_count()
+
+        messages, remaining = asyncio.run(run())
+
+        assert messages[0].startswith(b"retry: ")
+        assert b"event: resync" in messages[0]
+        assert len(messages) == 2 and b"event: label.created" in messages[1]
+        assert remaining == 0
+
+    def test_idle_stream_sends_heartbeat(self):
+        """Test an idle stream yields comment lines to keep the connection open"""
+        async def run():
+            bus = EventBus(queue_size=10, max_per_user=5)
+            stream = event_stream(bus.subscribe("a"), heartbeat=0.01)
+            await stream.__anext__()
+            heartbeat = await stream.__anext__()
+            await stream.aclose()
+            return heartbeat
+
+        assert asyncio.run(run()) == b": keepalive\n\n"
+
+class TestChangeStreamEvents:
+    """Test mapping change stream documents to events"""
+
+    def test_insert_is_routed_by_document_owner(self):
+        """Test inserts use the full document's user id"""
+        user_id, task_id = ObjectId(), ObjectId()
+        routed = change_to_event({
+            "operationType": "insert",
+            "ns": {"db": "todo", "coll": "tasks"},
+            "documentKey": {"_id": task_id},
+            "fullDocument": {"_id": task_id, "user_id": user_id},
+        })
+
+        assert routed[0] == user_id
+        assert (routed[1].name, routed[1].ids) == ("task.created", [str(task_id)])
+
+    def test_delete_needs_pre_image(self):
+        """Test deletes without a pre-image cannot be routed"""
+        change = {
+            "operationType": "delete",
+            "ns": {"db": "todo", "coll": "labels"},
+            "documentKey": {"_id": ObjectId()},
+        }
+        assert change_to_event(change) is None
+
+        user_id = ObjectId()
+        change["fullDocumentBeforeChange"] = {"user_id": user_id}
+        assert change_to_event(change)[1].name == "label.deleted"
+
+    def test_other_collections_are_ignored(self):
+        """Test changes outside tasks and labels are dropped"""
+        assert change_to_event({
+            "operationType": "update",
+            "ns": {"db": "todo", "coll": "user_versions"},
+            "documentKey": {"_id": ObjectId()},
+            "fullDocument": {"user_id": ObjectId()},
+        }) is None
+
+    def test_bookkeeping_updates_are_dropped(self):
+        """Test task_count and label $pull updates send no event, as in local mode"""
+        def update(coll, fields):
+            return change_to_event({
+                "operationType": "update",
+                "ns": {"db": "todo", "coll": coll},
+                "documentKey": {"_id": ObjectId()},
+                "fullDocument": {"user_id": ObjectId()},
+                "updateDescription": {"updatedFields": fields, "removedFields": []},
+            })
+
+        assert update("labels", {"task_count": 3}) is None
+        assert update("tasks", {"label_ids": []}) is None
+        assert update("tasks", {"label_ids.1": ObjectId()}) is None
+        assert update("labels", {"name": "work", "task_count": 3})[1].name == "label.updated"
+        assert update("tasks", {"label_ids": [], "updated_at": 1})[1].name == "task.updated"
+
+    def test_unsupported_server_falls_back_to_local(self):
+        """Test a server without pre-images stops the watcher and re-enables local publishing"""
+        db = MagicMock()
+        db.client.server_info = AsyncMock(return_value={"version": "5.0.9", "versionArray": [5, 0, 9, 0]})
+        bus = EventBus(queue_size=10, max_per_user=5, source="change_stream")
+
+        asyncio.run(asyncio.wait_for(watch_changes(db, bus, retry_seconds=0), 1))
+
+        assert bus.source == "local"
+        db.watch.assert_not_called()
+
+    def test_standalone_server_falls_back_to_local(self):
+        """Test a server that is not in a replica set falls back too"""
+        db = MagicMock()
+        db.client.server_info = AsyncMock(return_value={"version": "7.0.2", "versionArray": [7, 0, 2, 0]})
+        db.command = AsyncMock(return_value={"isWritablePrimary": True})
+        bus = EventBus(queue_size=10, max_per_user=5, source="change_stream")
+
+        asyncio.run(asyncio.wait_for(watch_changes(db, bus, retry_seconds=0), 1))
+
+        assert bus.source == "local"
+
+class TestRepositoryEvents:
+    """Test repository writes publish events"""
+
+    def test_label_create_publishes(self, mock_db):
+        """Test creating a label publishes label.created to its owner"""
+        user_id = ObjectId()
+        with patch("app.db.repositories.label_repository.publish_change") as publish:
+            label = asyncio.run(LabelRepository(mock_db).create_label(LabelCreate(name="Work"), user_id))
+
+        publish.assert_called_once_with(user_id, "label", "created", [label.id])
+
+class TestEventsEndpoint:
+    """Test GET /events"""
+
+    def test_requires_authentication(self):
+        """Test the stream is refused without a token"""
+        response = client.get("/events")
+        assert response.status_code == 401
+
+    def test_too_many_streams(self):
+        """Test a user past the connection limit gets 429"""
+        app.dependency_overrides[get_current_user] = lambda: USER
+        try:
+            with patch("app.api.events.event_bus", EventBus(queue_size=1, max_per_user=0)):
+                response = client.get("/events")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 429
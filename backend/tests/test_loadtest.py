@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from collections import Counter
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+from fastapi import FastAPI, Request
+from loadtest.dataset import EMAIL_DOMAIN, SeededUser, seed_database
+from loadtest.driver import LoadDriver, asgi_client, percentile, summarize
+from app.models.task import Task
+
+class TestSeedDatabase:
+    """Test the synthetic dataset seeder"""
+
+    def test_tasks_inserted_in_batches(self, mock_db):
+        """Test tasks go in with unordered insert_many batches of batch_size"""
+        db = mock_db
+
+        users = asyncio.run(seed_database(db, users=3, labels_per_user=4, tasks_per_user=5, batch_size=4))
+
+        assert len(users) == 3
+        assert all(len(user.label_ids) == 4 for user in users)
+        assert all(user.email.endswith(EMAIL_DOMAIN) for user in users)
+        batches = [call.args[0] for call in db.tasks.insert_many.call_args_list]
+        assert [len(batch) for batch in batches] == [4, 4, 4, 3]
+        assert all(call.kwargs["ordered"] is False for call in db.tasks.insert_many.call_args_list)
+        db.users.insert_many.assert_awaited_once()
+
+    def test_generated_tasks_match_the_model(self, mock_db):
+        """Test generated documents validate as tasks and use the user's labels"""
+        db = mock_db
+
+        users = asyncio.run(seed_database(db, users=1, labels_per_user=3, tasks_per_user=50))
+
+        docs = db.tasks.insert_many.call_args.args[0]
+        assert len(docs) == 50
+        for doc in docs:
+            Task(_id="0" * 24, **doc)
+            assert set(doc["label_ids"]) <= set(users[0].label_ids)
+        created = [doc["created_at"] for doc in docs]
+        assert created == sorted(created)
+
+class TestLoadDriver:
+    """Test latency summaries and the in-process driver"""
+
+    def test_percentile_nearest_rank(self):
+        """Test percentiles use the nearest-rank method"""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.5) == 50.0
+        assert percentile(values, 0.99) == 99.0
+        assert percentile([], 0.5) == 0.0
+
+    def test_summarize_counts_errors(self):
+        """Test 4xx and 5xx statuses count as errors"""
+        summary = summarize([0.001, 0.002, 0.003, 0.004], Counter({200: 3, 503: 1}), elapsed=2.0)
+        assert summary["requests"] == 4
+        assert summary["errors"] == 1
+        assert summary["statuses"] == {"200": 3, "503": 1}
+        assert summary["throughput_rps"] == 2.0
+        assert summary["p50_ms"] == 2.0
+        assert summary["max_ms"] == 4.0
+
+    def test_runs_requests_against_asgi_app(self):
+        """Test the driver sends every request with the user's bearer token"""
+        app = FastAPI()
+        seen = []
+
+        @app.get("/tasks/")
+        async def list_tasks(request: Request):
+            seen.append(request.headers.get("authorization"))
+            return []
+
+        users = [SeededUser(ObjectId(), f"user{i}@{EMAIL_DOMAIN}", []) for i in range(2)]
+
+        async def run():
+            async with asgi_client(app) as client:
+                return await LoadDriver(client, users).run("list_tasks", requests=10, concurrency=3)
+
+        summary = asyncio.run(run())
+        assert summary["requests"] == 10
+        assert summary["errors"] == 0
+        assert len(seen) == 10
+        assert len(set(seen)) == 2
+        assert all(header.startswith("Bearer ") for header in seen)
+
+    def test_requires_users(self):
+        """Test the driver refuses to run without seeded users"""
+        with pytest.raises(ValueError):
+            LoadDriver(MagicMock(), [])
@@ -0,0 +1,79 @@
+import json
+import logging
+from unittest.mock import patch
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core import logging as app_logging
+from app.core.logging import JsonFormatter, RequestLoggingMiddleware, TracebackRateLimiter, log_error
+
+def make_client(sample_rate):
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware, sample_rate=sample_rate)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str, request: Request):
+        request.state.user_id = "user-1"
+        if item_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    return TestClient(app)
+
+class TestRequestLoggingMiddleware:
+    """Test structured request logging"""
+
+    @patch('app.core.logging.log_request')
+    def test_logs_route_template_and_user(self, mock_log_request):
+        """Test the record carries the route template, status and user id"""
+        make_client(1.0).get("/items/42")
+
+        args, kwargs = mock_log_request.call_args
+        assert args[:3] == ("GET", "/items/{item_id}", 200)
+        assert args[3] >= 0
+        assert kwargs["user_id"] == "user-1"
+
+    @patch('app.core.logging.log_request')
+    def test_sampling_keeps_errors(self, mock_log_request):
+        """Test successes are sampled out while errors are always logged"""
+        client = make_client(0.0)
+        client.get("/items/42")
+        assert mock_log_request.call_count == 0
+
+        client.get("/items/missing")
+        assert mock_log_request.call_args.args[2] == 404
+
+class TestLoggingHelpers:
+    """Test JSON formatting and traceback rate limiting"""
+
+    def test_json_formatter_includes_fields(self):
+        """Test structured fields are merged into the JSON record"""
+        record = logging.LogRecord("app.access", logging.INFO, __file__, 1, "request", None, None)
+        record.fields = {"route": "/tasks/", "status": 200}
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["message"] == "request"
+        assert entry["route"] == "/tasks/"
+        assert entry["status"] == 200
+
+    def test_traceback_rate_limit(self):
+        """Test tracebacks beyond the limit are suppressed"""
+        limiter = TracebackRateLimiter(limit=2, window=60)
+
+        assert [limiter.allow() for _ in range(4)] == [True, True, False, False]
+        assert limiter.suppressed == 2
+
+    def test_log_error_defers_formatting(self):
+        """Test log_error passes its parts as arguments, formatted only when emitted"""
+        with patch.object(app_logging.logger, "error") as mock_error:
+            log_error(ValueError("bad"), "GET /tasks", with_traceback=False)
+
+        args = mock_error.call_args.args
+        assert args[0] == "Error in %s: %s"
+        assert args[0] % args[1:] == "Error in GET /tasks: bad"
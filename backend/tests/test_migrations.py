@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from pymongo.errors import DuplicateKeyError
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.migrations import MIGRATIONS, Migration, apply_migrations, check_schema_version
+from tests.test_repositories import FakeCursor
+
+def fake_db(applied_versions):
+    collection = MagicMock()
+    collection.find.return_value = FakeCursor([{"_id": v} for v in applied_versions])
+    collection.find_one = AsyncMock(
+        return_value={"_id": max(applied_versions)} if applied_versions else None
+    )
+    collection.insert_one = AsyncMock()
+    db = MagicMock()
+    db.__getitem__.return_value = collection
+    return db, collection
+
+class TestMigrations:
+    """Test the migration runner"""
+
+    def test_versions_are_unique(self):
+        """Test every registered migration has its own version"""
+        versions = [migration.version for migration in MIGRATIONS]
+        assert len(versions) == len(set(versions))
+
+    def test_applies_only_pending_in_order(self):
+        """Test applied migrations are skipped and new ones recorded"""
+        calls = []
+
+        def step(name):
+            async def run(db):
+                calls.append(name)
+            return run
+
+        migrations = [
+            Migration(3, "third", [step("c")]),
+            Migration(1, "first", [step("a")]),
+            Migration(2, "second", [step("b1"), step("b2")]),
+        ]
+        db, collection = fake_db([1])
+
+        applied = asyncio.run(apply_migrations(db, migrations))
+
+        assert [m.version for m in applied] == [2, 3]
+        assert calls == ["b1", "b2", "c"]
+        recorded = [call.args[0]["_id"] for call in collection.insert_one.await_args_list]
+        assert recorded == [2, 3]
+
+    def test_concurrent_runs_both_succeed(self):
+        """Test two workers applying the same migration both start"""
+        recorded = set()
+
+        async def insert_one(doc):
+            if doc["_id"] in recorded:
+                raise DuplicateKeyError("E11000 duplicate key")
+            recorded.add(doc["_id"])
+
+        async def step(db):
+            await asyncio.sleep(0)
+
+        migrations = [Migration(1, "first", [step])]
+        db, collection = fake_db([])
+        collection.find.side_effect = lambda *args, **kwargs: FakeCursor([])
+        collection.insert_one = AsyncMock(side_effect=insert_one)
+
+        async def run():
+            return await asyncio.gather(apply_migrations(db, migrations), apply_migrations(db, migrations))
+
+        first, second = asyncio.run(run())
+
+        assert [m.version for m in first] == [m.version for m in second] == [1]
+        assert recorded == {1}
+
+    def test_check_schema_version(self):
+        """Test an outdated schema warns by default and raises when required"""
+        db, _ = fake_db([1])
+
+        assert asyncio.run(check_schema_version(db, latest=2)) == 1
+        with pytest.raises(RuntimeError):
+            asyncio.run(check_schema_version(db, latest=2, required=True))
+
+    def test_index_migrations_build_fixed_sets(self):
+        """Test each index migration builds its own index list, not the live repository set"""
+        names = ("users", "tasks", "labels", "tasks_archive")
+        by_version = {migration.version: migration for migration in MIGRATIONS}
+
+        def built(version):
+            collections = {name: MagicMock(create_indexes=AsyncMock()) for name in names}
+            db = MagicMock()
+            db.__getitem__.side_effect = collections.__getitem__
+            asyncio.run(by_version[version].apply(db))
+            return {
+                name: [index.document["name"] for call in collection.create_indexes.await_args_list for index in call.args[0]]
+                for name, collection in collections.items()
+            }
+
+        assert "user_text" not in built(1)["tasks"]
+        assert built(3) == {"users": [], "tasks": ["user_text"], "labels": [], "tasks_archive": []}
+        assert built(5)["tasks"] == ["done_updated_at"]
+        assert built(5)["tasks_archive"] == ["user_created_at", "user_labels_created_at"]
+        assert built(7)["tasks"] == ["user_created_at_deadline"]
+
+    def test_pre_images_enabled_on_tasks_and_labels(self):
+        """Test migration 6 turns on pre-images, and skips servers older than 6.0"""
+        migration = next(m for m in MIGRATIONS if m.version == 6)
+        db = MagicMock()
+        db.command = AsyncMock()
+        db.client.server_info = AsyncMock(return_value={"version": "7.0.2", "versionArray": [7, 0, 2, 0]})
+
+        asyncio.run(migration.apply(db))
+
+        collections = sorted(call.args[1] for call in db.command.await_args_list)
+        assert collections == ["labels", "tasks"]
+        assert db.command.await_args.kwargs == {"changeStreamPreAndPostImages": {"enabled": True}}
+
+        db.command.reset_mock()
+        db.client.server_info.return_value = {"version": "5.0.9", "versionArray": [5, 0, 9, 0]}
+        asyncio.run(migration.apply(db))
+        db.command.assert_not_awaited()
@@ -0,0 +1,193 @@
+import contextvars
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi import FastAPI
+from pymongo import monitoring
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi.testclient import TestClient
+from app.core.metrics import Histogram, mongodb_command_duration
+from app.core import profiling
+from app.core.profiling import ProfilingMiddleware, record_phase, timed
+from app.db.monitoring import CommandMetricsListener, PoolMetricsListener
+from app.main import app
+
+ADDRESS = ("localhost", 27017)
+
+class TestPoolMetricsListener:
+    """Test connection pool telemetry"""
+
+    def test_checkout_wait_and_saturation(self):
+        """Test checkout waits and in-use connections are tracked"""
+        listener = PoolMetricsListener(max_pool_size=4)
+        listener.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+        listener.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+        listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.25))
+
+        stats = listener.snapshot()
+        assert stats["checked_out"] == 1
+        assert stats["waiting"] == 0
+        assert stats["saturation"] == 0.25
+        assert stats["wait_time_max_seconds"] == 0.25
+
+        listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+        assert listener.snapshot()["checked_out"] == 0
+
+    def test_saturation_is_per_server(self):
+        """Test saturation reports the busiest server's pool, not the sum over servers"""
+        listener = PoolMetricsListener(max_pool_size=2)
+        secondary = ("localhost", 27018)
+        for address, connection_id in ((ADDRESS, 1), (ADDRESS, 2), (secondary, 3)):
+            listener.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(address))
+            listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(address, connection_id, 0.0))
+
+        assert listener.snapshot()["checked_out"] == 3
+        assert listener.snapshot()["saturation"] == 1.0
+
+        listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+        assert listener.snapshot()["saturation"] == 0.5
+
+    def test_checkout_timeout(self):
+        """Test wait queue timeouts are counted separately"""
+        listener = PoolMetricsListener(max_pool_size=1)
+        listener.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+        listener.connection_check_out_failed(monitoring.ConnectionCheckOutFailedEvent(
+            ADDRESS, monitoring.ConnectionCheckOutFailedReason.TIMEOUT, 1.0
+        ))
+
+        stats = listener.snapshot()
+        assert stats["checkout_failures"] == 1
+        assert stats["checkout_timeouts"] == 1
+        assert stats["waiting"] == 0
+
+    def test_recent_wait_decays(self):
+        """Test the recent wait fades while no checkouts happen"""
+        with patch("app.db.monitoring.time.monotonic", return_value=100.0):
+            listener = PoolMetricsListener(max_pool_size=1, wait_half_life=1.0)
+            listener.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+            listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 1.0))
+            assert listener.recent_wait() == 0.2
+        with patch("app.db.monitoring.time.monotonic", return_value=102.0):
+            assert listener.recent_wait() == 0.05
+
+class TestMetrics:
+    """Test in-process Prometheus metrics"""
+
+    def test_histogram_render(self):
+        """Test buckets are cumulative and include sum and count"""
+        histogram = Histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(("/a",), 0.05)
+        histogram.observe(("/a",), 0.5)
+        histogram.observe(("/a",), 5.0)
+
+        lines = histogram.render()
+
+        assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'demo_seconds_bucket{route="/a",le="1.0"} 2' in lines
+        assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'demo_seconds_count{route="/a"} 3' in lines
+        assert 'demo_seconds_sum{route="/a"} 5.55' in lines
+
+    def test_command_listener_records_collection(self):
+        """Test Mongo command durations are labelled by collection and command"""
+        listener = CommandMetricsListener()
+        started = monitoring.CommandStartedEvent(
+            {"find": "tasks", "filter": {}}, "todo_app", 7, ADDRESS, 7
+        )
+        listener.started(started)
+        listener.succeeded(monitoring.CommandSucceededEvent(
+            timedelta(microseconds=1500), {"ok": 1}, "find", 7, ADDRESS, 7
+        ))
+
+        assert ("tasks", "find", "success") in mongodb_command_duration._series
+
+    def test_command_listener_records_get_more_collection(self):
+        """Test getMore batches are labelled by their cursor's collection"""
+        listener = CommandMetricsListener()
+        listener.started(monitoring.CommandStartedEvent(
+            {"getMore": 12345, "collection": "tasks"}, "todo_app", 8, ADDRESS, 8
+        ))
+        listener.succeeded(monitoring.CommandSucceededEvent(
+            timedelta(microseconds=900), {"ok": 1}, "getMore", 8, ADDRESS, 8
+        ))
+
+        assert ("tasks", "getMore", "success") in mongodb_command_duration._series
+
+    def test_metrics_endpoint(self):
+        """Test /metrics exposes route templates, not raw paths"""
+        client = TestClient(app)
+        client.get("/healthz")
+        client.get("/no/such/route")
+
+        body = client.get("/metrics").text
+
+        assert 'http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}' in body
+        assert 'route="unmatched",status="404"' in body
+        assert "http_requests_in_flight" in body
+        assert 'mongodb_pool{stat="checked_out"}' in body
+
+def make_profiled_client():
+    profiled = FastAPI()
+    profiled.add_middleware(ProfilingMiddleware)
+
+    @profiled.get("/work")
+    async def work():
+        with timed("auth"):
+            pass
+        record_phase("db", 0.002)
+        return {"ok": True}
+
+    return TestClient(profiled)
+
+class TestProfiling:
+    """Test slow request breakdowns and on-demand profiles"""
+
+    def test_slow_request_breakdown(self):
+        """Test requests over the threshold log their phase timings"""
+        with patch.object(profiling.settings, "SLOW_REQUEST_THRESHOLD_MS", 0):
+            with patch.object(profiling.logger, "warning") as mock_warning:
+                make_profiled_client().get("/work")
+
+        fields = mock_warning.call_args.kwargs["extra"]["fields"]
+        assert fields["route"] == "/work"
+        assert fields["db_ms"] == 2.0
+        assert "auth_ms" in fields
+
+    def test_driver_threads_share_request_timings(self):
+        """Test concurrent record_phase calls from copied contexts all count"""
+        timings = {}
+        token = profiling._phase_timings.set(timings)
+        try:
+            def record_many():
+                for _ in range(10000):
+                    record_phase("db", 1.0)
+
+            threads = [threading.Thread(target=contextvars.copy_context().run, args=(record_many,)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            profiling._phase_timings.reset(token)
+
+        assert timings == {"db": 80000.0}
+
+    def test_profile_requires_token(self, tmp_path):
+        """Test a profile is only written for the privileged header value"""
+        with patch.multiple(
+            profiling.settings,
+            PROFILING_ENABLED=True,
+            PROFILING_TOKEN="secret",
+            PROFILE_DIR=str(tmp_path),
+        ):
+            client = make_profiled_client()
+            denied = client.get("/work", headers={"X-Profile": "wrong"})
+            allowed = client.get("/work", headers={"X-Profile": "secret"})
+
+        assert "x-profile-file" not in denied.headers
+        assert (tmp_path / allowed.headers["x-profile-file"]).exists()
@@ -0,0 +1,132 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.dependencies import get_current_user
+from app.core.overload import LoadSheddingMiddleware
+from app.core.ratelimit import TokenBucketLimiter
+from app.main import app
+from app.models.user import UserInDB
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestTokenBucketLimiter:
+    """Test token bucket accounting"""
+
+    def test_burst_then_refill(self):
+        """Test a full bucket allows a burst, then refills at the rate"""
+        clock = FakeClock()
+        limiter = TokenBucketLimiter(rate=2.0, burst=3, clock=clock)
+
+        assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.acquire("a") == 0.5
+
+        clock.now = 0.5
+        assert limiter.acquire("a") == 0.0
+
+    def test_keys_are_independent(self):
+        """Test one client's empty bucket does not limit another"""
+        limiter = TokenBucketLimiter(rate=1.0, burst=1, clock=FakeClock())
+
+        assert limiter.acquire("a") == 0.0
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0.0
+
+    def test_least_recently_used_bucket_is_dropped(self):
+        """Test the number of buckets stays within maxsize"""
+        limiter = TokenBucketLimiter(rate=1.0, burst=1, maxsize=2, clock=FakeClock())
+        for key in ("a", "b", "a", "c"):
+            limiter.acquire(key)
+
+        assert len(limiter) == 2
+        assert limiter.acquire("b") == 0.0
+
+class TestRateLimitedRoutes:
+    """Test routes refuse clients over budget"""
+
+    def test_login_limited_per_ip(self):
+        """Test repeated logins get 429 with Retry-After before any password check"""
+        client = TestClient(app)
+        limiter = TokenBucketLimiter(rate=1 / 60, burst=1)
+        with patch("app.core.ratelimit.auth_limiter", limiter), \
+                patch("app.api.auth.UserRepository") as mock_user_repo:
+            mock_user_repo.return_value.authenticate_user = AsyncMock(return_value=None)
+            first = client.post("/auth/login", json={"email": "a@example.com", "password": "password123"})
+            second = client.post("/auth/login", json={"email": "a@example.com", "password": "password123"})
+
+        assert first.status_code == 401
+        assert second.status_code == 429
+        assert second.headers["Retry-After"] == "60"
+        assert mock_user_repo.return_value.authenticate_user.await_count == 1
+
+    def test_data_routes_limited_per_user(self):
+        """Test a user over the data budget gets 429"""
+        client = TestClient(app)
+        user = UserInDB(_id=ObjectId(), email="user@example.com", password_hash="x")
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            with patch("app.core.ratelimit.user_limiter", TokenBucketLimiter(rate=1.0, burst=0)):
+                response = client.get("/labels")
+        finally:
+            app.dependency_overrides.pop(get_current_user, None)
+
+        assert response.status_code == 429
+
+class TestLoadShedding:
+    """Test the overload middleware"""
+
+    def make_app(self, pool_listener=None):
+        inner = FastAPI()
+
+        @inner.get("/work")
+        async def work():
+            return {"ok": True}
+
+        @inner.get("/healthz")
+        async def healthz():
+            return {"status": "ok"}
+
+        @inner.get("/export")
+        async def export():
+            return []
+
+        return LoadSheddingMiddleware(inner, pool_listener=pool_listener)
+
+    def test_sheds_when_in_flight_limit_reached(self):
+        """Test new requests get 503 with Retry-After at the in-flight limit"""
+        middleware = self.make_app()
+        middleware.max_in_flight = 2
+        middleware.in_flight = 2
+        client = TestClient(middleware)
+
+        response = client.get("/work")
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == middleware.retry_after
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/export").status_code == 200
+
+    def test_sheds_on_pool_wait(self):
+        """Test requests are shed while recent pool waits exceed the limit"""
+        listener = MagicMock()
+        listener.recent_wait.return_value = 1.0
+        middleware = self.make_app(listener)
+        middleware.max_pool_wait = 0.25
+        client = TestClient(middleware)
+
+        assert client.get("/work").status_code == 503
+
+        listener.recent_wait.return_value = 0.01
+        assert client.get("/work").status_code == 200
+        assert middleware.in_flight == 0
@@ -0,0 +1,362 @@
+import asyncio
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.repositories.label_repository import LabelRepository
+from app.db.repositories.task_repository import TaskRepository, BULK_SKIPPED
+from app.models.label import LabelCreate, LabelUpdate
+from app.models.task import TaskCreate, TaskUpdate
+
+class TestTaskRepositoryWrites:
+    """Test task writes take a single round trip"""
+
+    def test_create_task_does_not_read_back(self, mock_db):
+        """Test the created task is built from the inserted document"""
+        db = mock_db
+        user_id = ObjectId()
+
+        async def insert_one(doc):
+            doc["_id"] = ObjectId()
+        db.tasks.insert_one.side_effect = insert_one
+
+        task = asyncio.run(TaskRepository(db).create_task(
+            TaskCreate(title="Write docs", priority="High", deadline=date(2024, 12, 31)),
+            user_id,
+        ))
+
+        assert task.user_id == user_id
+        assert task.deadline == date(2024, 12, 31)
+        assert task.created_at.microsecond % 1000 == 0
+        db.tasks.insert_one.assert_awaited_once()
+        db.tasks.find_one.assert_not_called()
+
+    def test_update_task_uses_find_one_and_update(self, mock_db):
+        """Test updates return the post-update document in one call"""
+        db = mock_db
+        task_id, user_id = ObjectId(), ObjectId()
+        db.tasks.find_one_and_update.return_value = {
+            "_id": task_id,
+            "user_id": user_id,
+            "title": "Renamed",
+            "priority": "Low",
+            "deadline": datetime(2024, 12, 31),
+            "status": "done",
+        }
+
+        task = asyncio.run(TaskRepository(db).update_task(task_id, user_id, TaskUpdate(status="done")))
+
+        assert task.status == "done"
+        db.tasks.find_one_and_update.assert_awaited_once()
+        db.tasks.update_one.assert_not_called()
+        db.tasks.find_one.assert_not_called()
+
+    def test_update_missing_task_returns_none(self, mock_db):
+        """Test not-found semantics are unchanged"""
+        db = mock_db
+        db.tasks.find_one_and_update.return_value = None
+
+        task = asyncio.run(TaskRepository(db).update_task(ObjectId(), ObjectId(), TaskUpdate(status="done")))
+
+        assert task is None
+
+    def test_bulk_write_maps_errors_per_operation(self, mock_db):
+        """Test ordered bulk writes report failures and skipped operations"""
+        db = mock_db
+        db.tasks.bulk_write.side_effect = BulkWriteError({
+            "writeErrors": [{"index": 1, "errmsg": "duplicate key"}],
+        })
+        tasks = [
+            TaskCreate(title=f"Item {i}", priority="Low", deadline=date(2024, 12, 31))
+            for i in range(3)
+        ]
+
+        written = asyncio.run(TaskRepository(db).bulk_create_tasks(tasks, ObjectId(), ordered=True))
+
+        assert [error for _, error in written] == [None, "duplicate key", BULK_SKIPPED]
+        db.tasks.bulk_write.assert_awaited_once()
+
+    def test_writes_bump_user_version(self, mock_db):
+        """Test successful writes bump the user's data version"""
+        db = mock_db
+        user_id = ObjectId()
+        db.tasks.find_one_and_update.return_value = {
+            "_id": ObjectId(), "user_id": user_id, "title": "Renamed",
+            "priority": "Low", "deadline": datetime(2024, 12, 31), "status": "done",
+        }
+        db.tasks.find_one_and_delete.return_value = {"_id": ObjectId(), "label_ids": []}
+        repo = TaskRepository(db)
+
+        asyncio.run(repo.create_task(TaskCreate(title="Write docs", priority="High", deadline=date(2024, 12, 31)), user_id))
+        asyncio.run(repo.update_task(ObjectId(), user_id, TaskUpdate(status="done")))
+        asyncio.run(repo.delete_task(ObjectId(), user_id))
+
+        assert db.user_versions.update_one.await_count == 3
+        query, update = db.user_versions.update_one.call_args.args
+        assert query == {"_id": user_id}
+        assert update == {"$inc": {"version": 1}}
+        assert db.user_versions.update_one.call_args.kwargs["upsert"] is True
+
+    def test_missed_writes_keep_user_version(self, mock_db):
+        """Test updates and deletes that match nothing leave the version alone"""
+        db = mock_db
+        db.tasks.find_one_and_update.return_value = None
+        db.tasks.find_one_and_delete.return_value = None
+        repo = TaskRepository(db)
+
+        asyncio.run(repo.update_task(ObjectId(), ObjectId(), TaskUpdate(status="done")))
+        asyncio.run(repo.delete_task(ObjectId(), ObjectId()))
+
+        db.user_versions.update_one.assert_not_called()
+
+def count_changes(db):
+    """Collect the task_count $inc applied per label across label bulk writes"""
+    changes = {}
+    for call in db.labels.bulk_write.call_args_list:
+        for operation in call.args[0]:
+            label_id = operation._filter["_id"]
+            changes[label_id] = changes.get(label_id, 0) + operation._doc["$inc"]["task_count"]
+    return changes
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+class TestLabelTaskCounts:
+    """Test task_count bookkeeping and the label delete cascade"""
+
+    def test_create_counts_each_label_once(self, mock_db):
+        """Test creating a task increments each distinct label"""
+        db = mock_db
+        a, b = ObjectId(), ObjectId()
+
+        asyncio.run(TaskRepository(db).create_task(
+            TaskCreate(title="Write docs", priority="High", deadline=date(2024, 12, 31), label_ids=[a, b, a]),
+            ObjectId(),
+        ))
+
+        assert count_changes(db) == {a: 1, b: 1}
+        db.labels.bulk_write.assert_awaited_once()
+
+    def test_update_moves_counts_between_labels(self, mock_db):
+        """Test relabeling decrements removed labels and increments added ones"""
+        db = mock_db
+        a, b, c = ObjectId(), ObjectId(), ObjectId()
+        user_id = ObjectId()
+        db.tasks.find_one_and_update.return_value = {
+            "_id": ObjectId(), "user_id": user_id, "title": "Docs", "priority": "Low",
+            "deadline": datetime(2024, 12, 31), "status": "open", "label_ids": [a, b],
+        }
+
+        task = asyncio.run(TaskRepository(db).update_task(ObjectId(), user_id, TaskUpdate(label_ids=[b, c])))
+
+        assert task.label_ids == [b, c]
+        assert count_changes(db) == {a: -1, c: 1}
+
+    def test_update_without_labels_leaves_counts(self, mock_db):
+        """Test updates that do not touch label_ids skip the label write"""
+        db = mock_db
+        user_id = ObjectId()
+        db.tasks.find_one_and_update.return_value = {
+            "_id": ObjectId(), "user_id": user_id, "title": "Docs", "priority": "Low",
+            "deadline": datetime(2024, 12, 31), "status": "open", "label_ids": [ObjectId()],
+        }
+
+        asyncio.run(TaskRepository(db).update_task(ObjectId(), user_id, TaskUpdate(status="done")))
+
+        db.labels.bulk_write.assert_not_called()
+
+    def test_bulk_delete_counts_only_deleted_tasks(self, mock_db):
+        """Test failed deletes in a bulk write keep their labels counted"""
+        db = mock_db
+        a, b = ObjectId(), ObjectId()
+        deleted, failed = ObjectId(), ObjectId()
+        db.tasks.find = MagicMock(return_value=FakeCursor([
+            {"_id": deleted, "label_ids": [a]},
+            {"_id": failed, "label_ids": [b]},
+        ]))
+        db.tasks.bulk_write.side_effect = BulkWriteError({
+            "writeErrors": [{"index": 1, "errmsg": "boom"}],
+        })
+
+        errors = asyncio.run(TaskRepository(db).bulk_delete_tasks([deleted, failed], ObjectId()))
+
+        assert errors == [None, "boom"]
+        assert count_changes(db) == {a: -1}
+
+    def test_delete_label_pulls_from_tasks(self, mock_db):
+        """Test deleting a label removes it from tasks and archived tasks with one update_many each"""
+        db = mock_db
+        label_id, user_id = ObjectId(), ObjectId()
+        db.labels.delete_one.return_value = MagicMock(deleted_count=1)
+
+        assert asyncio.run(LabelRepository(db).delete_label(label_id, user_id)) is True
+
+        for collection in (db.tasks, db.tasks_archive):
+            collection.update_many.assert_awaited_once_with(
+                {"user_id": user_id, "label_ids": label_id},
+                {"$pull": {"label_ids": label_id}},
+            )
+
+    def test_delete_missing_label_touches_no_tasks(self, mock_db):
+        """Test a missing label is a no-op for tasks"""
+        db = mock_db
+        db.labels.delete_one.return_value = MagicMock(deleted_count=0)
+
+        assert asyncio.run(LabelRepository(db).delete_label(ObjectId(), ObjectId())) is False
+
+        db.tasks.update_many.assert_not_called()
+
+    def test_recount_sets_only_changed_counts(self, mock_db):
+        """Test the backfill writes labels whose stored count is wrong"""
+        db = mock_db
+        right, wrong, unused = ObjectId(), ObjectId(), ObjectId()
+        db.tasks.aggregate = MagicMock(return_value=FakeCursor([
+            {"_id": right, "count": 2},
+            {"_id": wrong, "count": 5},
+        ]))
+        db.labels.find = MagicMock(return_value=FakeCursor([
+            {"_id": right, "task_count": 2},
+            {"_id": wrong, "task_count": 1},
+            {"_id": unused},
+        ]))
+
+        changed = asyncio.run(LabelRepository(db).recount_task_counts())
+
+        operations = db.labels.bulk_write.call_args.args[0]
+        assert changed == 2
+        assert {op._filter["_id"]: op._doc["$set"]["task_count"] for op in operations} == {wrong: 5, unused: 0}
+
+class TestExpandLabels:
+    """Test the label $lookup used by expand=labels"""
+
+    def test_lookup_runs_after_limit_and_is_user_scoped(self, mock_db):
+        """Test only the returned page is joined, against the user's labels only"""
+        db = mock_db
+        user_id = ObjectId()
+        aggregate_cursor = MagicMock()
+        aggregate_cursor.to_list = AsyncMock(return_value=[])
+        db.tasks.aggregate = MagicMock(return_value=aggregate_cursor)
+
+        asyncio.run(TaskRepository(db).get_task_documents_by_user(user_id, limit=10, expand_labels=True))
+
+        pipeline = db.tasks.aggregate.call_args.args[0]
+        assert [list(stage)[0] for stage in pipeline] == ["$match", "$sort", "$limit", "$lookup"]
+        assert pipeline[2] == {"$limit": 11}
+        lookup = pipeline[3]["$lookup"]
+        assert (lookup["from"], lookup["localField"], lookup["foreignField"]) == ("labels", "label_ids", "_id")
+        assert lookup["pipeline"][0] == {"$match": {"user_id": user_id}}
+        assert lookup["pipeline"][1] == {"$project": {"name": 1, "color": 1}}
+
+class TestTaskSearch:
+    """Test text search queries"""
+
+    def test_search_is_scoped_and_ranked(self, mock_db):
+        """Test search filters on the user, sorts by text score and pages by offset"""
+        from app.db.pagination import decode_offset_cursor
+        db = mock_db
+        user_id = ObjectId()
+        db_cursor = MagicMock()
+        db_cursor.sort.return_value = db_cursor
+        db_cursor.skip.return_value = db_cursor
+        db_cursor.limit.return_value = db_cursor
+        db_cursor.to_list = AsyncMock(return_value=[{"_id": ObjectId()} for _ in range(3)])
+        db.tasks.find = MagicMock(return_value=db_cursor)
+
+        docs, next_cursor = asyncio.run(TaskRepository(db).search_task_documents(user_id, "report", limit=2))
+
+        query, projection = db.tasks.find.call_args.args
+        assert query == {"user_id": user_id, "$text": {"$search": "report"}}
+        assert projection == {"score": {"$meta": "textScore"}}
+        assert db_cursor.sort.call_args.args[0][0] == ("score", {"$meta": "textScore"})
+        db_cursor.skip.assert_called_once_with(0)
+        assert len(docs) == 2
+        assert decode_offset_cursor(next_cursor) == 2
+
+class TestTaskStats:
+    """Test the dashboard statistics aggregation"""
+
+    def test_single_facet_aggregation(self, mock_db):
+        """Test one user-scoped $facet pipeline is mapped onto TaskStats"""
+        db = mock_db
+        user_id, label_id = ObjectId(), ObjectId()
+        aggregate_cursor = MagicMock()
+        aggregate_cursor.to_list = AsyncMock(return_value=[{
+            "total": [{"count": 5}],
+            "by_status": [{"_id": "open", "count": 3}, {"_id": "done", "count": 2}],
+            "by_priority": [{"_id": "High", "count": 5}],
+            "by_label": [{"_id": label_id, "count": 4}],
+            "overdue": [{"count": 1}],
+            "due_this_week": [],
+        }])
+        db.tasks.aggregate = MagicMock(return_value=aggregate_cursor)
+
+        stats = asyncio.run(TaskRepository(db).get_task_stats(user_id, date(2024, 6, 3)))
+
+        pipeline = db.tasks.aggregate.call_args.args[0]
+        assert pipeline[0] == {"$match": {"user_id": user_id}}
+        assert set(pipeline[-1]["$facet"]) == {
+            "total", "by_status", "by_priority", "by_label", "overdue", "due_this_week",
+        }
+        week = pipeline[-1]["$facet"]["due_this_week"][0]["$match"]["deadline"]
+        assert week == {"$gte": datetime(2024, 6, 3), "$lt": datetime(2024, 6, 10)}
+        assert stats.total == 5
+        assert stats.by_status == {"open": 3, "done": 2}
+        assert stats.by_label[0].label_id == label_id
+        assert stats.overdue == 1
+        assert stats.due_this_week == 0
+
+    def test_writes_invalidate_cached_stats(self, mock_db):
+        """Test task writes drop the user's cached statistics"""
+        from app.core.cache import stats_cache
+        db = mock_db
+        user_id = ObjectId()
+        stats_cache.set(str(user_id), "cached")
+
+        asyncio.run(TaskRepository(db).create_task(
+            TaskCreate(title="Write docs", priority="High", deadline=date(2024, 12, 31)), user_id
+        ))
+
+        assert stats_cache.get(str(user_id)) is None
+
+class TestLabelRepositoryWrites:
+    """Test label writes take a single round trip"""
+
+    def test_create_label_does_not_read_back(self, mock_db):
+        """Test the created label is built from the inserted document"""
+        db = mock_db
+
+        async def insert_one(doc):
+            doc["_id"] = ObjectId()
+        db.labels.insert_one.side_effect = insert_one
+
+        label = asyncio.run(LabelRepository(db).create_label(LabelCreate(name="Work"), ObjectId()))
+
+        assert label.name == "Work"
+        db.labels.find_one.assert_not_called()
+
+    def test_update_missing_label_returns_none(self, mock_db):
+        """Test updating a missing label returns None"""
+        db = mock_db
+        db.labels.find_one_and_update.return_value = None
+
+        label = asyncio.run(LabelRepository(db).update_label(ObjectId(), ObjectId(), LabelUpdate(name="Home")))
+
+        assert label is None
+        db.labels.find_one_and_update.assert_awaited_once()
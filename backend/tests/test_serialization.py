@@ -0,0 +1,152 @@
+import asyncio
+import gzip
+import json
+import pytest
+from datetime import datetime
+from typing import List
+from unittest.mock import patch
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core import negotiation
+from app.core.negotiation import Representation, list_response, negotiate
+from app.core.serialization import DocumentSerializer
+from app.main import app
+from app.models.label import Label
+from app.models.task import Task, TaskExpanded
+from tests.test_tasks import make_task_doc
+
+def response_model_body(model, docs):
+    """Serialize documents the way FastAPI does for response_model=List[model]"""
+    reference = FastAPI()
+
+    @reference.get("/", response_model=List[model])
+    async def endpoint():
+        return [model(**doc) for doc in docs]
+
+    return TestClient(reference).get("/").json()
+
+class TestDocumentSerializer:
+    """Test the fast read path matches response_model serialization"""
+
+    def test_task_shape_matches_response_model(self):
+        """Test task documents serialize exactly like List[Task]"""
+        docs = [make_task_doc(0), make_task_doc(20)]
+        docs[0].pop("description")
+
+        fast = json.loads(DocumentSerializer(Task).dump_many(docs))
+
+        assert fast == response_model_body(Task, docs)
+        assert list(fast[0]) == list(response_model_body(Task, docs)[0])
+
+    def test_label_shape_matches_response_model(self):
+        """Test label documents serialize exactly like List[Label]"""
+        docs = [{
+            "_id": ObjectId(),
+            "user_id": ObjectId(),
+            "name": "Work",
+            "color": "#FF5733",
+            "created_at": datetime(2024, 1, 1),
+            "updated_at": datetime(2024, 1, 1),
+        }]
+
+        assert json.loads(DocumentSerializer(Label).dump_many(docs)) == response_model_body(Label, docs)
+
+    def test_openapi_schema_documents_expanded_shape(self):
+        """Test task reads document both the plain and the expand=labels shape"""
+        def schema(path):
+            return app.openapi()["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+        for path in ("/tasks/", "/tasks/by-label/{label_id}"):
+            assert schema(path)["type"] == "array"
+            refs = [option["$ref"].rsplit("/", 1)[1] for option in schema(path)["items"]["anyOf"]]
+            assert refs == ["TaskExpanded", "Task"]
+        refs = [option["$ref"].rsplit("/", 1)[1] for option in schema("/tasks/{task_id}")["anyOf"]]
+        assert refs == ["TaskExpanded", "Task"]
+
+class TestExpandedSerialization:
+    """Test the expanded task shape"""
+
+    def test_expanded_shape_matches_response_model(self):
+        """Test embedded labels serialize like the TaskExpanded response model"""
+        doc = make_task_doc(label_count=2)
+        doc["labels"] = [{"_id": label_id, "name": f"label {i}"} for i, label_id in enumerate(doc["label_ids"])]
+
+        body = json.loads(DocumentSerializer(TaskExpanded).dump_many([doc]))
+
+        assert body == response_model_body(TaskExpanded, [doc])
+        assert body[0]["labels"][0]["color"] is None
+
+class FakeRequest:
+    def __init__(self, **headers):
+        self.headers = {name.replace("_", "-"): value for name, value in headers.items()}
+
+class TestNegotiation:
+    """Test response media type and compression negotiation"""
+
+    def test_json_by_default(self):
+        """Test requests without preferences get uncompressed JSON"""
+        assert negotiate(FakeRequest()) == Representation("application/json", None)
+
+    def test_media_type_follows_q_values(self):
+        """Test the highest ranked supported type wins, with ties and wildcards going to JSON"""
+        msgpack = pytest.importorskip("msgpack")
+
+        def media_type(accept):
+            return negotiate(FakeRequest(accept=accept)).media_type
+
+        with patch("app.core.serialization.msgpack", msgpack):
+            assert media_type("application/json, application/x-ndjson;q=0.1") == "application/json"
+            assert media_type("application/json, application/msgpack;q=0.1") == "application/json"
+            assert media_type("application/json;q=0.5, application/x-ndjson") == "application/x-ndjson"
+            assert media_type("application/json;q=0.5, application/msgpack") == "application/msgpack"
+            assert media_type("application/x-ndjson, application/json") == "application/json"
+            assert media_type("*/*") == "application/json"
+            assert media_type("*/*;q=0.1, application/x-ndjson;q=0.2") == "application/x-ndjson"
+            assert media_type("text/html") == "application/json"
+
+    def test_encoding_preferences(self):
+        """Test q=0 refuses an encoding and brotli needs the brotli package"""
+        with patch.object(negotiation, "brotli", None):
+            assert negotiate(FakeRequest(accept_encoding="br, gzip")).encoding == "gzip"
+            assert negotiate(FakeRequest(accept_encoding="gzip;q=0")).encoding is None
+            assert negotiate(FakeRequest(accept_encoding="*")).encoding == "gzip"
+
+    def test_msgpack_falls_back_to_json_when_unavailable(self):
+        """Test MessagePack is only offered when msgpack is installed"""
+        with patch("app.core.serialization.msgpack", None):
+            representation = negotiate(FakeRequest(accept="application/msgpack"))
+        assert representation.media_type == "application/json"
+
+    def test_compresses_above_threshold(self):
+        """Test large bodies are gzipped and small ones are left alone"""
+        serializer = DocumentSerializer(Task)
+        docs = [make_task_doc(3) for _ in range(20)]
+        gzip_json = Representation("application/json", "gzip")
+
+        large = asyncio.run(list_response(gzip_json, docs, serializer))
+        small = asyncio.run(list_response(gzip_json, docs[:0], serializer))
+
+        assert large.headers["content-encoding"] == "gzip"
+        assert large.headers["vary"] == "Accept, Accept-Encoding"
+        assert gzip.decompress(large.body) == serializer.dump_many(docs)
+        assert "content-encoding" not in small.headers
+        assert small.body == b"[]"
+
+    def test_msgpack_matches_json(self):
+        """Test MessagePack carries the same values as the JSON body"""
+        msgpack = pytest.importorskip("msgpack")
+        serializer = DocumentSerializer(Task)
+        docs = [make_task_doc(3)]
+
+        with patch("app.core.serialization.msgpack", msgpack):
+            response = asyncio.run(list_response(Representation("application/msgpack", None), docs, serializer))
+
+        assert response.media_type == "application/msgpack"
+        assert msgpack.unpackb(response.body) == json.loads(serializer.dump_many(docs))
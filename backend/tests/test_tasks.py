@@ -0,0 +1,443 @@
+import json
+import pytest
+from datetime import datetime, date
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core.dependencies import get_current_user
+from app.db.pagination import (
+    encode_cursor,
+    decode_cursor,
+    keyset_condition,
+    encode_offset_cursor,
+    decode_offset_cursor,
+    InvalidCursorError,
+)
+from app.db.repositories.task_repository import TaskRepository
+from app.models.task import Task, TaskFilters, TaskStats
+from app.models.user import UserInDB
+
+client = TestClient(app)
+
+USER = UserInDB(_id=ObjectId(), email="user@example.com", password_hash="x")
+
+def make_task_doc(label_count=0, **overrides):
+    """A task document shaped like what Mongo returns, owned by USER"""
+    doc = {
+        "_id": ObjectId(),
+        "user_id": USER.id,
+        "title": "Write docs",
+        "description": "x" * 500,
+        "priority": "High",
+        "deadline": datetime(2024, 12, 31),
+        "status": "open",
+        "label_ids": [ObjectId() for _ in range(label_count)],
+        "created_at": datetime(2024, 1, 1, 12, 0, 0, 123000),
+        "updated_at": datetime(2024, 1, 2, 12, 0, 0),
+    }
+    doc.update(overrides)
+    return doc
+
+@pytest.fixture
+def authenticated():
+    app.dependency_overrides[get_current_user] = lambda: USER
+    yield
+    app.dependency_overrides.pop(get_current_user, None)
+
+@pytest.fixture
+def versions():
+    with patch('app.api.tasks.VersionRepository') as mock_version_repo:
+        mock_version_repo.return_value.get_version = AsyncMock(return_value=1)
+        yield mock_version_repo.return_value
+
+class TestPagination:
+    """Test keyset cursor encoding"""
+
+    def test_cursor_round_trip(self):
+        """Test a cursor decodes to the position it was built from"""
+        created_at = datetime(2024, 5, 1, 8, 30, 0, 123000)
+        object_id = ObjectId()
+        cursor = encode_cursor(created_at, object_id)
+
+        assert decode_cursor(cursor) == (created_at, object_id)
+
+    def test_cursor_rejects_garbage(self):
+        """Test malformed cursors raise InvalidCursorError"""
+        with pytest.raises(InvalidCursorError):
+            decode_cursor("not-a-cursor")
+
+    def test_cursor_rejects_order_mismatch(self):
+        """Test a cursor cannot be replayed with the opposite sort order"""
+        cursor = encode_cursor(datetime(2024, 1, 1), ObjectId(), "desc")
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(cursor, "asc")
+
+    def test_keyset_condition(self):
+        """Test the keyset condition breaks created_at ties on _id"""
+        created_at = datetime(2024, 1, 1)
+        object_id = ObjectId()
+        condition = keyset_condition(encode_cursor(created_at, object_id))
+
+        assert condition == {
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": object_id}},
+            ]
+        }
+        assert keyset_condition(None) == {}
+
+class TestTaskQuery:
+    """Test task filter translation"""
+
+    def test_build_query_filters(self):
+        """Test filters map onto indexed fields"""
+        repo = TaskRepository(MagicMock())
+        label_ids = [ObjectId(), ObjectId()]
+        filters = TaskFilters(
+            status="open",
+            priority="Low",
+            deadline_from=date(2024, 1, 1),
+            deadline_to=date(2024, 1, 31),
+            label_ids=label_ids,
+            label_match="all",
+        )
+
+        query = repo.build_query(USER.id, filters)
+
+        assert query == {
+            "user_id": USER.id,
+            "status": "open",
+            "priority": "Low",
+            "deadline": {"$gte": datetime(2024, 1, 1), "$lte": datetime(2024, 1, 31)},
+            "label_ids": {"$all": label_ids},
+        }
+
+    def test_offset_cursor_round_trip(self):
+        """Test offset cursors decode to their offset and reject anything else"""
+        assert decode_offset_cursor(encode_offset_cursor(200)) == 200
+        assert decode_offset_cursor(None) == 0
+        with pytest.raises(InvalidCursorError):
+            decode_offset_cursor(encode_cursor(datetime(2024, 1, 1), ObjectId()))
+
+class TestTaskList:
+    """Test GET /tasks pagination and filters"""
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_next_cursor_header(self, mock_task_repo, authenticated, versions):
+        """Test the next page cursor is returned in a header"""
+        mock_repo_instance = AsyncMock()
+        mock_task_repo.return_value = mock_repo_instance
+        mock_repo_instance.get_task_documents_by_user.return_value = ([make_task_doc()], "abc")
+
+        response = client.get("/tasks/?limit=1&status=open&label_ids=" + str(ObjectId()))
+
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "abc"
+        assert len(response.json()) == 1
+        kwargs = mock_repo_instance.get_task_documents_by_user.call_args.kwargs
+        assert kwargs["limit"] == 1
+        assert kwargs["filters"].status == "open"
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_invalid_cursor(self, mock_task_repo, authenticated, versions):
+        """Test an undecodable cursor is a 400"""
+        mock_repo_instance = AsyncMock()
+        mock_task_repo.return_value = mock_repo_instance
+        mock_repo_instance.get_task_documents_by_user.side_effect = InvalidCursorError("Invalid cursor")
+
+        response = client.get("/tasks/?cursor=bogus")
+
+        assert response.status_code == 400
+
+    def test_limit_is_bounded(self, authenticated):
+        """Test page size above the configured maximum is rejected"""
+        response = client.get("/tasks/?limit=100000")
+
+        assert response.status_code == 422
+
+async def iterate(docs):
+    for doc in docs:
+        yield doc
+
+class TestTaskStreaming:
+    """Test streamed task list responses"""
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_ndjson(self, mock_task_repo, authenticated, versions):
+        """Test one task per line when NDJSON is requested"""
+        docs = [make_task_doc(), make_task_doc()]
+        mock_task_repo.return_value.stream_tasks_by_user = MagicMock(return_value=iterate(docs))
+
+        response = client.get("/tasks/", headers={"Accept": "application/x-ndjson"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["_id"] for line in lines] == [str(doc["_id"]) for doc in docs]
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_chunked_json_array(self, mock_task_repo, authenticated, versions):
+        """Test stream=true produces the same body as the paged response"""
+        docs = [make_task_doc(), make_task_doc()]
+        mock_task_repo.return_value.stream_tasks_by_user = MagicMock(return_value=iterate(docs))
+
+        streamed = client.get("/tasks/?stream=true").json()
+
+        assert streamed == [json.loads(Task(**doc).model_dump_json(by_alias=True)) for doc in docs]
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_empty_stream(self, mock_task_repo, authenticated, versions):
+        """Test an empty stream is a valid empty JSON array"""
+        mock_task_repo.return_value.stream_tasks_by_user = MagicMock(return_value=iterate([]))
+
+        assert client.get("/tasks/?stream=true").json() == []
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_refused_ndjson_streams_json_array(self, mock_task_repo, authenticated, versions):
+        """Test NDJSON refused with q=0, or ranked below JSON, does not select it"""
+        mock_task_repo.return_value.stream_tasks_by_user = MagicMock(side_effect=lambda *a, **k: iterate([make_task_doc()]))
+
+        response = client.get("/tasks/?stream=true", headers={"Accept": "application/x-ndjson;q=0, application/json"})
+
+        assert response.headers["content-type"].startswith("application/json")
+        assert len(response.json()) == 1
+
+        ranked = client.get("/tasks/?stream=true", headers={"Accept": "application/json, application/x-ndjson;q=0.1"})
+        assert ranked.headers["content-type"].startswith("application/json")
+
+class TestBulkTasks:
+    """Test bulk task endpoints"""
+
+    @patch('app.api.tasks.LabelRepository')
+    @patch('app.api.tasks.TaskRepository')
+    def test_bulk_create_validates_labels_once(self, mock_task_repo, mock_label_repo, authenticated):
+        """Test label references are checked in one query and reported per item"""
+        known_label, unknown_label = ObjectId(), ObjectId()
+        mock_label_repo.return_value.get_existing_label_ids = AsyncMock(return_value={known_label})
+        new_id = ObjectId()
+        mock_task_repo.return_value.bulk_create_tasks = AsyncMock(return_value=[(new_id, None)])
+        task = {"title": "Item", "priority": "Low", "deadline": "2024-12-31"}
+
+        response = client.post("/tasks/bulk", json={"items": [
+            {**task, "label_ids": [str(known_label)]},
+            {**task, "label_ids": [str(unknown_label)]},
+        ]})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0] == {"index": 0, "id": str(new_id), "status": "created", "error": None}
+        assert results[1]["status"] == "invalid_labels"
+        mock_label_repo.return_value.get_existing_label_ids.assert_awaited_once()
+
+    @patch('app.api.tasks.LabelRepository')
+    @patch('app.api.tasks.TaskRepository')
+    def test_bulk_update_reports_missing_tasks(self, mock_task_repo, mock_label_repo, authenticated):
+        """Test unknown task ids are reported as not_found"""
+        found, missing = ObjectId(), ObjectId()
+        mock_task_repo.return_value.get_existing_task_ids = AsyncMock(return_value={found})
+        mock_task_repo.return_value.bulk_update_tasks = AsyncMock(return_value=[None])
+
+        response = client.patch("/tasks/bulk", json={"items": [
+            {"id": str(found), "status": "done"},
+            {"id": str(missing), "status": "done"},
+        ]})
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        assert statuses == ["updated", "not_found"]
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_bulk_delete_reports_skipped(self, mock_task_repo, authenticated):
+        """Test ordered writes report operations after a failure as skipped"""
+        from app.db.repositories.task_repository import BULK_SKIPPED
+        ids = [ObjectId(), ObjectId()]
+        mock_task_repo.return_value.get_existing_task_ids = AsyncMock(return_value=set(ids))
+        mock_task_repo.return_value.bulk_delete_tasks = AsyncMock(return_value=["boom", BULK_SKIPPED])
+
+        response = client.request("DELETE", "/tasks/bulk", json={"ids": [str(i) for i in ids], "ordered": True})
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        assert statuses == ["failed", "skipped"]
+
+    def test_bulk_size_limit(self, authenticated):
+        """Test batches above the configured limit are rejected"""
+        from app.core.settings import get_settings
+        ids = [str(ObjectId()) for _ in range(get_settings().TASKS_BULK_MAX_ITEMS + 1)]
+
+        response = client.request("DELETE", "/tasks/bulk", json={"ids": ids})
+
+        assert response.status_code == 413
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_bulk_rejects_duplicate_ids(self, mock_task_repo, authenticated):
+        """Test a task id repeated in one batch is rejected before any write"""
+        task_id = str(ObjectId())
+
+        delete = client.request("DELETE", "/tasks/bulk", json={"ids": [task_id, task_id]})
+        update = client.patch("/tasks/bulk", json={"items": [{"id": task_id, "status": "done"}, {"id": task_id, "title": "x"}]})
+
+        assert delete.status_code == 422 and update.status_code == 422
+        assert "more than once" in delete.json()["detail"]
+        mock_task_repo.return_value.bulk_delete_tasks.assert_not_called()
+        mock_task_repo.return_value.bulk_update_tasks.assert_not_called()
+
+class TestConditionalGet:
+    """Test ETags and If-None-Match on task reads"""
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_list_sets_etag(self, mock_task_repo, authenticated, versions):
+        """Test list responses carry a strong ETag and require revalidation"""
+        mock_task_repo.return_value.get_task_documents_by_user = AsyncMock(return_value=([make_task_doc()], None))
+
+        response = client.get("/tasks/")
+
+        assert response.status_code == 200
+        assert response.headers["ETag"].startswith('"1-')
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_matching_etag_skips_query(self, mock_task_repo, authenticated, versions):
+        """Test a matching If-None-Match is a 304 without reading tasks"""
+        mock_task_repo.return_value.get_task_documents_by_user = AsyncMock(return_value=([make_task_doc()], None))
+        etag = client.get("/tasks/").headers["ETag"]
+        mock_task_repo.return_value.get_task_documents_by_user.reset_mock()
+
+        response = client.get("/tasks/", headers={"If-None-Match": f'"other", W/{etag}'})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.headers["Vary"] == "Accept, Accept-Encoding"
+        assert response.content == b""
+        mock_task_repo.return_value.get_task_documents_by_user.assert_not_called()
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_etag_changes_with_version_and_representation(self, mock_task_repo, authenticated, versions):
+        """Test writes, query parameters and media type all change the ETag"""
+        mock_task_repo.return_value.get_task_documents_by_user = AsyncMock(return_value=([], None))
+        mock_task_repo.return_value.stream_tasks_by_user = MagicMock(side_effect=lambda *a, **k: iterate([]))
+
+        first = client.get("/tasks/").headers["ETag"]
+        filtered = client.get("/tasks/?status=open").headers["ETag"]
+        ndjson = client.get("/tasks/", headers={"Accept": "application/x-ndjson"}).headers["ETag"]
+        versions.get_version.return_value = 2
+        bumped = client.get("/tasks/").headers["ETag"]
+
+        assert len({first, filtered, ndjson, bumped}) == 4
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_item_not_modified(self, mock_task_repo, authenticated, versions):
+        """Test item reads answer If-None-Match too"""
+        task_id = ObjectId()
+        mock_task_repo.return_value.get_task_by_id = AsyncMock(return_value=Task(**make_task_doc(_id=task_id)))
+        etag = client.get(f"/tasks/{task_id}").headers["ETag"]
+
+        response = client.get(f"/tasks/{task_id}", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert mock_task_repo.return_value.get_task_by_id.await_count == 1
+
+class TestTaskSearch:
+    """Test GET /tasks/search"""
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_search_passes_query_and_filters(self, mock_task_repo, authenticated, versions):
+        """Test the search text, filters and page size reach the repository"""
+        search = mock_task_repo.return_value.search_task_documents = AsyncMock(
+            return_value=([make_task_doc(score=1.5)], "next")
+        )
+        label_id = ObjectId()
+
+        response = client.get(f"/tasks/search?q=quarterly report&status=done&label_ids={label_id}&limit=5")
+
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "next"
+        assert "score" not in response.json()[0]
+        args, kwargs = search.call_args
+        assert args == (USER.id, "quarterly report")
+        assert kwargs["filters"].status == "done"
+        assert kwargs["filters"].label_ids == [label_id]
+        assert kwargs["limit"] == 5
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_invalid_cursor(self, mock_task_repo, authenticated, versions):
+        """Test an undecodable cursor is a 400"""
+        mock_task_repo.return_value.search_task_documents = AsyncMock(side_effect=InvalidCursorError("Invalid cursor"))
+
+        response = client.get("/tasks/search?q=docs&cursor=bogus")
+
+        assert response.status_code == 400
+
+    def test_query_required(self, authenticated):
+        """Test an empty search is rejected rather than treated as a task id"""
+        assert client.get("/tasks/search").status_code == 422
+        assert client.get("/tasks/search?q=").status_code == 422
+
+class TestTaskStats:
+    """Test GET /tasks/stats"""
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_stats_cached_until_version_changes(self, mock_task_repo, authenticated, versions):
+        """Test repeated calls reuse the cached result until the data version moves"""
+        from app.core.cache import stats_cache
+        stats_cache.clear()
+        aggregate = mock_task_repo.return_value.get_task_stats = AsyncMock(
+            side_effect=lambda user_id, today: TaskStats(total=3, by_status={"open": 3}, as_of=today)
+        )
+
+        first = client.get("/tasks/stats")
+        second = client.get("/tasks/stats")
+        versions.get_version.return_value = 2
+        third = client.get("/tasks/stats")
+
+        assert first.status_code == 200
+        assert first.json()["total"] == 3
+        assert second.json() == first.json()
+        assert aggregate.await_count == 2
+        assert third.headers["ETag"] != first.headers["ETag"]
+
+class TestExpandLabels:
+    """Test expand=labels on task reads"""
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_list_embeds_labels(self, mock_task_repo, authenticated, versions):
+        """Test expanded lists ask the repository to join and serialize labels"""
+        label_id = ObjectId()
+        doc = make_task_doc(label_ids=[label_id], labels=[{"_id": label_id, "name": "Work", "color": "#FF5733"}])
+        page = mock_task_repo.return_value.get_task_documents_by_user = AsyncMock(return_value=([doc], None))
+
+        body = client.get("/tasks/?expand=labels").json()
+
+        assert page.call_args.kwargs["expand_labels"] is True
+        assert body[0]["labels"] == [{"_id": str(label_id), "name": "Work", "color": "#FF5733"}]
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_plain_list_has_no_labels_field(self, mock_task_repo, authenticated, versions):
+        """Test the default shape is unchanged"""
+        page = mock_task_repo.return_value.get_task_documents_by_user = AsyncMock(return_value=([make_task_doc()], None))
+
+        body = client.get("/tasks/").json()
+
+        assert page.call_args.kwargs["expand_labels"] is False
+        assert "labels" not in body[0]
+
+    @patch('app.api.tasks.TaskRepository')
+    def test_item_embeds_labels(self, mock_task_repo, authenticated, versions):
+        """Test an expanded item read is served from one document fetch"""
+        task_id = ObjectId()
+        fetch = mock_task_repo.return_value.get_task_document = AsyncMock(return_value=make_task_doc(_id=task_id, labels=[]))
+
+        response = client.get(f"/tasks/{task_id}?expand=labels")
+
+        assert response.status_code == 200
+        assert response.json()["labels"] == []
+        assert fetch.call_args.kwargs["expand_labels"] is True
+
+    def test_unknown_expansion_rejected(self, authenticated):
+        """Test only labels can be expanded"""
+        assert client.get("/tasks/?expand=users").status_code == 422
@@ -0,0 +1,211 @@
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from fastapi.testclient import TestClient
+import pytest
+import sys
+import os
+
+# Add the parent directory to the path so we can import from app
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.core.dependencies import get_current_user
+from app.core.streaming import LineTooLongError, split_lines
+from app.db.transfer import Importer, csv_export, export_records, ndjson_export
+from app.db.repositories.task_repository import TaskRepository
+from app.models.user import UserInDB
+from tests.test_repositories import FakeCursor
+
+USER = UserInDB(_id=ObjectId(), email="user@example.com", password_hash="x")
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+def make_repos(existing_labels=None):
+    labels = MagicMock()
+    labels.get_label_ids_by_name = AsyncMock(return_value=dict(existing_labels or {}))
+    labels.insert_label_documents = AsyncMock(side_effect=lambda docs, user_id: [None] * len(docs))
+    tasks = MagicMock()
+    tasks.new_document = lambda task, user_id: TaskRepository.new_document(None, task, user_id)
+    tasks.insert_task_documents = AsyncMock(side_effect=lambda docs, user_id: [None] * len(docs))
+    return labels, tasks
+
+def run_import(lines, labels, tasks, batch_size=500):
+    async def run():
+        with patch("app.db.transfer.LabelRepository", return_value=labels), \
+                patch("app.db.transfer.TaskRepository", return_value=tasks):
+            importer = Importer(MagicMock(), USER.id, batch_size)
+        for number, line in enumerate(lines, start=1):
+            await importer.add_line(number, line.encode() if isinstance(line, str) else line)
+        return await importer.finish()
+    return asyncio.run(run())
+
+def task_line(**overrides):
+    record = {"type": "task", "title": "Write docs", "priority": "High", "deadline": "2024-12-31", "label_ids": []}
+    record.update(overrides)
+    return json.dumps(record)
+
+class TestSplitLines:
+    """Test reading lines from a streamed body"""
+
+    def test_lines_span_chunks(self):
+        """Test lines split across chunks are joined and numbered"""
+        lines = asyncio.run(collect(split_lines(chunks(b'{"a"', b':1}\n{"b":2}\n', b'{"c":3}'), 100)))
+        assert lines == [(1, b'{"a":1}'), (2, b'{"b":2}'), (3, b'{"c":3}')]
+
+    def test_line_too_long(self):
+        """Test an oversized line stops reading with its line number"""
+        with pytest.raises(LineTooLongError) as error:
+            asyncio.run(collect(split_lines(chunks(b"ok\n", b"x" * 20), 10)))
+        assert error.value.line == 2
+
+class TestExport:
+    """Test export encodings"""
+
+    def export(self, encoder):
+        label_id, task_id = ObjectId(), ObjectId()
+        labels, tasks = MagicMock(), MagicMock()
+        labels.stream_labels_by_user.return_value = FakeCursor([
+            {"_id": label_id, "user_id": USER.id, "name": "Work", "color": None, "task_count": 1},
+        ])
+        tasks.stream_tasks_by_user.return_value = FakeCursor([{
+            "_id": task_id, "user_id": USER.id, "title": "Write, docs", "priority": "High",
+            "deadline": datetime(2024, 12, 31), "status": "open", "label_ids": [label_id],
+            "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1),
+        }])
+        with patch("app.db.transfer.LabelRepository", return_value=labels), \
+                patch("app.db.transfer.TaskRepository", return_value=tasks):
+            body = b"".join(asyncio.run(collect(encoder(export_records(MagicMock(), USER.id)))))
+        return body, label_id, task_id
+
+    def test_ndjson_labels_then_tasks(self):
+        """Test NDJSON has one typed object per line without account fields"""
+        body, label_id, task_id = self.export(ndjson_export)
+        label, task = [json.loads(line) for line in body.splitlines()]
+
+        assert label == {"type": "label", "_id": str(label_id), "name": "Work", "color": None,
+                         "created_at": label["created_at"], "updated_at": label["updated_at"]}
+        assert task["type"] == "task"
+        assert task["label_ids"] == [str(label_id)]
+        assert task["deadline"] == "2024-12-31"
+        assert "user_id" not in task
+
+    def test_csv_one_table(self):
+        """Test CSV rows share one header and quote embedded commas"""
+        body, label_id, task_id = self.export(csv_export)
+        header, label, task = body.decode().splitlines()
+
+        assert header.startswith("type,_id,name,color,title")
+        assert label.startswith(f"label,{label_id},Work,")
+        assert f'task,{task_id},,,"Write, docs"' in task
+        assert str(label_id) in task
+
+class TestImporter:
+    """Test validating and writing NDJSON imports"""
+
+    def test_label_ids_are_remapped(self):
+        """Test tasks point at the new ids of the labels they referenced"""
+        labels, tasks = make_repos()
+        result = run_import([
+            json.dumps({"type": "label", "_id": "old1", "name": "Work"}),
+            task_line(label_ids=["old1"], created_at="2023-05-01T08:00:00"),
+        ], labels, tasks)
+
+        (label_docs, _), = [call.args for call in labels.insert_label_documents.await_args_list]
+        (task_docs, _), = [call.args for call in tasks.insert_task_documents.await_args_list]
+        assert task_docs[0]["label_ids"] == [label_docs[0]["_id"]]
+        assert task_docs[0]["created_at"] == datetime(2023, 5, 1, 8)
+        assert task_docs[0]["user_id"] == USER.id
+        assert (result.labels.created, result.tasks.created) == (1, 1)
+
+    def test_existing_label_names_are_reused(self):
+        """Test a label already in the account is matched by name, not duplicated"""
+        existing = ObjectId()
+        labels, tasks = make_repos({"Work": existing})
+        result = run_import([
+            json.dumps({"type": "label", "_id": "old1", "name": "Work"}),
+            task_line(label_ids=["old1"]),
+        ], labels, tasks)
+
+        labels.insert_label_documents.assert_not_awaited()
+        assert tasks.insert_task_documents.await_args.args[0][0]["label_ids"] == [existing]
+        assert result.labels.existing == 1
+
+    def test_writes_in_batches(self):
+        """Test tasks are written batch_size at a time"""
+        labels, tasks = make_repos()
+        result = run_import([task_line(title=f"Task {i}") for i in range(5)], labels, tasks, batch_size=2)
+
+        assert [len(call.args[0]) for call in tasks.insert_task_documents.await_args_list] == [2, 2, 1]
+        assert result.tasks.created == 5
+
+    def test_invalid_lines_are_reported(self):
+        """Test bad lines are skipped with their line numbers while the rest import"""
+        labels, tasks = make_repos()
+        result = run_import([
+            "not json",
+            json.dumps({"type": "note"}),
+            task_line(priority="Urgent"),
+            task_line(label_ids=["missing"]),
+            "",
+            task_line(),
+        ], labels, tasks)
+
+        assert [error.line for error in result.errors] == [1, 2, 3, 4]
+        assert result.errors[3].error == "Unknown label id missing"
+        assert (result.tasks.created, result.tasks.failed) == (1, 2)
+
+    def test_failed_label_write_fails_its_tasks(self):
+        """Test tasks are not pointed at a label that could not be written"""
+        labels, tasks = make_repos()
+        labels.insert_label_documents.side_effect = lambda docs, user_id: ["duplicate key"] * len(docs)
+        result = run_import([
+            json.dumps({"type": "label", "_id": "old1", "name": "Work"}),
+            task_line(label_ids=["old1"]),
+        ], labels, tasks)
+
+        assert (result.labels.failed, result.tasks.failed) == (1, 1)
+        tasks.insert_task_documents.assert_not_awaited()
+
+class TestTransferEndpoints:
+    """Test GET /export and POST /import"""
+
+    @pytest.fixture(autouse=True)
+    def authenticated(self):
+        app.dependency_overrides[get_current_user] = lambda: USER
+        yield
+        app.dependency_overrides.pop(get_current_user, None)
+
+    def test_export_csv_download(self):
+        """Test the export is sent as an attachment in the requested format"""
+        async def records(db, user_id):
+            yield {"type": "label", "_id": "1", "name": "Work"}
+
+        with patch("app.api.transfer.export_records", records):
+            response = TestClient(app).get("/export?format=csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="todo_export_' in response.headers["content-disposition"]
+        assert response.text.splitlines()[1].startswith("label,1,Work")
+
+    def test_import_streams_body(self):
+        """Test an NDJSON upload is imported and summarized"""
+        labels, tasks = make_repos()
+        body = "\n".join([json.dumps({"type": "label", "_id": "a", "name": "Work"}), task_line(label_ids=["a"])])
+        with patch("app.db.transfer.LabelRepository", return_value=labels), \
+                patch("app.db.transfer.TaskRepository", return_value=tasks):
+            response = TestClient(app).post(
+                "/import", content=body, headers={"Content-Type": "application/x-ndjson"}
+            )
+
+        assert response.status_code == 200
+        assert response.json()["labels"]["created"] == 1
+        assert response.json()["tasks"]["created"] == 1